@@ -1,5 +1,7 @@
 from ._version import __version__  # noqa: F401
 from .epochs import create_epochs  # noqa: F401
+from .evoked import compute_evokeds  # noqa: F401
+from .features import export_features, read_features  # noqa: F401
 from .io import read_raw  # noqa: F401
 from .utils.config import sys_info  # noqa: F401
 from .utils.logs import add_file_handler, logger, set_log_level  # noqa: F401
@@ -0,0 +1,3 @@
+"""Signal complexity module."""
+
+from .entropy import compute_entropy_participants, compute_entropy_windows  # noqa: F401
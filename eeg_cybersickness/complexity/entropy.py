@@ -0,0 +1,277 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from math import factorial
+from typing import TYPE_CHECKING
+
+import numpy as np
+from mne.io import BaseRaw, read_raw_fif
+from mne.io.pick import _picks_to_idx
+from mne.parallel import parallel_func
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ..utils._checks import _ensure_int, check_type, check_value
+from ..utils._docs import fill_doc
+from ..utils._windows import (
+    _batch_size,
+    _check_window_parameters,
+    _iter_window_batches,
+    _window_onsets,
+)
+from ..utils.logs import logger
+from ..utils.path import get_derivative_stem
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Dict, List, Optional, Tuple, Union
+
+    from numpy.typing import NDArray
+
+
+_METHODS = ("sample", "permutation")
+
+
+@fill_doc
+def compute_entropy_windows(
+    raw: BaseRaw,
+    start: float = 0.0,
+    stop: Optional[float] = None,
+    duration: float = 2.0,
+    overlap: float = 1.9,
+    method: Union[str, Tuple[str, ...]] = ("sample", "permutation"),
+    m: int = 2,
+    r: float = 0.2,
+    order: int = 3,
+    delay: int = 1,
+    picks="eeg",
+    reject_by_annotation: bool = True,
+    batch_size: Optional[int] = None,
+) -> Tuple[Dict[str, NDArray[float]], NDArray[float]]:
+    """Compute the sample and permutation entropy on sliding windows.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording.
+    %(start_stop)s
+    %(duration_overlap)s
+    method : str | tuple of str
+        Entropy measure(s) to compute among ``"sample"`` and
+        ``"permutation"``.
+    m : int
+        Embedding dimension of the sample entropy.
+    r : float
+        Tolerance of the sample entropy, relative to the standard deviation of
+        each window.
+    order : int
+        Order of the ordinal patterns of the permutation entropy.
+    delay : int
+        Delay in samples between the points of an ordinal pattern.
+    %(picks)s
+    %(reject_by_annotation)s
+    %(batch_size)s
+
+    Returns
+    -------
+    entropy : dict
+        The key is the entropy measure and the value is an array of shape
+        (n_windows, n_channels). The permutation entropy is normalized between 0
+        and 1 by ``log(order!)``.
+    times : array of shape (n_windows,)
+        Onset of each window in seconds.
+
+    Notes
+    -----
+    The sample entropy uses a sorted-neighbor search: the templates of each
+    series are sorted along their first coordinate, and only the pairs within
+    the tolerance on this coordinate are compared on the remaining ones. All
+    series of a batch are sorted together in a single array. The sample
+    entropy is infinite if no template of length ``m + 1`` matches, and NaN if
+    no template of length ``m`` matches.
+
+    The permutation entropy hashes the rank order of every pattern to its
+    Lehmer code, an integer between 0 and ``order!``, and counts the patterns
+    of all series with a single bincount.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    method = (method,) if isinstance(method, str) else method
+    check_type(method, (tuple,), "method")
+    for meth in method:
+        check_value(meth, _METHODS, "method")
+    m = _ensure_int(m, "m")
+    check_type(r, ("numeric",), "r")
+    order = _ensure_int(order, "order")
+    delay = _ensure_int(delay, "delay")
+    for var, name in ((m, "m"), (r, "r"), (delay, "delay")):
+        if var <= 0:
+            raise ValueError(
+                f"Argument '{name}' should be strictly positive. {var} is invalid."
+            )
+    if order < 2:
+        raise ValueError(f"Argument 'order' should be at least 2. {order} is invalid.")
+    n_window, n_step = _check_window_parameters(raw.info["sfreq"], duration, overlap)
+    if n_window <= max(m + 1, (order - 1) * delay + 1):
+        raise ValueError(
+            f"The windows of {n_window} samples are too short for the embedding "
+            "dimension or the ordinal pattern order."
+        )
+    onsets = _window_onsets(raw, start, stop, n_window, n_step, reject_by_annotation)
+    picks = _picks_to_idx(raw.info, picks, exclude="bads")
+    if batch_size is None:
+        # the sample entropy may compare all template pairs within a window
+        n_bytes = picks.size * n_window**2 * 16 if "sample" in method else 1
+        # the permutation entropy counts the order! patterns of every series
+        n_bytes_pe = picks.size * (n_window * order + factorial(order)) * 8
+        batch_size = _batch_size(max(n_bytes, n_bytes_pe))
+    logger.info(
+        "Computing the %s entropy of %i windows.", " and ".join(method), onsets.size
+    )
+
+    entropy = {meth: np.empty((onsets.size, picks.size)) for meth in method}
+    for sl, data in _iter_window_batches(raw, picks, onsets, n_window, batch_size):
+        data = data.reshape(-1, n_window)
+        if "sample" in method:
+            entropy["sample"][sl] = _sample_entropy(data, m, r).reshape(-1, picks.size)
+        if "permutation" in method:
+            entropy["permutation"][sl] = _permutation_entropy(
+                data, order, delay
+            ).reshape(-1, picks.size)
+    return entropy, onsets / raw.info["sfreq"]
+
+
+@fill_doc
+def compute_entropy_participants(
+    root: Union[str, Path],
+    participants: List[int],
+    session: int,
+    duration: float = 2.0,
+    overlap: float = 1.9,
+    n_jobs: Optional[int] = None,
+) -> Dict[int, Tuple[Dict[str, NDArray[float]], NDArray[float]]]:
+    """Compute the sample and permutation entropy of several participants.
+
+    The EEG channels are read from the preprocessed derivative
+    ``derivatives/PXX/PXX_SY-raw.fif`` of each participant.
+
+    Parameters
+    ----------
+    %(root)s
+    participants : list of int
+        Participant IDs.
+    %(session)s
+    %(duration_overlap)s
+    %(n_jobs)s
+
+    Returns
+    -------
+    entropy : dict
+        The key is the participant ID and the value is the output of
+        :func:`compute_entropy_windows`.
+    """
+    check_type(participants, (list, tuple), "participants")
+    parallel, p_fun, _ = parallel_func(_compute_entropy_participant, n_jobs)
+    outputs = parallel(
+        p_fun(root, participant, session, duration, overlap)
+        for participant in participants
+    )
+    return dict(zip(participants, outputs))
+
+
+def _compute_entropy_participant(
+    root: Union[str, Path],
+    participant: int,
+    session: int,
+    duration: float,
+    overlap: float,
+) -> Tuple[Dict[str, NDArray[float]], NDArray[float]]:
+    """Compute the sample and permutation entropy of one participant."""
+    stem = get_derivative_stem(root, participant, session)
+    raw = read_raw_fif(stem.with_name(f"{stem.name}-raw.fif"), preload=False)
+    return compute_entropy_windows(raw, duration=duration, overlap=overlap)
+
+
+def _sample_entropy(x: NDArray[float], m: int, r: float) -> NDArray[float]:
+    """Compute the sample entropy of a batch of series.
+
+    Parameters
+    ----------
+    x : array of shape (n_series, n_times)
+        Series.
+    m : int
+        Embedding dimension.
+    r : float
+        Tolerance, relative to the standard deviation of each series.
+
+    Returns
+    -------
+    sampen : array of shape (n_series,)
+        Sample entropy of each series.
+    """
+    n_series, n_times = x.shape
+    n_templates = n_times - m  # identical for the lengths m and m + 1
+    std = x.std(axis=-1, keepdims=True)
+    x = (x - x.min(axis=-1, keepdims=True)) / np.where(std == 0, 1, std)
+    # shift each series to its own range to sort all the templates at once
+    span = x.max() + r + 1
+    key = (x[:, :n_templates] + span * np.arange(n_series)[:, np.newaxis]).ravel()
+    order = np.argsort(key, kind="stable")
+    key = key[order]
+    # candidates within the tolerance on the first coordinate, after each template
+    upper = np.searchsorted(key, key + r, side="right")
+    counts = upper - np.arange(key.size) - 1
+    first = np.repeat(np.arange(key.size), counts)
+    second = (
+        first
+        + 1
+        + np.arange(counts.sum())
+        - np.repeat(np.cumsum(counts) - counts, counts)
+    )
+    series, idx1 = np.divmod(order[first], n_templates)
+    idx2 = order[second] % n_templates
+    del first, second
+    # compare the remaining coordinates
+    match = np.ones(series.size, dtype=bool)
+    for k in range(1, m):
+        match &= np.abs(x[series, idx1 + k] - x[series, idx2 + k]) <= r
+    series, idx1, idx2 = series[match], idx1[match], idx2[match]
+    n_m = np.bincount(series, minlength=n_series)
+    match = np.abs(x[series, idx1 + m] - x[series, idx2 + m]) <= r
+    n_m1 = np.bincount(series[match], minlength=n_series)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return -np.log(n_m1 / n_m)
+
+
+def _permutation_entropy(x: NDArray[float], order: int, delay: int) -> NDArray[float]:
+    """Compute the normalized permutation entropy of a batch of series.
+
+    Parameters
+    ----------
+    x : array of shape (n_series, n_times)
+        Series.
+    order : int
+        Order of the ordinal patterns.
+    delay : int
+        Delay in samples between the points of a pattern.
+
+    Returns
+    -------
+    pe : array of shape (n_series,)
+        Permutation entropy of each series, normalized between 0 and 1.
+    """
+    n_series = x.shape[0]
+    # (n_series, n_patterns, order) embedding, no copy
+    patterns = sliding_window_view(x, (order - 1) * delay + 1, axis=-1)[..., ::delay]
+    ranks = np.argsort(patterns, axis=-1, kind="stable")
+    # hash the rank order with its Lehmer code, unique per permutation and
+    # between 0 and order!
+    hashes = np.zeros(ranks.shape[:-1], dtype=np.int64)
+    for k in range(order - 1):
+        n_smaller = np.sum(ranks[..., k + 1 :] < ranks[..., k, np.newaxis], axis=-1)
+        hashes += n_smaller * factorial(order - 1 - k)
+    n_hashes = factorial(order)
+    offsets = np.arange(n_series)[:, np.newaxis] * n_hashes
+    counts = np.bincount(
+        (hashes + offsets).ravel(), minlength=n_series * n_hashes
+    ).reshape(n_series, n_hashes)
+    p = counts / counts.sum(axis=-1, keepdims=True)
+    entropy = -np.sum(p * np.log(np.where(p == 0, 1, p)), axis=-1)
+    return entropy / np.log(factorial(order))
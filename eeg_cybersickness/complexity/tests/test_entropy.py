@@ -0,0 +1,125 @@
+"""Test entropy.py"""
+
+import tracemalloc
+from itertools import permutations
+from math import factorial
+
+import numpy as np
+import pytest
+from mne import Annotations, create_info
+from mne.io import RawArray
+
+from ..entropy import (
+    _permutation_entropy,
+    _sample_entropy,
+    compute_entropy_participants,
+    compute_entropy_windows,
+)
+
+
+def _sample_entropy_naive(x, m, r):
+    """Compute the sample entropy by comparing all template pairs."""
+    r *= x.std()
+    n_templates = x.size - m
+    templates = np.array([x[i : i + m + 1] for i in range(n_templates)])
+    dist_m = np.abs(templates[:, None, :m] - templates[None, :, :m]).max(axis=-1)
+    dist_m1 = np.abs(templates[:, None] - templates[None, :]).max(axis=-1)
+    triu = np.triu_indices(n_templates, k=1)
+    return -np.log(np.sum(dist_m1[triu] <= r) / np.sum(dist_m[triu] <= r))
+
+
+def _permutation_entropy_naive(x, order, delay):
+    """Compute the permutation entropy by counting the patterns."""
+    n_patterns = x.size - (order - 1) * delay
+    patterns = [
+        tuple(np.argsort(x[i : i + (order - 1) * delay + 1 : delay]))
+        for i in range(n_patterns)
+    ]
+    counts = np.array([patterns.count(p) for p in permutations(range(order))])
+    p = counts[counts > 0] / n_patterns
+    return -np.sum(p * np.log(p)) / np.log(factorial(order))
+
+
+@pytest.fixture(scope="module")
+def raw():
+    """Create a raw recording with a noisy channel and a regular channel."""
+    rng = np.random.default_rng(101)
+    times = np.arange(5000) / 250.0
+    data = np.vstack(
+        (
+            rng.standard_normal(times.size),
+            np.sin(2 * np.pi * 10 * times) + 0.01 * rng.standard_normal(times.size),
+        )
+    )
+    info = create_info(["Fz", "Cz"], 250.0, "eeg")
+    return RawArray(data * 1e-6, info)
+
+
+@pytest.mark.parametrize("m", (1, 2, 3))
+def test_sample_entropy(m):
+    """Test the sorted-neighbor sample entropy against the naive algorithm."""
+    rng = np.random.default_rng(101)
+    x = rng.standard_normal((4, 300))
+    x[1] = np.cumsum(x[1])
+    x[2] = np.sin(np.arange(300) / 5) + 0.1 * x[2]
+    expected = [_sample_entropy_naive(series, m, 0.2) for series in x]
+    assert np.allclose(_sample_entropy(x, m, 0.2), expected)
+
+
+@pytest.mark.parametrize(("order", "delay"), [(3, 1), (4, 2), (5, 1), (7, 1)])
+def test_permutation_entropy(order, delay):
+    """Test the vectorized permutation entropy against the naive counting."""
+    rng = np.random.default_rng(101)
+    x = rng.standard_normal((3, 400))
+    x[1] = np.sin(np.arange(400) / 10)
+    expected = [_permutation_entropy_naive(series, order, delay) for series in x]
+    assert np.allclose(_permutation_entropy(x, order, delay), expected)
+
+
+def test_permutation_entropy_memory():
+    """Test that the pattern counts scale with order! instead of order**order."""
+    x = np.random.default_rng(101).standard_normal((100, 500))
+    tracemalloc.start()
+    try:
+        _permutation_entropy(x, 7, 1)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    # counting order**order patterns would allocate 100 * 7**7 * 8 bytes
+    assert peak < 32 * 2**20 < 100 * 7**7 * 8
+
+
+def test_compute_entropy_windows(raw):
+    """Test the entropy on sliding windows."""
+    entropy, times = compute_entropy_windows(raw, overlap=1.0, batch_size=3)
+    assert sorted(entropy) == ["permutation", "sample"]
+    assert entropy["sample"].shape == entropy["permutation"].shape == (19, 2)
+    assert np.allclose(times, np.arange(19))
+    # white noise is more complex than a sinusoid
+    assert np.all(entropy["sample"][:, 0] > entropy["sample"][:, 1])
+    assert np.all(entropy["permutation"][:, 0] > 0.95)
+    # match the entropy of a single window
+    data = raw.get_data(start=500, stop=1000)
+    assert np.allclose(entropy["sample"][2], _sample_entropy(data, 2, 0.2))
+
+    raw_bad = raw.copy()
+    raw_bad.set_annotations(Annotations([2.5], [1.0], "bad_segment"))
+    entropy, times = compute_entropy_windows(raw_bad, overlap=1.0, method="sample")
+    assert list(entropy) == ["sample"]
+    assert np.allclose(times, [0] + list(range(4, 19)))
+
+    with pytest.raises(ValueError, match="Invalid value"):
+        compute_entropy_windows(raw, method="spectral")
+    with pytest.raises(ValueError, match="too short"):
+        compute_entropy_windows(raw, duration=0.02, overlap=0.0, order=6, delay=2)
+
+
+def test_compute_entropy_participants(raw, tmp_path):
+    """Test the parallel computation over participants."""
+    for participant in ("P01", "P02"):
+        (tmp_path / "derivatives" / participant).mkdir(parents=True)
+        raw.save(tmp_path / "derivatives" / participant / f"{participant}_S1-raw.fif")
+    entropy = compute_entropy_participants(tmp_path, [1, 2], 1, overlap=1.0, n_jobs=2)
+    assert sorted(entropy) == [1, 2]
+    expected, _ = compute_entropy_windows(raw, overlap=1.0)
+    assert np.allclose(entropy[2][0]["sample"], expected["sample"])
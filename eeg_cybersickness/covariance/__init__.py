@@ -0,0 +1,4 @@
+"""Spatial covariance module."""
+
+from .covariance import compute_covariance_windows  # noqa: F401
+from .tangent import compute_tangent_space_windows  # noqa: F401
@@ -0,0 +1,164 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from mne.io import BaseRaw
+from mne.io.pick import _picks_to_idx
+
+from ..utils._checks import check_type, check_value
+from ..utils._docs import fill_doc
+from ..utils._windows import (
+    _batch_size,
+    _check_window_parameters,
+    _iter_window_batches,
+    _window_onsets,
+)
+
+if TYPE_CHECKING:
+    from typing import Generator, Optional, Tuple, Union
+
+    from numpy.typing import NDArray
+
+
+@fill_doc
+def compute_covariance_windows(
+    raw: BaseRaw,
+    start: float = 0.0,
+    stop: Optional[float] = None,
+    duration: float = 2.0,
+    overlap: float = 1.9,
+    shrinkage: Optional[Union[str, float]] = "ledoit_wolf",
+    picks="eeg",
+    reject_by_annotation: bool = True,
+    batch_size: Optional[int] = None,
+) -> Tuple[NDArray[float], NDArray[float]]:
+    """Compute the spatial covariance matrix of each sliding window.
+
+    The covariance matrices of a batch of windows are computed at once with
+    ``einsum`` on a sliding-window view of the data, without copying the
+    overlapping samples.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording.
+    %(start_stop)s
+    %(duration_overlap)s
+    %(shrinkage)s
+    %(picks)s
+    %(reject_by_annotation)s
+    %(batch_size)s
+
+    Returns
+    -------
+    covs : array of shape (n_windows, n_channels, n_channels)
+        Covariance matrix of each window.
+    times : array of shape (n_windows,)
+        Onset of each window in seconds.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    n_window, n_step = _check_window_parameters(raw.info["sfreq"], duration, overlap)
+    onsets = _window_onsets(raw, start, stop, n_window, n_step, reject_by_annotation)
+    picks = _picks_to_idx(raw.info, picks, exclude="bads")
+    covs = np.empty((onsets.size, picks.size, picks.size))
+    for sl, cov in _iter_covariance_batches(
+        raw, picks, onsets, n_window, shrinkage, batch_size
+    ):
+        covs[sl] = cov
+    return covs, onsets / raw.info["sfreq"]
+
+
+def _iter_covariance_batches(
+    raw: BaseRaw,
+    picks: NDArray[int],
+    onsets: NDArray[int],
+    n_window: int,
+    shrinkage: Optional[Union[str, float]],
+    batch_size: Optional[int],
+) -> Generator[Tuple[slice, NDArray[float]], None, None]:
+    """Iterate over the covariance matrices of batches of windows.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording.
+    picks : array of int
+        Indices of the channels to retrieve.
+    onsets : array of shape (n_windows,)
+        Onset of each window, as an index in the data array.
+    n_window : int
+        Number of samples in a window.
+    shrinkage : ``"ledoit_wolf"`` | float | None
+        Shrinkage of the covariance matrices.
+    batch_size : int | None
+        Number of windows processed together.
+
+    Yields
+    ------
+    sl : slice
+        Slice selecting the windows of the batch in ``onsets``.
+    covs : array of shape (n_batch, n_channels, n_channels)
+        Covariance matrices of the windows in the batch.
+    """
+    check_type(shrinkage, (str, "numeric", None), "shrinkage")
+    if isinstance(shrinkage, str):
+        check_value(shrinkage, ("ledoit_wolf",), "shrinkage")
+    elif shrinkage is not None and not 0 <= shrinkage <= 1:
+        raise ValueError(
+            "Argument 'shrinkage' should be a float between 0 and 1. "
+            f"{shrinkage} is invalid."
+        )
+    if batch_size is None:
+        batch_size = _batch_size(max(picks.size, n_window) * picks.size * 8)
+    for sl, data in _iter_window_batches(raw, picks, onsets, n_window, batch_size):
+        yield sl, _shrunk_covariances(data, shrinkage)
+
+
+def _shrunk_covariances(
+    data: NDArray[float], shrinkage: Optional[Union[str, float]]
+) -> NDArray[float]:
+    """Compute the shrunk covariance matrices of a batch of windows.
+
+    Parameters
+    ----------
+    data : array of shape (n_windows, n_channels, n_times)
+        Data of the windows, possibly a non-contiguous view.
+    shrinkage : ``"ledoit_wolf"`` | float | None
+        Shrinkage of the covariance matrices.
+
+    Returns
+    -------
+    covs : array of shape (n_windows, n_channels, n_channels)
+        Covariance matrices, normalized by the number of samples as
+        :func:`sklearn.covariance.ledoit_wolf`.
+    """
+    n_channels, n_times = data.shape[1:]
+    # the data is not centered in place to keep the overlapping windows as views
+    mean = data.mean(axis=-1)
+    covs = np.einsum("bct,bdt->bcd", data, data) / n_times
+    covs -= mean[:, :, np.newaxis] * mean[:, np.newaxis, :]
+    if shrinkage is None:
+        return covs
+    # shrinkage target mu * I with mu the average variance
+    trace = np.trace(covs, axis1=1, axis2=2)
+    mu = trace / n_channels
+    if shrinkage == "ledoit_wolf":
+        # c.f. sklearn.covariance.ledoit_wolf_shrinkage
+        # squared norm of each centered sample, expanded to avoid the centering
+        norms = (
+            np.einsum("bct,bct->bt", data, data)
+            - 2 * np.einsum("bct,bc->bt", data, mean)
+            + np.sum(mean**2, axis=-1, keepdims=True)
+        )
+        beta_ = np.sum(norms**2, axis=-1)
+        delta_ = np.sum(covs**2, axis=(1, 2))
+        beta = (beta_ / n_times - delta_) / (n_channels * n_times)
+        delta = (delta_ - 2 * mu * trace + n_channels * mu**2) / n_channels
+        beta = np.minimum(beta, delta)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            shrinkage = np.where(beta == 0, 0.0, beta / delta)
+    shrinkage = np.broadcast_to(shrinkage, mu.shape)[:, np.newaxis, np.newaxis]
+    covs *= 1 - shrinkage
+    covs += (shrinkage * mu[:, np.newaxis, np.newaxis]) * np.eye(n_channels)
+    return covs
@@ -0,0 +1,162 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from mne.io import BaseRaw
+from mne.io.pick import _picks_to_idx
+
+from ..utils._checks import check_type, ensure_path
+from ..utils._docs import fill_doc
+from ..utils._windows import _check_window_parameters, _window_onsets
+from ..utils.logs import logger
+from .covariance import _iter_covariance_batches
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Callable, Optional, Tuple, Union
+
+    from numpy.typing import NDArray
+
+
+@fill_doc
+def compute_tangent_space_windows(
+    raw: BaseRaw,
+    start: float = 0.0,
+    stop: Optional[float] = None,
+    duration: float = 2.0,
+    overlap: float = 1.9,
+    shrinkage: Optional[Union[str, float]] = "ledoit_wolf",
+    reference: Optional[NDArray[float]] = None,
+    picks="eeg",
+    reject_by_annotation: bool = True,
+    fname: Optional[Union[str, Path]] = None,
+    batch_size: Optional[int] = None,
+) -> Tuple[NDArray[np.float32], NDArray[float], NDArray[float]]:
+    """Compute the tangent-space vectors of the window covariance matrices.
+
+    The covariance matrices of a batch of windows are computed at once and
+    projected on the tangent space at the reference matrix with batched
+    eigendecompositions. The covariance matrices are never stored for all
+    windows.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording.
+    %(start_stop)s
+    %(duration_overlap)s
+    %(shrinkage)s
+    reference : array of shape (n_channels, n_channels) | None
+        Symmetric positive definite matrix at which the tangent space is
+        computed, e.g. the reference of another session to share the same
+        tangent space. If None, the log-Euclidean mean of the covariance
+        matrices of all windows is used, which requires a first pass over the
+        windows.
+    %(picks)s
+    %(reject_by_annotation)s
+    fname : path-like | None
+        Path to a ``.npy`` file in which the tangent-space vectors are written
+        batch by batch. If provided, the returned array is backed by the
+        memory-mapped file.
+    %(batch_size)s
+
+    Returns
+    -------
+    vectors : array of shape (n_windows, n_channels * (n_channels + 1) // 2)
+        Tangent-space vector of each window in float32. The vector contains the
+        upper triangle of the matrix logarithm, with the off-diagonal elements
+        weighted by ``sqrt(2)`` to preserve the norm.
+    reference : array of shape (n_channels, n_channels)
+        Reference matrix of the tangent space.
+    times : array of shape (n_windows,)
+        Onset of each window in seconds.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    n_window, n_step = _check_window_parameters(raw.info["sfreq"], duration, overlap)
+    onsets = _window_onsets(raw, start, stop, n_window, n_step, reject_by_annotation)
+    picks = _picks_to_idx(raw.info, picks, exclude="bads")
+    if onsets.size == 0:
+        raise RuntimeError("No valid window was found in the recording.")
+
+    if reference is None:
+        logger.info("Computing the log-Euclidean mean of %i windows.", onsets.size)
+        logm_sum = np.zeros((picks.size, picks.size))
+        for _, covs in _iter_covariance_batches(
+            raw, picks, onsets, n_window, shrinkage, batch_size
+        ):
+            logm_sum += _matrix_function(covs, np.log).sum(axis=0)
+        reference = _matrix_function(logm_sum / onsets.size, np.exp)
+    reference = np.asarray(reference, dtype=float)
+    if reference.shape != (picks.size, picks.size):
+        raise ValueError(
+            f"The reference matrix shape {reference.shape} does not match the "
+            f"number of channels ({picks.size})."
+        )
+    isqrt_reference = _matrix_function(reference, lambda x: 1 / np.sqrt(x))
+
+    shape = (onsets.size, picks.size * (picks.size + 1) // 2)
+    if fname is None:
+        vectors = np.empty(shape, dtype=np.float32)
+    else:
+        fname = ensure_path(fname, must_exist=False)
+        if fname.suffix != ".npy":
+            raise ValueError(
+                f"Argument 'fname' should end with '.npy'. '{fname.name}' is invalid."
+            )
+        vectors = np.lib.format.open_memmap(
+            fname, mode="w+", dtype=np.float32, shape=shape
+        )
+    for sl, covs in _iter_covariance_batches(
+        raw, picks, onsets, n_window, shrinkage, batch_size
+    ):
+        vectors[sl] = _tangent_vectors(covs, isqrt_reference)
+    if fname is not None:
+        vectors.flush()
+    return vectors, reference, onsets / raw.info["sfreq"]
+
+
+def _matrix_function(
+    mats: NDArray[float], func: Callable[[NDArray[float]], NDArray[float]]
+) -> NDArray[float]:
+    """Apply a function to the eigenvalues of a batch of symmetric matrices.
+
+    Parameters
+    ----------
+    mats : array of shape (..., n, n)
+        Symmetric matrices.
+    func : callable
+        Function applied element-wise to the eigenvalues, e.g. ``np.log``.
+
+    Returns
+    -------
+    mats : array of shape (..., n, n)
+        Matrix function of each matrix.
+    """
+    eigvals, eigvecs = np.linalg.eigh(mats)
+    return (eigvecs * func(eigvals)[..., np.newaxis, :]) @ np.swapaxes(eigvecs, -1, -2)
+
+
+def _tangent_vectors(
+    covs: NDArray[float], isqrt_reference: NDArray[float]
+) -> NDArray[float]:
+    """Project a batch of covariance matrices on the tangent space.
+
+    Parameters
+    ----------
+    covs : array of shape (n_matrices, n_channels, n_channels)
+        Symmetric positive definite matrices.
+    isqrt_reference : array of shape (n_channels, n_channels)
+        Inverse square root of the reference matrix.
+
+    Returns
+    -------
+    vectors : array of shape (n_matrices, n_channels * (n_channels + 1) // 2)
+        Upper triangle of the matrix logarithms of the whitened matrices, with
+        the off-diagonal elements weighted by ``sqrt(2)``.
+    """
+    n_channels = covs.shape[-1]
+    logm = _matrix_function(isqrt_reference @ covs @ isqrt_reference, np.log)
+    rows, cols = np.triu_indices(n_channels)
+    weights = np.where(rows == cols, 1.0, np.sqrt(2))
+    return logm[:, rows, cols] * weights
@@ -0,0 +1,41 @@
+"""Test covariance.py"""
+
+import numpy as np
+import pytest
+from mne import create_info
+from mne.io import RawArray
+from sklearn.covariance import empirical_covariance, ledoit_wolf, shrunk_covariance
+
+from ..covariance import compute_covariance_windows
+
+
+@pytest.fixture(scope="module")
+def raw():
+    """Create a random raw recording with correlated channels."""
+    rng = np.random.default_rng(101)
+    mixing = rng.standard_normal((4, 4))
+    data = mixing @ rng.standard_normal((4, 5000)) + 1.0
+    info = create_info(["Fz", "Cz", "Pz", "Oz"], 250.0, "eeg")
+    return RawArray(data * 1e-6, info)
+
+
+def test_compute_covariance_windows(raw):
+    """Test the batched covariance matrices against scikit-learn."""
+    covs, times = compute_covariance_windows(raw, overlap=1.5, batch_size=7)
+    assert covs.shape == (37, 4, 4)
+    assert np.allclose(times, np.arange(0, 18.5, 0.5))
+    data = raw.get_data()
+    for k in (0, 5, 36):
+        window = data[:, k * 125 : k * 125 + 500].T
+        assert np.allclose(covs[k], ledoit_wolf(window)[0])
+
+    covs, _ = compute_covariance_windows(raw, overlap=1.5, shrinkage=None)
+    assert np.allclose(covs[5], empirical_covariance(data[:, 625:1125].T))
+    covs, _ = compute_covariance_windows(raw, overlap=1.5, shrinkage=0.3)
+    expected = shrunk_covariance(empirical_covariance(data[:, 625:1125].T), 0.3)
+    assert np.allclose(covs[5], expected)
+
+    with pytest.raises(ValueError, match="between 0 and 1"):
+        compute_covariance_windows(raw, shrinkage=1.5)
+    with pytest.raises(ValueError, match="Invalid value"):
+        compute_covariance_windows(raw, shrinkage="oas")
@@ -0,0 +1,57 @@
+"""Test tangent.py"""
+
+import numpy as np
+import pytest
+from mne import create_info
+from mne.io import RawArray
+from scipy.linalg import expm, fractional_matrix_power, logm
+
+from ..covariance import compute_covariance_windows
+from ..tangent import compute_tangent_space_windows
+
+
+@pytest.fixture(scope="module")
+def raw():
+    """Create a random raw recording with correlated channels."""
+    rng = np.random.default_rng(101)
+    mixing = rng.standard_normal((4, 4))
+    data = mixing @ rng.standard_normal((4, 5000))
+    info = create_info(["Fz", "Cz", "Pz", "Oz"], 250.0, "eeg")
+    return RawArray(data * 1e-6, info)
+
+
+@pytest.mark.filterwarnings("ignore:logm result may be inaccurate:RuntimeWarning")
+def test_compute_tangent_space_windows(raw, tmp_path):
+    """Test the tangent-space vectors against scipy matrix functions."""
+    vectors, reference, times = compute_tangent_space_windows(
+        raw, overlap=1.0, batch_size=4
+    )
+    assert vectors.shape == (19, 10)
+    assert vectors.dtype == np.float32
+    assert times.size == 19
+
+    covs, _ = compute_covariance_windows(raw, overlap=1.0)
+    expected = expm(np.mean([logm(cov) for cov in covs], axis=0))
+    assert np.allclose(reference, expected, rtol=1e-6)
+    isqrt = fractional_matrix_power(reference, -0.5)
+    rows, cols = np.triu_indices(4)
+    for k in (0, 10, 18):
+        tangent = logm(isqrt @ covs[k] @ isqrt)
+        expected = tangent[rows, cols] * np.where(rows == cols, 1, np.sqrt(2))
+        assert np.allclose(vectors[k], expected, rtol=1e-4, atol=1e-5)
+        # the norm of the vector is the Riemannian distance to the reference
+        assert np.isclose(
+            np.linalg.norm(vectors[k]), np.linalg.norm(tangent), rtol=1e-5
+        )
+
+    # shared reference and written to disk
+    fname = tmp_path / "tangent.npy"
+    vectors2, reference2, _ = compute_tangent_space_windows(
+        raw, overlap=1.0, reference=reference, fname=fname
+    )
+    assert np.array_equal(reference2, reference)
+    assert np.allclose(vectors2, vectors)
+    assert np.allclose(np.load(fname), vectors)
+
+    with pytest.raises(ValueError, match="does not match"):
+        compute_tangent_space_windows(raw, reference=np.eye(3))
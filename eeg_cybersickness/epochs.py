@@ -9,14 +9,23 @@ import numpy as np
 from mne import Epochs, find_events
 
 from .triggers import load_triggers
-from .utils._checks import check_type
+from .utils._checks import _check_dtype, check_type
+from .utils._docs import fill_doc
 
 if TYPE_CHECKING:
+    from typing import Union
+
     from mne import BaseEpochs
     from mne.io import BaseRaw
 
 
-def create_epochs(raw: BaseRaw, duration: float, overlap: float) -> BaseEpochs:
+@fill_doc
+def create_epochs(
+    raw: BaseRaw,
+    duration: float,
+    overlap: float,
+    dtype: Union[str, np.dtype] = "float64",
+) -> BaseEpochs:
     """Create epochs based on the synthetic STI channel.
 
     Parameters
@@ -28,14 +37,23 @@ def create_epochs(raw: BaseRaw, duration: float, overlap: float) -> BaseEpochs:
     overlap : float
         Duration of the overlap between epochs in seconds.
         Must be 0 <= overlap < duration.
+    %(dtype)s
 
     Returns
     -------
     epochs : Epochs
         All the created epochs.
+
+    Notes
+    -----
+    The overlapping epochs duplicate the samples of the recording. With
+    ``dtype="float32"``, the peak memory is the lowest if the recording is
+    already in float32, e.g. with ``read_raw(..., dtype="float32")``, since the
+    epochs are then extracted without an intermediate float64 array.
     """
     check_type(duration, ("numeric",), "duration")
     check_type(overlap, ("numeric",), "overlap")
+    dtype = _check_dtype(dtype)
     if duration <= 0:
         raise ValueError("Argument 'duration' should be a strictly positive number.")
     if raw.info["sfreq"] * duration != np.round(raw.info["sfreq"] * duration):
@@ -82,7 +100,7 @@ def create_epochs(raw: BaseRaw, duration: float, overlap: float) -> BaseEpochs:
         for key, value in load_triggers().items()
         if value in np.unique(events_[:, 2])
     }
-    return Epochs(
+    epochs = Epochs(
         raw,
         events_,
         event_id,
@@ -93,3 +111,6 @@ def create_epochs(raw: BaseRaw, duration: float, overlap: float) -> BaseEpochs:
         preload=True,
         reject_by_annotation=True,
     )
+    # the epochs are extracted in the dtype of the recording
+    epochs._data = epochs._data.astype(dtype, copy=False)
+    return epochs
@@ -0,0 +1,205 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from mne import EvokedArray, find_events, pick_info, write_evokeds
+from mne.io import BaseRaw
+from mne.io.pick import _picks_to_idx
+
+from .triggers import load_triggers
+from .utils._checks import check_type, ensure_path
+from .utils._docs import fill_doc
+from .utils._stats import _RunningStats
+from .utils._windows import _batch_size, _drop_bad_windows, _iter_segment_batches
+from .utils.logs import logger
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Dict, List, Optional, Tuple, Union
+
+    from mne import Evoked
+    from numpy.typing import NDArray
+
+
+@fill_doc
+def compute_evokeds(
+    raw: BaseRaw,
+    tmin: float = -0.5,
+    tmax: float = 2.0,
+    baseline: Optional[Tuple[Optional[float], Optional[float]]] = (None, 0),
+    event_id: Optional[Dict[str, int]] = None,
+    picks="eeg",
+    reject_by_annotation: bool = True,
+    fname: Optional[Union[str, Path]] = None,
+    overwrite: bool = False,
+    batch_size: Optional[int] = None,
+) -> Dict[str, Evoked]:
+    """Compute the evoked responses locked to the events of the STI channel.
+
+    The epochs are gathered in batches from the raw recording and merged in a
+    running average per condition, thus the epochs are never stored.
+
+    Parameters
+    ----------
+    raw : Raw
+        Preprocessed raw recording with a synthetic STI channel.
+    tmin : float
+        Start of the epochs in seconds, relative to the events.
+    tmax : float
+        End of the epochs in seconds, relative to the events.
+    baseline : tuple | None
+        Start and end of the baseline period in seconds. If None, no baseline
+        correction is applied. A None start or end corresponds to the start or
+        end of the epochs.
+    event_id : dict | None
+        The key is the name of a condition and the value is its trigger code on
+        the synthetic STI channel. If None, all the triggers from
+        :func:`~eeg_cybersickness.triggers.load_triggers` are used.
+    %(picks)s
+    reject_by_annotation : bool
+        If True, epochs overlapping an annotation whose description starts with
+        ``"bad"`` are dropped.
+    fname : path-like | None
+        Path to a ``-ave.fif`` file in which the evoked responses are written
+        once all batches are processed.
+    overwrite : bool
+        If True, ``fname`` is overwritten if it exists.
+    %(batch_size)s
+
+    Returns
+    -------
+    evokeds : dict
+        The key is the name of the condition and the value is the ``Evoked``
+        of that condition. Conditions without any epoch are omitted.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    sfreq = raw.info["sfreq"]
+    check_type(tmin, ("numeric",), "tmin")
+    check_type(tmax, ("numeric",), "tmax")
+    if tmax <= tmin:
+        raise ValueError(
+            f"Argument 'tmax' ({tmax}) should be larger than 'tmin' ({tmin})."
+        )
+    check_type(reject_by_annotation, (bool,), "reject_by_annotation")
+    check_type(overwrite, (bool,), "overwrite")
+    if event_id is None:
+        event_id = load_triggers()
+    check_type(event_id, (dict,), "event_id")
+    if fname is not None:
+        fname = ensure_path(fname, must_exist=False)
+        if fname.exists() and not overwrite:
+            raise FileExistsError(
+                f"The file {fname} already exists. Use 'overwrite=True' to replace it."
+            )
+    picks = _picks_to_idx(raw.info, picks, exclude="bads")
+
+    # select the epochs
+    events = find_events(raw, stim_channel="STI")
+    events = events[np.isin(events[:, 2], list(event_id.values()))]
+    offset = int(np.round(tmin * sfreq))
+    n_times = int(np.round((tmax - tmin) * sfreq)) + 1
+    times = (offset + np.arange(n_times)) / sfreq
+    onsets = events[:, 0] - raw.first_samp + offset
+    if reject_by_annotation:
+        good = _drop_bad_windows(raw, onsets, n_times)
+    else:
+        good = onsets[(0 <= onsets) & (onsets + n_times <= raw.n_times)]
+    valid = np.isin(onsets, good)
+    onsets, codes = onsets[valid], events[valid, 2]
+    if onsets.size == 0:
+        raise RuntimeError("No epoch was found in the recording.")
+    conditions = {
+        name: code for name, code in event_id.items() if np.any(codes == code)
+    }
+    labels = np.argmax(codes[:, np.newaxis] == list(conditions.values()), axis=1)
+    logger.info("Averaging %i epochs in %i conditions.", onsets.size, len(conditions))
+
+    bmask = _baseline_mask(baseline, times)
+    stats = _average_segments(
+        raw, picks, onsets, labels, len(conditions), n_times, bmask, batch_size
+    )
+    info = pick_info(raw.info, picks)
+    evokeds = {
+        name: EvokedArray(
+            stat.mean,
+            info,
+            tmin=times[0],
+            comment=name,
+            nave=stat.count,
+            baseline=baseline,
+        )
+        for name, stat in zip(conditions, stats)
+    }
+    if fname is not None:
+        write_evokeds(fname, list(evokeds.values()), overwrite=overwrite)
+        logger.info("Evoked responses written to %s.", fname)
+    return evokeds
+
+
+def _baseline_mask(
+    baseline: Optional[Tuple[Optional[float], Optional[float]]], times: NDArray[float]
+) -> Optional[NDArray[bool]]:
+    """Check the baseline period and convert it to a mask on the epoch samples."""
+    check_type(baseline, (tuple, None), "baseline")
+    if baseline is None:
+        return None
+    if len(baseline) != 2:
+        raise ValueError(
+            "Argument 'baseline' should be a 2-tuple (start, end). "
+            f"{baseline} is invalid."
+        )
+    bmin = times[0] if baseline[0] is None else baseline[0]
+    bmax = times[-1] if baseline[1] is None else baseline[1]
+    bmask = (bmin <= times) & (times <= bmax)
+    if not np.any(bmask):
+        raise ValueError(f"The baseline period {baseline} does not contain any sample.")
+    return bmask
+
+
+def _average_segments(
+    raw: BaseRaw,
+    picks: NDArray[int],
+    onsets: NDArray[int],
+    labels: NDArray[int],
+    n_labels: int,
+    n_times: int,
+    bmask: Optional[NDArray[bool]],
+    batch_size: Optional[int],
+) -> List[_RunningStats]:
+    """Average segments of the raw recording per label, batch by batch.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording, preloaded or not.
+    picks : array of int
+        Indices of the channels to retrieve.
+    onsets : array of shape (n_segments,)
+        Onset of each segment, as an index in the data array.
+    labels : array of shape (n_segments,)
+        Label of each segment, between 0 and ``n_labels - 1``.
+    n_labels : int
+        Number of labels.
+    n_times : int
+        Number of samples in a segment.
+    bmask : array of shape (n_times,) | None
+        Mask of the baseline samples subtracted from each segment.
+    batch_size : int | None
+        Number of segments in a batch. If None, the batch size is chosen to keep
+        a batch below 64 MiB.
+
+    Returns
+    -------
+    stats : list of _RunningStats
+        Running mean and variance of the segments of each label.
+    """
+    if batch_size is None:
+        batch_size = _batch_size(picks.size * n_times * 8)
+    stats = [_RunningStats((picks.size, n_times)) for _ in range(n_labels)]
+    for sl, data in _iter_segment_batches(raw, picks, onsets, n_times, batch_size):
+        if bmask is not None:
+            data = data - data[..., bmask].mean(axis=-1, keepdims=True)
+        for label in np.unique(labels[sl]):
+            stats[label].update(data[labels[sl] == label])
+    return stats
@@ -0,0 +1,314 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+import json
+from typing import TYPE_CHECKING
+
+import numpy as np
+from mne.io import read_raw_fif
+from mne.io.pick import _picks_to_idx
+from mne.parallel import parallel_func
+
+from .spectral._bands import _check_bands
+from .spectral.psd import _get_freqs, _iter_psd_batches
+from .utils._checks import _check_dtype, check_type, check_value, ensure_path
+from .utils._docs import fill_doc
+from .utils._windows import (
+    _check_window_parameters,
+    _window_conditions,
+    _window_onsets,
+)
+from .utils.logs import logger
+from .utils.path import get_derivative_stem
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Any, Dict, List, Optional, Tuple, Union
+
+    from mne.io import BaseRaw
+    from numpy.typing import NDArray
+
+
+_INDEX_DTYPE = np.dtype(
+    [
+        ("participant", np.uint8),
+        ("session", np.uint8),
+        ("time", np.float32),
+        ("condition", np.int16),
+    ]
+)
+
+
+@fill_doc
+def export_features(
+    root: Union[str, Path],
+    participants: List[int],
+    sessions: Tuple[int, ...],
+    fname: Union[str, Path],
+    duration: float = 2.0,
+    overlap: float = 1.9,
+    bands: Optional[Dict[str, Tuple[float, float]]] = None,
+    method: str = "welch",
+    relative: bool = True,
+    overwrite: bool = False,
+    n_jobs: Optional[int] = None,
+    dtype: Union[str, np.dtype] = "float64",
+) -> Tuple[NDArray[np.float32], NDArray]:
+    """Export the band power of each window in a memory-mapped tensor.
+
+    The band powers of all participants and sessions are written in a single
+    contiguous float32 tensor of shape (n_windows, n_channels, n_features),
+    stored as a ``.npy`` file. Each recording writes its own block of windows
+    directly in the memory-mapped file, thus the features are never gathered in
+    memory. The EEG channels are read from the preprocessed derivatives
+    ``derivatives/PXX/PXX_SY-raw.fif``.
+
+    Parameters
+    ----------
+    %(root)s
+    participants : list of int
+        Participant IDs.
+    sessions : tuple of int
+        Session IDs.
+    fname : path-like
+        Path to the ``.npy`` file in which the tensor is written. The index is
+        written next to it in a ``-index.npy`` file and the channel and feature
+        names in a ``.json`` file with the same stem.
+    %(duration_overlap)s
+    bands : dict | None
+        The key is the name of the band and the value is a 2-tuple of floats
+        with the edges of the band in Hz. If None, the delta, theta, alpha and
+        beta bands are used.
+    method : ``"welch"`` | ``"multitaper"``
+        Spectral estimation method, c.f.
+        :func:`~eeg_cybersickness.spectral.compute_psd_windows`.
+    relative : bool
+        If True, the band powers are divided by the power between the lowest
+        and the highest band edges.
+    overwrite : bool
+        If True, existing files are overwritten.
+    %(n_jobs)s
+    dtype : str | dtype
+        Floating point type in which the spectra and the band powers are
+        computed, ``"float64"`` or ``"float32"``. The tensor is written in
+        float32 in both cases.
+
+    Returns
+    -------
+    features : array of shape (n_windows, n_channels, n_features)
+        Memory-mapped tensor of band powers in float32. The channels missing or
+        marked as bad in a recording are set to NaN.
+    index : array of shape (n_windows,)
+        Structured array with the fields ``"participant"``, ``"session"``,
+        ``"time"`` (onset of the window in seconds) and ``"condition"``
+        (trigger code of the event during which the window is recorded, 0 if
+        the window starts before the first event or overlaps 2 events).
+
+    See Also
+    --------
+    read_features
+    """
+    check_type(participants, (list, tuple), "participants")
+    check_type(sessions, (list, tuple), "sessions")
+    check_value(method, ("welch", "multitaper"), "method")
+    check_type(relative, (bool,), "relative")
+    check_type(overwrite, (bool,), "overwrite")
+    dtype = _check_dtype(dtype)
+    fnames = _get_feature_fnames(fname)
+    for fname_ in fnames:
+        if fname_.exists() and not overwrite:
+            raise FileExistsError(
+                f"The file {fname_} already exists. Use 'overwrite=True' to replace it."
+            )
+    recordings = [(p, s) for p in participants for s in sessions]
+
+    # the windows of every recording are listed first to allocate the tensor
+    parallel, p_fun, _ = parallel_func(_list_windows_recording, n_jobs)
+    outputs = parallel(
+        p_fun(root, participant, session, duration, overlap)
+        for participant, session in recordings
+    )
+    ch_names = list()
+    for names, _, _, _ in outputs:
+        ch_names.extend(ch for ch in names if ch not in ch_names)
+    bands = _check_bands(bands, min(output[3] for output in outputs))
+    index = np.empty(sum(output[1].size for output in outputs), dtype=_INDEX_DTYPE)
+    offsets = np.cumsum([0] + [output[1].size for output in outputs])
+    for (participant, session), (_, times, conditions, _), start, stop in zip(
+        recordings, outputs, offsets[:-1], offsets[1:]
+    ):
+        index["participant"][start:stop] = participant
+        index["session"][start:stop] = session
+        index["time"][start:stop] = times
+        index["condition"][start:stop] = conditions
+    np.save(fnames[1], index)
+    with open(fnames[2], "w") as file:
+        json.dump(
+            dict(
+                ch_names=ch_names,
+                features=list(bands),
+                bands=bands,
+                duration=duration,
+                overlap=overlap,
+                method=method,
+                relative=relative,
+            ),
+            file,
+            indent=4,
+        )
+    shape = (index.size, len(ch_names), len(bands))
+    logger.info("Writing a tensor of %i windows, %i channels and %i features.", *shape)
+    features = np.lib.format.open_memmap(
+        fnames[0], mode="w+", dtype=np.float32, shape=shape
+    )
+    features[:] = np.nan
+    features.flush()
+    del features
+
+    # each recording writes its own block of windows
+    parallel, p_fun, _ = parallel_func(_export_features_recording, n_jobs)
+    parallel(
+        p_fun(
+            root,
+            participant,
+            session,
+            fnames[0],
+            start,
+            ch_names,
+            duration,
+            overlap,
+            bands,
+            method,
+            relative,
+            dtype,
+        )
+        for (participant, session), start in zip(recordings, offsets[:-1])
+    )
+    return np.load(fnames[0], mmap_mode="r"), index
+
+
+def read_features(
+    fname: Union[str, Path], mmap_mode: Optional[str] = "r"
+) -> Tuple[NDArray[np.float32], NDArray, Dict[str, Any]]:
+    """Read a feature tensor exported with :func:`export_features`.
+
+    Parameters
+    ----------
+    fname : path-like
+        Path to the ``.npy`` file of the tensor.
+    mmap_mode : ``"r"`` | ``"r+"`` | ``"c"`` | None
+        Memory-map mode of the tensor, c.f. :func:`numpy.load`. If None, the
+        tensor is loaded in memory.
+
+    Returns
+    -------
+    features : array of shape (n_windows, n_channels, n_features)
+        Tensor of features in float32.
+    index : array of shape (n_windows,)
+        Structured array with the fields ``"participant"``, ``"session"``,
+        ``"time"`` and ``"condition"`` of each window.
+    info : dict
+        Description of the tensor with the keys ``"ch_names"``, ``"features"``
+        and the export parameters.
+
+    Notes
+    -----
+    The windows are sorted by participant and session, thus the windows of a
+    recording are a contiguous block of the tensor which can be sliced without
+    copying, e.g. ``features[idx[0] : idx[-1] + 1]`` with
+    ``idx = np.flatnonzero(index["participant"] == 9)``. A boolean mask on the
+    index selects any other subset, at the cost of a copy.
+    """
+    check_value(mmap_mode, ("r", "r+", "c", None), "mmap_mode")
+    fnames = _get_feature_fnames(fname)
+    for fname_ in fnames:
+        if not fname_.exists():
+            raise FileNotFoundError(f"The file {fname_} does not exist.")
+    features = np.load(fnames[0], mmap_mode=mmap_mode)
+    index = np.load(fnames[1])
+    with open(fnames[2]) as file:
+        info = json.load(file)
+    info["bands"] = {key: tuple(value) for key, value in info["bands"].items()}
+    return features, index, info
+
+
+def _get_feature_fnames(fname: Union[str, Path]) -> Tuple[Path, Path, Path]:
+    """Get the file names of the tensor, of its index and of its description."""
+    fname = ensure_path(fname, must_exist=False)
+    if fname.suffix != ".npy":
+        raise ValueError(
+            f"Argument 'fname' should end with '.npy'. '{fname.name}' is invalid."
+        )
+    return (
+        fname,
+        fname.with_name(f"{fname.stem}-index.npy"),
+        fname.with_suffix(".json"),
+    )
+
+
+def _read_derivative(root: Union[str, Path], participant: int, session: int) -> BaseRaw:
+    """Read the preprocessed derivative of one recording."""
+    stem = get_derivative_stem(root, participant, session)
+    return read_raw_fif(stem.with_name(f"{stem.name}-raw.fif"), preload=False)
+
+
+def _list_windows_recording(
+    root: Union[str, Path],
+    participant: int,
+    session: int,
+    duration: float,
+    overlap: float,
+) -> Tuple[List[str], NDArray[float], NDArray[int], float]:
+    """List the EEG channels and the windows of one recording."""
+    raw = _read_derivative(root, participant, session)
+    n_window, n_step = _check_window_parameters(raw.info["sfreq"], duration, overlap)
+    onsets = _window_onsets(raw, 0.0, None, n_window, n_step, True)
+    picks = _picks_to_idx(raw.info, "eeg", exclude=())
+    return (
+        [raw.ch_names[pick] for pick in picks],
+        onsets / raw.info["sfreq"],
+        _window_conditions(raw, onsets, n_window),
+        raw.info["sfreq"],
+    )
+
+
+def _export_features_recording(
+    root: Union[str, Path],
+    participant: int,
+    session: int,
+    fname: Path,
+    start: int,
+    ch_names: List[str],
+    duration: float,
+    overlap: float,
+    bands: Dict[str, Tuple[float, float]],
+    method: str,
+    relative: bool,
+    dtype: np.dtype,
+) -> None:
+    """Write the band powers of one recording in the memory-mapped tensor."""
+    raw = _read_derivative(root, participant, session)
+    sfreq = raw.info["sfreq"]
+    n_window, n_step = _check_window_parameters(sfreq, duration, overlap)
+    onsets = _window_onsets(raw, 0.0, None, n_window, n_step, True)
+    picks = _picks_to_idx(raw.info, "eeg", exclude="bads")
+    channels = np.array([ch_names.index(raw.ch_names[pick]) for pick in picks])
+    fmin = min(edges[0] for edges in bands.values())
+    fmax = max(edges[1] for edges in bands.values())
+    freqs = _get_freqs(sfreq, n_window, fmin, fmax)
+    # integration weights of each band, as a rectangle rule on the frequencies
+    freq_res = sfreq / n_window
+    weights = freq_res * np.array(
+        [(fmin_ <= freqs) & (freqs <= fmax_) for fmin_, fmax_ in bands.values()],
+        dtype=dtype,
+    )
+    features = np.load(fname, mmap_mode="r+")
+    for sl, psd in _iter_psd_batches(
+        raw, picks, onsets, n_window, method, fmin, fmax, None, None, dtype
+    ):
+        bandpower = psd @ weights.T
+        if relative:
+            bandpower /= freq_res * psd.sum(axis=-1, keepdims=True)
+        # the rows of a batch are contiguous in the tensor
+        block = features[start + sl.start : start + sl.stop]
+        block[:, channels] = bandpower
+    features.flush()
@@ -8,7 +8,7 @@ from mne import create_info, find_events
 from mne.io import RawArray, read_raw_brainvision
 
 from .triggers._create_sti import create_sti, find_event_onset
-from .utils._checks import check_rotation_axes, ensure_path
+from .utils._checks import _check_dtype, check_rotation_axes, ensure_path
 from .utils._docs import fill_doc
 from .utils.path import get_raw_fname
 
@@ -25,6 +25,7 @@ def read_raw(
     participant: int,
     session: int,
     rotation_axes: Optional[Tuple[str, ...]] = ("Pitch", "Yaw", "Roll"),
+    dtype: Union[str, np.dtype] = "float64",
 ) -> BaseRaw:
     """Load a raw recording.
 
@@ -34,6 +35,7 @@ def read_raw(
     %(participant)s
     %(session)s
     %(rotation_axes)s
+    %(dtype)s
 
     Returns
     -------
@@ -43,7 +45,8 @@ def read_raw(
     """
     fname_eeg, fname_biopac = get_raw_fname(root, participant, session)
     check_rotation_axes(rotation_axes, session)
-    raw_eeg = _read_raw_eeg(fname_eeg)
+    dtype = _check_dtype(dtype)
+    raw_eeg = _read_raw_eeg(fname_eeg, dtype)
     raw_biopac = _read_raw_biopac(fname_biopac)
 
     # find onsets
@@ -53,6 +56,8 @@ def read_raw(
     raw_eeg.crop(events_eeg - 0.2, None)
     raw_biopac.crop(events_biopac - 0.2, None)
     raw_biopac.resample(raw_eeg.info["sfreq"])
+    # MNE resamples only float64 data
+    raw_biopac._data = raw_biopac._data.astype(dtype, copy=False)
 
     # figure out which one is longer and crop to the same size
     if raw_biopac.times[-1] < raw_eeg.times[-1]:
@@ -61,7 +66,7 @@ def read_raw(
         raw_biopac.crop(0, raw_eeg.times[-1], include_tmax=True)
 
     # create synthetic trigger channel
-    sti = create_sti(raw_eeg, session, rotation_axes)
+    sti = create_sti(raw_eeg, session, rotation_axes, dtype)
 
     # concatenate
     raw_biopac.drop_channels(["STI-Biopac"])
@@ -76,13 +81,17 @@ def read_raw(
     return raw_eeg
 
 
-def _read_raw_eeg(fname_vhdr: Union[str, Path]) -> BaseRaw:
+@fill_doc
+def _read_raw_eeg(
+    fname_vhdr: Union[str, Path], dtype: Union[str, np.dtype] = "float64"
+) -> BaseRaw:
     """Load a raw recording.
 
     Parameters
     ----------
     fname_vhdr : path-like
         Path to the header file of the ANT recording in BrainVision format.
+    %(dtype)s
 
     Returns
     -------
@@ -90,8 +99,11 @@ def _read_raw_eeg(fname_vhdr: Union[str, Path]) -> BaseRaw:
         MNE raw instance, with the mastoids and the EOG channel dropped.
     """
     fname_vhdr = ensure_path(fname_vhdr, must_exist=True)
-    raw = read_raw_brainvision(fname_vhdr, preload=True)
+    dtype = _check_dtype(dtype)
+    raw = read_raw_brainvision(fname_vhdr, preload=False)
     raw.drop_channels(["M1", "M2", "EOG"])
+    # the samples are read directly in a buffer of the requested dtype
+    raw._preload_data(np.empty((raw.info["nchan"], raw.n_times), dtype=dtype))
     return raw
 
 
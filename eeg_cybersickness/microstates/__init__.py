@@ -0,0 +1,9 @@
+"""Microstates module."""
+
+from .gfp import extract_gfp_peaks  # noqa: F401
+from .kmeans import fit_microstates  # noqa: F401
+from .segmentation import (  # noqa: F401
+    backfit_microstates,
+    compute_microstate_statistics,
+    compute_microstates_participants,
+)
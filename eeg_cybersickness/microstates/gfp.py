@@ -0,0 +1,110 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from mne.annotations import _annotations_starts_stops
+from mne.io import BaseRaw
+from mne.io.pick import _picks_to_idx
+
+from ..utils._checks import check_type
+from ..utils._docs import fill_doc
+from ..utils._windows import _get_data_padded
+
+if TYPE_CHECKING:
+    from typing import Generator, Tuple
+
+    from numpy.typing import NDArray
+
+
+@fill_doc
+def extract_gfp_peaks(
+    raw: BaseRaw,
+    picks="eeg",
+    reject_by_annotation: bool = True,
+    chunk_duration: float = 60.0,
+) -> Tuple[NDArray[float], NDArray[int]]:
+    """Extract the topographies at the peaks of the global field power.
+
+    The recording is processed in chunks. The global field power (GFP) of a
+    chunk is computed on the average referenced data and its peaks are found
+    from the sign changes of its derivative.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording, preloaded or not.
+    %(picks)s
+    reject_by_annotation : bool
+        If True, peaks within an annotation whose description starts with
+        ``"bad"`` are dropped.
+    chunk_duration : float
+        Duration of the chunks in seconds.
+
+    Returns
+    -------
+    peaks : array of shape (n_channels, n_peaks)
+        Average referenced topography at each GFP peak.
+    samples : array of shape (n_peaks,)
+        Index of each GFP peak in the data array.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    check_type(reject_by_annotation, (bool,), "reject_by_annotation")
+    picks = _picks_to_idx(raw.info, picks, exclude="bads")
+    peaks, samples = list(), list()
+    for start, data in _iter_chunks(raw, picks, chunk_duration, margin=1):
+        gfp = data.std(axis=0)
+        # strict maximum on the left, to count plateaus once
+        idx = np.flatnonzero((gfp[1:-1] > gfp[:-2]) & (gfp[1:-1] >= gfp[2:])) + 1
+        peaks.append(data[:, idx])
+        samples.append(start - 1 + idx)
+    peaks, samples = np.concatenate(peaks, axis=1), np.concatenate(samples)
+    if reject_by_annotation:
+        keep = ~_bad_samples_mask(raw, samples)
+        peaks, samples = peaks[:, keep], samples[keep]
+    return peaks, samples
+
+
+def _iter_chunks(
+    raw: BaseRaw, picks: NDArray[int], chunk_duration: float, margin: int = 0
+) -> Generator[Tuple[int, NDArray[float]], None, None]:
+    """Iterate over chunks of average referenced data.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording, preloaded or not.
+    picks : array of int
+        Indices of the channels to retrieve.
+    chunk_duration : float
+        Duration of the chunks in seconds.
+    margin : int
+        Number of samples added on both sides of each chunk, padded with the
+        edge values outside the recording.
+
+    Yields
+    ------
+    start : int
+        Index of the first sample of the chunk, without the margin.
+    data : array of shape (n_channels, n_chunk + 2 * margin)
+        Average referenced data of the chunk.
+    """
+    check_type(chunk_duration, ("numeric",), "chunk_duration")
+    if chunk_duration <= 0:
+        raise ValueError(
+            "Argument 'chunk_duration' should be a strictly positive number. "
+            f"{chunk_duration} is invalid."
+        )
+    n_chunk = max(int(chunk_duration * raw.info["sfreq"]), 1)
+    for start in range(0, raw.n_times, n_chunk):
+        stop = min(start + n_chunk, raw.n_times)
+        data = _get_data_padded(raw, picks, start - margin, stop + margin)
+        yield start, data - data.mean(axis=0)
+
+
+def _bad_samples_mask(raw: BaseRaw, samples: NDArray[int]) -> NDArray[bool]:
+    """Mask the samples within an annotation whose description starts with bad."""
+    mask = np.zeros(samples.size, dtype=bool)
+    for onset, end in zip(*_annotations_starts_stops(raw, ("bad",))):
+        mask |= (onset <= samples) & (samples < end)
+    return mask
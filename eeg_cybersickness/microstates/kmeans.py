@@ -0,0 +1,220 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from mne.io import read_raw_fif
+from mne.io.pick import _picks_to_idx
+from mne.parallel import parallel_func
+
+from ..utils._checks import _ensure_int, check_type
+from ..utils._docs import fill_doc
+from ..utils.logs import logger
+from ..utils.path import get_derivative_stem
+from .gfp import extract_gfp_peaks
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Any, Dict, List, Optional, Tuple, Union
+
+    from numpy.typing import NDArray
+
+
+@fill_doc
+def fit_microstates(
+    root: Union[str, Path],
+    participants: List[int],
+    sessions: Tuple[int, ...] = (1, 2, 3, 4),
+    n_states: int = 4,
+    n_init: int = 10,
+    max_iter: int = 100,
+    tol: float = 1e-6,
+    max_peaks: Optional[int] = None,
+    seed: Optional[int] = None,
+    n_jobs: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Fit the microstate maps on the GFP peaks pooled across participants.
+
+    The GFP peaks are extracted from the preprocessed derivatives
+    ``derivatives/PXX/PXX_SY-raw.fif`` of every participant and session, and
+    pooled before fitting a modified k-means. The clustering only uses the GFP
+    peaks, thus its cost does not depend on the number of samples of the
+    recordings.
+
+    Parameters
+    ----------
+    %(root)s
+    participants : list of int
+        Participant IDs.
+    sessions : tuple of int
+        Session IDs.
+    n_states : int
+        Number of microstates.
+    n_init : int
+        Number of random initializations. The fit with the highest global
+        explained variance is retained.
+    max_iter : int
+        Maximum number of iterations of each initialization.
+    tol : float
+        Relative tolerance on the residual variance to declare convergence.
+    max_peaks : int | None
+        Maximum number of GFP peaks drawn at random from each recording. If
+        None, all peaks are used.
+    seed : int | None
+        Seed of the random generator of the initializations and of the peak
+        selection. The result depends only on the seed, independently of
+        ``n_jobs``.
+    %(n_jobs)s
+
+    Returns
+    -------
+    microstates : dict
+        Microstate maps with the keys:
+
+        - ``"ch_names"``: list of the channel names, common to all recordings.
+        - ``"maps"``: array of shape (n_states, n_channels), unit-norm maps.
+        - ``"gev"``: global explained variance of the maps on the pooled peaks.
+        - ``"n_peaks"``: number of pooled GFP peaks.
+
+    Notes
+    -----
+    The peaks of each recording are divided by their mean GFP before pooling,
+    thus every recording contributes equally regardless of its amplitude. The
+    microstate maps are polarity invariant.
+    """
+    check_type(participants, (list, tuple), "participants")
+    check_type(sessions, (list, tuple), "sessions")
+    n_states = _ensure_int(n_states, "n_states")
+    n_init = _ensure_int(n_init, "n_init")
+    max_iter = _ensure_int(max_iter, "max_iter")
+    for var, name in (
+        (n_states, "n_states"),
+        (n_init, "n_init"),
+        (max_iter, "max_iter"),
+    ):
+        if var <= 0:
+            raise ValueError(
+                f"Argument '{name}' should be a strictly positive integer. {var} is "
+                "invalid."
+            )
+    check_type(max_peaks, ("int", None), "max_peaks")
+    recordings = [(p, s) for p in participants for s in sessions]
+    seeds = np.random.SeedSequence(seed).spawn(len(recordings) + n_init)
+
+    # extract the GFP peaks of every recording
+    parallel, p_fun, _ = parallel_func(_extract_gfp_peaks_recording, n_jobs)
+    outputs = parallel(
+        p_fun(root, participant, session, max_peaks, seed_)
+        for (participant, session), seed_ in zip(recordings, seeds)
+    )
+    ch_names = [
+        ch for ch in outputs[0][1] if all(ch in output[1] for output in outputs)
+    ]
+    if len(ch_names) < n_states:
+        raise RuntimeError(
+            f"Only {len(ch_names)} channels are common to all recordings."
+        )
+    peaks = np.concatenate(
+        [peaks[[names.index(ch) for ch in ch_names]] for peaks, names in outputs],
+        axis=1,
+    )
+    # re-reference the common channels to their average
+    peaks -= peaks.mean(axis=0)
+    if peaks.shape[1] < n_states:
+        raise RuntimeError(
+            f"Only {peaks.shape[1]} GFP peaks were found for {n_states} microstates."
+        )
+    logger.info(
+        "Fitting %i microstates on %i GFP peaks from %i recordings.",
+        n_states,
+        peaks.shape[1],
+        len(recordings),
+    )
+
+    # random restarts in parallel
+    parallel, p_fun, _ = parallel_func(_modified_kmeans, n_jobs)
+    fits = parallel(
+        p_fun(peaks, n_states, max_iter, tol, seed_)
+        for seed_ in seeds[len(recordings) :]
+    )
+    maps, gev = max(fits, key=lambda fit: fit[1])
+    return dict(ch_names=ch_names, maps=maps, gev=gev, n_peaks=peaks.shape[1])
+
+
+def _extract_gfp_peaks_recording(
+    root: Union[str, Path],
+    participant: int,
+    session: int,
+    max_peaks: Optional[int],
+    seed: np.random.SeedSequence,
+) -> Tuple[NDArray[float], List[str]]:
+    """Extract the normalized GFP peaks of one recording."""
+    stem = get_derivative_stem(root, participant, session)
+    raw = read_raw_fif(stem.with_name(f"{stem.name}-raw.fif"), preload=False)
+    picks = _picks_to_idx(raw.info, "eeg", exclude="bads")
+    peaks, _ = extract_gfp_peaks(raw, picks=picks)
+    if max_peaks is not None and max_peaks < peaks.shape[1]:
+        rng = np.random.default_rng(seed)
+        peaks = peaks[:, np.sort(rng.choice(peaks.shape[1], max_peaks, replace=False))]
+    peaks /= peaks.std(axis=0).mean()
+    return peaks, [raw.ch_names[pick] for pick in picks]
+
+
+def _modified_kmeans(
+    data: NDArray[float],
+    n_states: int,
+    max_iter: int,
+    tol: float,
+    seed: np.random.SeedSequence,
+) -> Tuple[NDArray[float], float]:
+    """Fit the polarity invariant modified k-means.
+
+    Parameters
+    ----------
+    data : array of shape (n_channels, n_samples)
+        Average referenced topographies.
+    n_states : int
+        Number of microstates.
+    max_iter : int
+        Maximum number of iterations.
+    tol : float
+        Relative tolerance on the residual variance.
+    seed : SeedSequence
+        Seed of the random initialization.
+
+    Returns
+    -------
+    maps : array of shape (n_states, n_channels)
+        Unit-norm microstate maps.
+    gev : float
+        Global explained variance.
+    """
+    rng = np.random.default_rng(seed)
+    n_channels, n_samples = data.shape
+    total = np.sum(data**2)
+    maps = data[:, rng.choice(n_samples, n_states, replace=False)].T
+    maps /= np.linalg.norm(maps, axis=1, keepdims=True)
+    residual = np.inf
+    for _ in range(max_iter):
+        activation = maps @ data
+        labels = np.argmax(np.abs(activation), axis=0)
+        # each map is the first eigenvector of the scatter matrix of its samples
+        scatter = np.array(
+            [data[:, labels == k] @ data[:, labels == k].T for k in range(n_states)]
+        )
+        eigvals, eigvecs = np.linalg.eigh(scatter)
+        empty = eigvals[:, -1] == 0
+        maps[~empty] = eigvecs[~empty, :, -1]
+        explained = np.sum(activation[labels, np.arange(n_samples)] ** 2)
+        residual_prev, residual = residual, (total - explained) / (
+            n_samples * (n_channels - 1)
+        )
+        if abs(residual_prev - residual) <= tol * residual:
+            break
+    else:
+        logger.warning(
+            "The modified k-means did not converge in %i iterations.", max_iter
+        )
+    activation = maps @ data
+    gev = np.sum(np.max(np.abs(activation), axis=0) ** 2) / total
+    return maps, float(gev)
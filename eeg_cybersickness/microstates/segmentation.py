@@ -0,0 +1,223 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from mne import find_events
+from mne.io import BaseRaw, read_raw_fif
+from mne.parallel import parallel_func
+
+from ..triggers import load_triggers
+from ..triggers.config import _ROTATIONS
+from ..utils._checks import check_type
+from ..utils._docs import fill_doc
+from ..utils.path import get_derivative_stem
+from .gfp import _bad_samples_mask, _iter_chunks
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Any, Dict, List, Optional, Tuple, Union
+
+    from numpy.typing import NDArray
+
+
+def backfit_microstates(
+    raw: BaseRaw,
+    microstates: Dict[str, Any],
+    reject_by_annotation: bool = True,
+    chunk_duration: float = 60.0,
+) -> NDArray[np.int8]:
+    """Assign a microstate to every sample of a recording.
+
+    The recording is processed in chunks. Each average referenced sample is
+    assigned to the map with the highest absolute spatial correlation.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording, preloaded or not.
+    microstates : dict
+        Microstate maps returned by
+        :func:`~eeg_cybersickness.microstates.fit_microstates`.
+    reject_by_annotation : bool
+        If True, samples within an annotation whose description starts with
+        ``"bad"`` are labelled ``-1``.
+    chunk_duration : float
+        Duration of the chunks in seconds.
+
+    Returns
+    -------
+    labels : array of shape (n_times,)
+        Microstate of each sample, between 0 and ``n_states - 1``.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    check_type(microstates, (dict,), "microstates")
+    check_type(reject_by_annotation, (bool,), "reject_by_annotation")
+    missing = [ch for ch in microstates["ch_names"] if ch not in raw.ch_names]
+    if len(missing) != 0:
+        raise ValueError(
+            f"The channels {missing} of the microstate maps are missing from the "
+            "recording."
+        )
+    picks = np.array([raw.ch_names.index(ch) for ch in microstates["ch_names"]])
+    maps = microstates["maps"]
+    labels = np.empty(raw.n_times, dtype=np.int8)
+    for start, data in _iter_chunks(raw, picks, chunk_duration):
+        # the norm of a sample is common to all maps, the activation is enough
+        labels[start : start + data.shape[1]] = np.argmax(np.abs(maps @ data), axis=0)
+    if reject_by_annotation:
+        labels[_bad_samples_mask(raw, np.arange(raw.n_times))] = -1
+    return labels
+
+
+def compute_microstate_statistics(
+    raw: BaseRaw,
+    labels: NDArray[int],
+    n_states: int,
+    event_id: Optional[Dict[str, int]] = None,
+) -> pd.DataFrame:
+    """Compute the microstate parameters for each condition.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording with a synthetic STI channel.
+    labels : array of shape (n_times,)
+        Microstate of each sample returned by :func:`backfit_microstates`.
+        Samples labelled ``-1`` are ignored.
+    n_states : int
+        Number of microstates.
+    event_id : dict | None
+        The key is the name of a condition and the value is its trigger code on
+        the synthetic STI channel. If None, the rotation triggers from
+        :func:`~eeg_cybersickness.triggers.load_triggers` are used.
+
+    Returns
+    -------
+    statistics : DataFrame
+        One row per condition and microstate with the columns ``"condition"``,
+        ``"state"``, ``"duration"`` (mean duration of a segment in seconds),
+        ``"occurrence"`` (number of segments per second) and ``"coverage"``
+        (fraction of the time covered).
+
+    Notes
+    -----
+    A segment is a run of consecutive samples with the same microstate within
+    a single event of the STI channel. Segments are cut at every event onset,
+    including between consecutive events with the same condition code, and at
+    the ignored samples.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    if event_id is None:
+        triggers = load_triggers()
+        event_id = {key: triggers[key] for key in _ROTATIONS}
+    check_type(event_id, (dict,), "event_id")
+    labels = np.asarray(labels)
+    if labels.shape != (raw.n_times,):
+        raise ValueError(
+            f"The labels shape {labels.shape} does not match the number of samples "
+            f"({raw.n_times})."
+        )
+
+    # condition index of each sample, -1 outside the conditions
+    events = find_events(raw, stim_channel="STI")
+    onsets = events[:, 0] - raw.first_samp
+    idx = np.searchsorted(onsets, np.arange(raw.n_times), "right")
+    codes = np.where(0 < idx, events[np.clip(idx - 1, 0, None), 2], 0)
+    conditions = list(event_id)
+    condition = np.full(raw.n_times, -1)
+    for k, name in enumerate(conditions):
+        condition[codes == event_id[name]] = k
+    # run-length encoding of the (condition, label) pairs
+    code = np.where(
+        (condition == -1) | (labels == -1), -1, condition * n_states + labels
+    )
+    # the runs are also cut at the event onsets
+    edges = np.union1d(
+        np.flatnonzero(np.diff(code)) + 1, onsets[(0 < onsets) & (onsets < code.size)]
+    )
+    run_starts = np.concatenate(([0], edges))
+    run_lengths = np.diff(np.concatenate((run_starts, [raw.n_times])))
+    run_codes = code[run_starts]
+    valid = run_codes != -1
+    run_codes, run_lengths = run_codes[valid], run_lengths[valid]
+
+    n_codes = len(conditions) * n_states
+    n_runs = np.bincount(run_codes, minlength=n_codes).reshape(-1, n_states)
+    n_samples = np.bincount(run_codes, run_lengths, minlength=n_codes).reshape(
+        -1, n_states
+    )
+    sfreq = raw.info["sfreq"]
+    total = n_samples.sum(axis=1, keepdims=True) / sfreq
+    with np.errstate(invalid="ignore", divide="ignore"):
+        statistics = dict(
+            duration=n_samples / n_runs / sfreq,
+            occurrence=n_runs / total,
+            coverage=n_samples / sfreq / total,
+        )
+    return pd.DataFrame(
+        dict(
+            condition=np.repeat(conditions, n_states),
+            state=np.tile(np.arange(n_states), len(conditions)),
+            **{key: value.ravel() for key, value in statistics.items()},
+        )
+    )
+
+
+@fill_doc
+def compute_microstates_participants(
+    root: Union[str, Path],
+    participants: List[int],
+    sessions: Tuple[int, ...],
+    microstates: Dict[str, Any],
+    n_jobs: Optional[int] = None,
+) -> pd.DataFrame:
+    """Back-fit the microstates and compute their parameters per recording.
+
+    The EEG channels are read from the preprocessed derivatives
+    ``derivatives/PXX/PXX_SY-raw.fif``.
+
+    Parameters
+    ----------
+    %(root)s
+    participants : list of int
+        Participant IDs.
+    sessions : tuple of int
+        Session IDs.
+    microstates : dict
+        Microstate maps returned by
+        :func:`~eeg_cybersickness.microstates.fit_microstates`.
+    %(n_jobs)s
+
+    Returns
+    -------
+    statistics : DataFrame
+        Concatenation of the :func:`compute_microstate_statistics` outputs with
+        the additional columns ``"participant"`` and ``"session"``.
+    """
+    check_type(participants, (list, tuple), "participants")
+    check_type(sessions, (list, tuple), "sessions")
+    parallel, p_fun, _ = parallel_func(_compute_microstates_recording, n_jobs)
+    dfs = parallel(
+        p_fun(root, participant, session, microstates)
+        for participant in participants
+        for session in sessions
+    )
+    return pd.concat(dfs, ignore_index=True)
+
+
+def _compute_microstates_recording(
+    root: Union[str, Path],
+    participant: int,
+    session: int,
+    microstates: Dict[str, Any],
+) -> pd.DataFrame:
+    """Back-fit the microstates and compute their parameters on one recording."""
+    stem = get_derivative_stem(root, participant, session)
+    raw = read_raw_fif(stem.with_name(f"{stem.name}-raw.fif"), preload=False)
+    labels = backfit_microstates(raw, microstates)
+    df = compute_microstate_statistics(raw, labels, microstates["maps"].shape[0])
+    df.insert(0, "session", session)
+    df.insert(0, "participant", participant)
+    return df
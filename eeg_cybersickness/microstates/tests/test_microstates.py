@@ -0,0 +1,125 @@
+"""Test microstates module."""
+
+import numpy as np
+import pytest
+from mne import Annotations, create_info
+from mne.io import RawArray
+
+from .. import (
+    backfit_microstates,
+    compute_microstate_statistics,
+    compute_microstates_participants,
+    extract_gfp_peaks,
+    fit_microstates,
+)
+
+
+@pytest.fixture(scope="module")
+def microstates():
+    """Create a recording alternating between 4 known topographies."""
+    rng = np.random.default_rng(101)
+    sfreq, n_channels, n_states = 250.0, 16, 4
+    maps = rng.standard_normal((n_states, n_channels))
+    maps -= maps.mean(axis=1, keepdims=True)
+    maps /= np.linalg.norm(maps, axis=1, keepdims=True)
+    # segments of 40 to 120 ms, with a GFP modulated by half a sine
+    lengths = rng.integers(10, 30, size=1500)
+    states = rng.integers(0, n_states, size=lengths.size)
+    labels = np.repeat(states, lengths)
+    envelope = np.concatenate(
+        [np.sin(np.pi * (np.arange(n) + 0.5) / n) for n in lengths]
+    )
+    polarity = np.repeat(rng.choice([-1, 1], size=lengths.size), lengths)
+    data = maps[labels].T * envelope * polarity
+    data += 0.05 * rng.standard_normal(data.shape)
+    stim = np.zeros(labels.size)
+    stim[[1, labels.size // 2]] = [1, 2]
+    info = create_info(
+        [f"EEG{k}" for k in range(n_channels)] + ["STI"],
+        sfreq,
+        ["eeg"] * n_channels + ["stim"],
+    )
+    raw = RawArray(np.vstack((data * 1e-5, stim)), info)
+    return raw, maps, labels
+
+
+def test_extract_gfp_peaks(microstates):
+    """Test the extraction of the GFP peaks."""
+    raw, _, labels = microstates
+    peaks, samples = extract_gfp_peaks(raw)
+    # at least one peak per segment, whatever the chunk size
+    n_segments = np.count_nonzero(np.diff(labels)) + 1
+    assert 0.8 * n_segments < samples.size < 5 * n_segments
+    peaks2, samples2 = extract_gfp_peaks(raw, chunk_duration=1.0)
+    assert np.array_equal(samples, samples2)
+    assert np.allclose(peaks, peaks2)
+    # peaks in bad segments are dropped
+    raw2 = raw.copy().set_annotations(Annotations([10.0], [20.0], ["bad_test"]))
+    _, samples3 = extract_gfp_peaks(raw2)
+    sfreq = raw.info["sfreq"]
+    assert not np.any((10 * sfreq <= samples3) & (samples3 < 30 * sfreq))
+    assert samples3.size < samples.size
+
+
+def test_compute_microstate_statistics_events():
+    """Test that the segments are cut between events with the same code."""
+    stim = np.zeros(1000)
+    stim[[100, 550]] = 1
+    info = create_info(["Fz", "STI"], 250.0, ["eeg", "stim"])
+    raw = RawArray(np.vstack((np.zeros(1000), stim)), info)
+    labels = np.zeros(1000, dtype=int)
+    df = compute_microstate_statistics(raw, labels, 2, dict(first=1))
+    # 900 samples in 2 segments of 450 samples
+    assert np.isclose(df["duration"][0], 1.8)
+    assert np.isclose(df["occurrence"][0], 2 / 3.6)
+    assert np.isclose(df["coverage"][0], 1)
+
+
+def test_microstates(microstates, tmp_path):
+    """Test the fit, the back-fitting and the statistics."""
+    raw, maps, labels = microstates
+    for session in (1, 2):
+        folder = tmp_path / "derivatives" / "P01"
+        folder.mkdir(parents=True, exist_ok=True)
+        raw.save(folder / f"P01_S{session}-raw.fif")
+    fit = fit_microstates(tmp_path, [1], (1, 2), n_states=4, n_init=4, seed=101)
+    assert fit["ch_names"] == raw.ch_names[:-1]
+    assert fit["maps"].shape == (4, 16)
+    assert 0.8 < fit["gev"] <= 1
+    # the maps are recovered up to the order and the polarity
+    corr = np.abs(fit["maps"] @ maps.T)
+    order = np.argmax(corr, axis=0)
+    assert np.array_equal(np.sort(order), np.arange(4))
+    assert np.all(corr[order, np.arange(4)] > 0.95)
+    fit2 = fit_microstates(
+        tmp_path, [1], (1, 2), n_states=4, n_init=4, seed=101, n_jobs=2
+    )
+    assert np.allclose(fit["maps"], fit2["maps"])
+
+    # back-fitting
+    estimated = backfit_microstates(raw, fit)
+    assert estimated.shape == labels.shape
+    assert np.mean(order[labels] == estimated) > 0.95
+    raw2 = raw.copy().set_annotations(Annotations([10.0], [20.0], ["bad_test"]))
+    estimated2 = backfit_microstates(raw2, fit)
+    assert np.all(estimated2[2500:7500] == -1)
+    assert np.array_equal(estimated2[:2500], estimated[:2500])
+
+    # statistics
+    event_id = dict(first=1, second=2)
+    df = compute_microstate_statistics(raw, estimated, 4, event_id)
+    assert df.shape == (8, 5)
+    assert np.allclose(df.groupby("condition")["coverage"].sum(), 1)
+    true = compute_microstate_statistics(raw, order[labels], 4, event_id)
+    assert np.allclose(df["coverage"], true["coverage"], atol=0.02)
+    assert np.allclose(df["coverage"], df["duration"] * df["occurrence"])
+    assert np.all(0.08 < true["duration"]) and np.all(true["duration"] < 0.13)
+    df2 = compute_microstate_statistics(raw2, estimated2, 4, event_id)
+    assert np.allclose(df2.groupby("condition")["coverage"].sum(), 1)
+    with pytest.raises(ValueError, match="does not match"):
+        compute_microstate_statistics(raw, estimated[:-1], 4, event_id)
+
+    # participants, default rotation triggers are absent from the STI channel
+    df = compute_microstates_participants(tmp_path, [1], (1, 2), fit, n_jobs=2)
+    assert df.shape[1] == 7
+    assert np.array_equal(np.unique(df["session"]), [1, 2])
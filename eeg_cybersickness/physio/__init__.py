@@ -0,0 +1,6 @@
+"""Physiological signals module."""
+
+from .ecg import compute_hrv, compute_hrv_participants, find_r_peaks  # noqa: F401
+from .egg import compute_egg_participants, compute_egg_spectrum  # noqa: F401
+from .hep import compute_hep  # noqa: F401
+from .pac import compute_gastric_pac  # noqa: F401
@@ -0,0 +1,247 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from mne.io import BaseRaw, read_raw_fif
+from mne.parallel import parallel_func
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.ndimage import maximum_filter1d, uniform_filter1d
+from scipy.signal import butter, detrend, sosfiltfilt
+
+from ..utils._checks import check_type
+from ..utils._docs import fill_doc
+from ..utils._windows import _get_data_padded
+from ..utils.logs import logger
+from ..utils.path import get_derivative_stem
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import List, Optional, Union
+
+    from numpy.typing import NDArray
+
+
+def find_r_peaks(
+    raw: BaseRaw,
+    ch_name: str = "ECG",
+    l_freq: float = 5.0,
+    h_freq: float = 15.0,
+    refractory: float = 0.25,
+    chunk_duration: float = 60.0,
+) -> NDArray[int]:
+    """Detect the R-peaks on the ECG channel.
+
+    The ECG is processed in chunks. On each chunk, the signal is band-pass
+    filtered, its energy envelope is compared to an adaptive threshold, and the
+    R-peaks are selected as the maxima of the envelope within the refractory
+    period. Every step is vectorized, without a loop over the beats.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording with an ECG channel, preloaded or not.
+    ch_name : str
+        Name of the ECG channel.
+    l_freq : float
+        Low cutoff frequency of the band-pass filter in Hz.
+    h_freq : float
+        High cutoff frequency of the band-pass filter in Hz.
+    refractory : float
+        Minimum duration between 2 consecutive R-peaks in seconds.
+    chunk_duration : float
+        Duration of the chunks in seconds.
+
+    Returns
+    -------
+    r_peaks : array of shape (n_beats,)
+        Index of the R-peaks in the data array.
+
+    Notes
+    -----
+    The adaptive threshold is set to 30% of the maximum of the envelope
+    within the surrounding 2 seconds. Each peak is finally moved to the maximum
+    of the absolute band-passed signal within 50 ms, which makes the detection
+    independent of the ECG polarity.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    check_type(ch_name, (str,), "ch_name")
+    if ch_name not in raw.ch_names:
+        raise ValueError(f"The channel '{ch_name}' is not present in the recording.")
+    for var, name in ((l_freq, "l_freq"), (h_freq, "h_freq")):
+        check_type(var, ("numeric",), name)
+    check_type(refractory, ("numeric",), "refractory")
+    check_type(chunk_duration, ("numeric",), "chunk_duration")
+    if chunk_duration < 10:
+        raise ValueError(
+            "Argument 'chunk_duration' should be at least 10 seconds. "
+            f"{chunk_duration} is invalid."
+        )
+    sfreq = raw.info["sfreq"]
+    if not 0 < l_freq < h_freq < sfreq / 2:
+        raise ValueError(
+            "The band-pass filter cutoffs should satisfy 0 < l_freq < h_freq < "
+            f"Nyquist. ({l_freq}, {h_freq}) is invalid."
+        )
+    sos = butter(3, (l_freq, h_freq), btype="bandpass", output="sos", fs=sfreq)
+    pick = np.array([raw.ch_names.index(ch_name)])
+    n_chunk = int(chunk_duration * sfreq)
+    n_margin = int(2 * sfreq)  # covers the filter transients and the threshold
+    n_smooth = max(int(0.1 * sfreq), 1)
+    n_refractory = max(int(refractory * sfreq), 1)
+    n_refine = max(int(0.05 * sfreq), 1)
+
+    r_peaks = list()
+    for start in range(0, raw.n_times, n_chunk):
+        stop = min(start + n_chunk, raw.n_times)
+        data = _get_data_padded(raw, pick, start - n_margin, stop + n_margin)[0]
+        filtered = sosfiltfilt(sos, data)
+        envelope = uniform_filter1d(filtered**2, n_smooth)
+        threshold = 0.3 * maximum_filter1d(envelope, int(2 * sfreq))
+        # non-maximum suppression over the refractory period
+        local_max = maximum_filter1d(envelope, 2 * n_refractory + 1)
+        peaks = np.flatnonzero((envelope == local_max) & (threshold < envelope))
+        peaks = peaks[(n_refine <= peaks) & (peaks < data.size - n_refine)]
+        # refine on the absolute band-passed signal
+        windows = sliding_window_view(np.abs(filtered), 2 * n_refine + 1)
+        peaks = peaks - n_refine + np.argmax(windows[peaks - n_refine], axis=-1)
+        peaks = np.unique(peaks) + start - n_margin
+        r_peaks.append(peaks[(start <= peaks) & (peaks < stop)])
+    r_peaks = np.concatenate(r_peaks)
+    # remove duplicates closer than the refractory period at chunk borders
+    keep = n_refractory <= np.diff(r_peaks, prepend=-n_refractory)
+    r_peaks = r_peaks[keep]
+    logger.info("%i R-peaks detected on the channel '%s'.", r_peaks.size, ch_name)
+    return r_peaks
+
+
+def compute_hrv(
+    r_peaks: NDArray[int],
+    sfreq: float,
+    n_times: int,
+    window: float = 60.0,
+    rr_range: tuple = (0.3, 2.0),
+    resample: float = 4.0,
+) -> pd.DataFrame:
+    """Compute the heart rate and heart rate variability on consecutive windows.
+
+    Parameters
+    ----------
+    r_peaks : array of shape (n_beats,)
+        Index of the R-peaks in the data array.
+    sfreq : float
+        Sampling frequency of the recording in Hz.
+    n_times : int
+        Number of samples in the recording.
+    window : float
+        Duration of the windows in seconds. The windows start every ``window``
+        seconds from the beginning of the recording, as the grid of the
+        bandpower analysis.
+    rr_range : tuple
+        Minimum and maximum RR interval in seconds. Intervals outside this range
+        are considered as detection errors and are dropped.
+    resample : float
+        Sampling frequency in Hz of the interpolated RR tachogram used to compute
+        the LF/HF ratio.
+
+    Returns
+    -------
+    hrv : DataFrame
+        One row per window with the columns ``"times"`` (start of the window in
+        seconds), ``"n_rr"`` (number of valid RR intervals ending in the
+        window), ``"hr"`` (mean heart rate in bpm), ``"rmssd"``
+        (root mean square of successive RR differences in ms) and ``"lf_hf"``
+        (ratio between the power in the low-frequency band 0.04-0.15 Hz and in
+        the high-frequency band 0.15-0.4 Hz). Values which can not be computed
+        are set to NaN.
+    """
+    check_type(window, ("numeric",), "window")
+    r_peaks = np.asarray(r_peaks)
+    times = np.arange(0, n_times / sfreq, window)
+    n_windows = times.size
+    beats = r_peaks / sfreq
+    rr = np.diff(beats)
+    beats = beats[1:]
+    valid = (rr_range[0] <= rr) & (rr <= rr_range[1])
+    # successive differences are valid if both intervals are valid
+    drr = np.diff(rr)
+    valid_drr = valid[1:] & valid[:-1]
+
+    # heart rate and RMSSD from the intervals ending in each window
+    idx = (beats // window).astype(int)
+    n_rr = np.bincount(idx[valid], minlength=n_windows)[:n_windows]
+    sum_rr = np.bincount(idx[valid], rr[valid], minlength=n_windows)[:n_windows]
+    idx_drr = idx[1:][valid_drr]
+    n_drr = np.bincount(idx_drr, minlength=n_windows)[:n_windows]
+    sum_drr2 = np.bincount(idx_drr, drr[valid_drr] ** 2, minlength=n_windows)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hr = 60 * n_rr / sum_rr
+        rmssd = 1e3 * np.sqrt(sum_drr2[:n_windows] / n_drr)
+
+    # LF/HF from the tachogram interpolated on a regular grid
+    lf_hf = np.full(n_windows, np.nan)
+    n_window = int(window * resample)
+    grid = np.arange(n_windows * n_window) / resample
+    if np.count_nonzero(valid) >= 2:
+        tachogram = np.interp(grid, beats[valid], rr[valid], left=np.nan, right=np.nan)
+        segments = tachogram.reshape(n_windows, n_window)
+        complete = ~np.any(np.isnan(segments), axis=1)
+        if np.any(complete):
+            segments = detrend(segments[complete], axis=-1) * np.hanning(n_window)
+            power = np.abs(np.fft.rfft(segments, axis=-1)) ** 2
+            freqs = np.fft.rfftfreq(n_window, 1 / resample)
+            lf = power[:, (0.04 <= freqs) & (freqs < 0.15)].sum(axis=-1)
+            hf = power[:, (0.15 <= freqs) & (freqs < 0.4)].sum(axis=-1)
+            lf_hf[complete] = lf / hf
+    return pd.DataFrame(dict(times=times, n_rr=n_rr, hr=hr, rmssd=rmssd, lf_hf=lf_hf))
+
+
+@fill_doc
+def compute_hrv_participants(
+    root: Union[str, Path],
+    participants: List[int],
+    session: int,
+    window: float = 60.0,
+    n_jobs: Optional[int] = None,
+) -> pd.DataFrame:
+    """Compute the heart rate variability time course of several participants.
+
+    The ECG channel is read from the preprocessed derivative
+    ``derivatives/PXX/PXX_SY-raw.fif`` of each participant.
+
+    Parameters
+    ----------
+    %(root)s
+    participants : list of int
+        Participant IDs.
+    %(session)s
+    window : float
+        Duration of the windows in seconds.
+    %(n_jobs)s
+
+    Returns
+    -------
+    hrv : DataFrame
+        Concatenation of the :func:`compute_hrv` outputs with the additional
+        columns ``"participant"`` and ``"session"``.
+    """
+    check_type(participants, (list, tuple), "participants")
+    parallel, p_fun, _ = parallel_func(_compute_hrv_participant, n_jobs)
+    dfs = parallel(
+        p_fun(root, participant, session, window) for participant in participants
+    )
+    return pd.concat(dfs, ignore_index=True)
+
+
+def _compute_hrv_participant(
+    root: Union[str, Path], participant: int, session: int, window: float
+) -> pd.DataFrame:
+    """Compute the heart rate variability time course of one participant."""
+    stem = get_derivative_stem(root, participant, session)
+    raw = read_raw_fif(stem.with_name(f"{stem.name}-raw.fif"), preload=False)
+    r_peaks = find_r_peaks(raw)
+    df = compute_hrv(r_peaks, raw.info["sfreq"], raw.n_times, window)
+    df.insert(0, "session", session)
+    df.insert(0, "participant", participant)
+    return df
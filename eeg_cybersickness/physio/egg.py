@@ -0,0 +1,217 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from mne.io import BaseRaw, read_raw_fif
+from mne.parallel import parallel_func
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import decimate, detrend
+
+from ..utils._checks import check_type
+from ..utils._docs import fill_doc
+from ..utils._windows import _check_window_parameters, _drop_bad_windows
+from ..utils.logs import logger
+from ..utils.path import get_derivative_stem
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import List, Optional, Tuple, Union
+
+
+# gastric rhythms in Hz, i.e. 0.5-2, 2-4 and 4-10 cycles per minute
+_GASTRIC_BANDS = dict(
+    bradygastria=(0.5 / 60, 2.0 / 60),
+    normogastria=(2.0 / 60, 4.0 / 60),
+    tachygastria=(4.0 / 60, 10.0 / 60),
+)
+
+
+@fill_doc
+def compute_egg_spectrum(
+    raw: BaseRaw,
+    ch_name: str = "EGG",
+    target_sfreq: float = 2.0,
+    duration: float = 120.0,
+    overlap: float = 60.0,
+    resolution: float = 0.1 / 60,
+    reject_by_annotation: bool = True,
+) -> pd.DataFrame:
+    """Compute the gastric rhythm parameters over sliding windows.
+
+    The EGG channel is first decimated to a rate of a few Hz with a cascade of
+    anti-aliased decimation stages, after which the spectrum of every window is
+    computed in a single batched FFT.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording with an EGG channel, preloaded or not.
+    ch_name : str
+        Name of the EGG channel.
+    target_sfreq : float
+        Sampling frequency in Hz after decimation. The decimation factor is the
+        largest integer keeping the rate above ``target_sfreq`` which can be
+        split in stages of at most 13.
+    %(duration_overlap)s
+    resolution : float
+        Frequency resolution of the spectrum in Hz. The windows are zero-padded
+        to reach this resolution. Default to 0.1 cycle per minute.
+    %(reject_by_annotation)s
+
+    Returns
+    -------
+    egg : DataFrame
+        One row per window with the columns ``"times"`` (start of the window in
+        seconds), ``"dominant_frequency"`` (frequency of the spectral peak
+        between 0.5 and 10 cycles per minute, in Hz), ``"dominant_power"``
+        (power spectral density at the peak in V²/Hz), and ``"bradygastria"``,
+        ``"normogastria"`` and ``"tachygastria"`` (ratio between the power in
+        the band 0.5-2, 2-4 and 4-10 cycles per minute and the power between
+        0.5 and 10 cycles per minute).
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    check_type(ch_name, (str,), "ch_name")
+    if ch_name not in raw.ch_names:
+        raise ValueError(f"The channel '{ch_name}' is not present in the recording.")
+    check_type(target_sfreq, ("numeric",), "target_sfreq")
+    fmax = max(edges[1] for edges in _GASTRIC_BANDS.values())
+    if target_sfreq <= 2 * fmax:
+        raise ValueError(
+            "Argument 'target_sfreq' should be above twice the highest gastric "
+            f"frequency ({2 * fmax:.2f} Hz). {target_sfreq} is invalid."
+        )
+    check_type(resolution, ("numeric",), "resolution")
+    check_type(reject_by_annotation, (bool,), "reject_by_annotation")
+    factors = _decimation_factors(int(raw.info["sfreq"] // target_sfreq))
+    q = int(np.prod(factors))
+    sfreq = raw.info["sfreq"] / q
+    n_window, n_step = _check_window_parameters(sfreq, duration, overlap)
+    logger.info(
+        "Decimating the channel '%s' by %i in %i stages to %.2f Hz.",
+        ch_name,
+        q,
+        len(factors),
+        sfreq,
+    )
+
+    data = raw.get_data(picks=[ch_name])[0]
+    for factor in factors:
+        data = decimate(data, factor, ftype="fir", zero_phase=True)
+    # sample k of the decimated signal corresponds to the sample k * q of the raw
+    onsets = np.arange(0, data.size - n_window + 1, n_step, dtype=np.int64)
+    if reject_by_annotation:
+        onsets = _drop_bad_windows(raw, onsets * q, n_window * q) // q
+
+    # batched spectrum of all windows
+    n_fft = max(int(np.ceil(sfreq / resolution)), n_window)
+    windows = sliding_window_view(data, n_window)[onsets]
+    hann = np.hanning(n_window)
+    spectrum = np.fft.rfft(detrend(windows, axis=-1) * hann, n_fft, axis=-1)
+    psds = np.abs(spectrum) ** 2 * (2 / (sfreq * np.sum(hann**2)))
+    freqs = np.fft.rfftfreq(n_fft, 1 / sfreq)
+
+    fmin = min(edges[0] for edges in _GASTRIC_BANDS.values())
+    mask = (fmin <= freqs) & (freqs < fmax)
+    peak = np.argmax(psds[:, mask], axis=-1)
+    total = psds[:, mask].sum(axis=-1)
+    egg = dict(
+        times=onsets / sfreq,
+        dominant_frequency=freqs[mask][peak],
+        dominant_power=psds[:, mask][np.arange(onsets.size), peak],
+    )
+    for band, (low, high) in _GASTRIC_BANDS.items():
+        egg[band] = psds[:, (low <= freqs) & (freqs < high)].sum(axis=-1) / total
+    return pd.DataFrame(egg)
+
+
+@fill_doc
+def compute_egg_participants(
+    root: Union[str, Path],
+    participants: List[int],
+    session: int,
+    duration: float = 120.0,
+    overlap: float = 60.0,
+    n_jobs: Optional[int] = None,
+) -> pd.DataFrame:
+    """Compute the gastric rhythm parameters of several participants.
+
+    The EGG channel is read from the preprocessed derivative
+    ``derivatives/PXX/PXX_SY-raw.fif`` of each participant.
+
+    Parameters
+    ----------
+    %(root)s
+    participants : list of int
+        Participant IDs.
+    %(session)s
+    %(duration_overlap)s
+    %(n_jobs)s
+
+    Returns
+    -------
+    egg : DataFrame
+        Concatenation of the :func:`compute_egg_spectrum` outputs with the
+        additional columns ``"participant"`` and ``"session"``.
+    """
+    check_type(participants, (list, tuple), "participants")
+    parallel, p_fun, _ = parallel_func(_compute_egg_participant, n_jobs)
+    dfs = parallel(
+        p_fun(root, participant, session, duration, overlap)
+        for participant in participants
+    )
+    return pd.concat(dfs, ignore_index=True)
+
+
+def _compute_egg_participant(
+    root: Union[str, Path],
+    participant: int,
+    session: int,
+    duration: float,
+    overlap: float,
+) -> pd.DataFrame:
+    """Compute the gastric rhythm parameters of one participant."""
+    stem = get_derivative_stem(root, participant, session)
+    raw = read_raw_fif(stem.with_name(f"{stem.name}-raw.fif"), preload=False)
+    df = compute_egg_spectrum(raw, duration=duration, overlap=overlap)
+    df.insert(0, "session", session)
+    df.insert(0, "participant", participant)
+    return df
+
+
+def _decimation_factors(q: int, max_factor: int = 13) -> Tuple[int, ...]:
+    """Split a decimation factor in stages.
+
+    Parameters
+    ----------
+    q : int
+        Maximum decimation factor. The factor is decreased until its prime
+        factors are all smaller or equal to ``max_factor``.
+    max_factor : int
+        Maximum decimation factor of a single stage.
+
+    Returns
+    -------
+    factors : tuple of int
+        Decimation factor of each stage, in decreasing order.
+    """
+    for q_ in range(max(q, 1), 0, -1):
+        primes = list()
+        remainder = q_
+        for p in range(2, max_factor + 1):
+            while remainder % p == 0:
+                primes.append(p)
+                remainder //= p
+        if remainder == 1:
+            break
+    # group the primes in stages, largest first
+    factors = list()
+    for p in sorted(primes, reverse=True):
+        for k, factor in enumerate(factors):
+            if factor * p <= max_factor:
+                factors[k] *= p
+                break
+        else:
+            factors.append(p)
+    return tuple(sorted(factors, reverse=True))
@@ -0,0 +1,143 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from mne import EvokedArray, pick_info
+from mne.io import BaseRaw
+from mne.io.pick import _picks_to_idx
+
+from ..evoked import _average_segments, _baseline_mask
+from ..triggers import load_triggers
+from ..triggers.config import _ROTATIONS
+from ..utils._checks import check_type
+from ..utils._docs import fill_doc
+from ..utils._windows import _drop_bad_windows, _window_conditions
+from ..utils.logs import logger
+from .ecg import find_r_peaks
+
+if TYPE_CHECKING:
+    from typing import Dict, Optional, Tuple
+
+    from mne import Evoked
+    from numpy.typing import ArrayLike
+
+
+@fill_doc
+def compute_hep(
+    raw: BaseRaw,
+    r_peaks: Optional[ArrayLike] = None,
+    tmin: float = -0.2,
+    tmax: float = 0.6,
+    baseline: Optional[Tuple[Optional[float], Optional[float]]] = None,
+    event_id: Optional[Dict[str, int]] = None,
+    picks="eeg",
+    ch_name: str = "ECG",
+    reject_by_annotation: bool = True,
+    batch_size: Optional[int] = None,
+) -> Tuple[Dict[str, Evoked], Dict[str, Evoked]]:
+    """Compute the heartbeat-evoked potentials of each condition.
+
+    The beat-locked segments are gathered in batches from the raw recording
+    and merged in running means and variances per condition, thus the
+    individual beat epochs are never stored.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording with a synthetic STI channel.
+    r_peaks : array-like of shape (n_beats,) | None
+        Index of the R-peaks in the data array. If None, the R-peaks are
+        detected on the channel ``ch_name`` with
+        :func:`~eeg_cybersickness.physio.find_r_peaks`.
+    tmin : float
+        Start of the epochs in seconds, relative to the R-peaks.
+    tmax : float
+        End of the epochs in seconds, relative to the R-peaks.
+    baseline : tuple | None
+        Start and end of the baseline period in seconds. If None, no baseline
+        correction is applied. A None start or end corresponds to the start or
+        end of the epochs. The baseline is subtracted from each epoch before it
+        is accumulated.
+    event_id : dict | None
+        The key is the name of a condition and the value is its trigger code on
+        the synthetic STI channel. A beat belongs to a condition if its entire
+        epoch is recorded during that condition. If None, the rotation triggers
+        from :func:`~eeg_cybersickness.triggers.load_triggers` are used.
+    %(picks)s
+    ch_name : str
+        Name of the ECG channel, used if ``r_peaks`` is None.
+    reject_by_annotation : bool
+        If True, epochs overlapping an annotation whose description starts with
+        ``"bad"`` are dropped.
+    %(batch_size)s
+
+    Returns
+    -------
+    evokeds : dict
+        The key is the name of the condition and the value is the average
+        ``Evoked`` of that condition. Conditions without any beat are omitted.
+    evokeds_sem : dict
+        The key is the name of the condition and the value is the standard error
+        of the mean of that condition, as an ``Evoked`` of kind
+        ``"standard_error"``.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    sfreq = raw.info["sfreq"]
+    check_type(tmin, ("numeric",), "tmin")
+    check_type(tmax, ("numeric",), "tmax")
+    if tmax <= tmin:
+        raise ValueError(
+            f"Argument 'tmax' ({tmax}) should be larger than 'tmin' ({tmin})."
+        )
+    check_type(reject_by_annotation, (bool,), "reject_by_annotation")
+    if event_id is None:
+        triggers = load_triggers()
+        event_id = {key: triggers[key] for key in _ROTATIONS}
+    check_type(event_id, (dict,), "event_id")
+    picks = _picks_to_idx(raw.info, picks, exclude="bads")
+    r_peaks = find_r_peaks(raw, ch_name) if r_peaks is None else np.asarray(r_peaks)
+
+    # select the epochs
+    offset = int(np.round(tmin * sfreq))
+    n_times = int(np.round((tmax - tmin) * sfreq)) + 1
+    times = (offset + np.arange(n_times)) / sfreq
+    onsets = r_peaks.astype(np.int64) + offset
+    if reject_by_annotation:
+        onsets = _drop_bad_windows(raw, onsets, n_times)
+    else:
+        onsets = onsets[(0 <= onsets) & (onsets + n_times <= raw.n_times)]
+    codes = _window_conditions(raw, onsets, n_times)
+    valid = np.isin(codes, list(event_id.values()))
+    onsets, codes = onsets[valid], codes[valid]
+    if onsets.size == 0:
+        raise RuntimeError("No heartbeat epoch was found during the conditions.")
+    conditions = {
+        name: code for name, code in event_id.items() if np.any(codes == code)
+    }
+    labels = np.argmax(codes[:, np.newaxis] == list(conditions.values()), axis=1)
+    logger.info(
+        "Computing the heartbeat-evoked potentials of %i beats in %i conditions.",
+        onsets.size,
+        len(conditions),
+    )
+
+    bmask = _baseline_mask(baseline, times)
+    stats = _average_segments(
+        raw, picks, onsets, labels, len(conditions), n_times, bmask, batch_size
+    )
+    info = pick_info(raw.info, picks)
+    evokeds, evokeds_sem = dict(), dict()
+    for name, stat in zip(conditions, stats):
+        evokeds[name] = EvokedArray(
+            stat.mean, info, tmin=times[0], comment=name, nave=stat.count
+        )
+        evokeds_sem[name] = EvokedArray(
+            stat.std / np.sqrt(stat.count),
+            info,
+            tmin=times[0],
+            comment=name,
+            nave=stat.count,
+            kind="standard_error",
+        )
+    return evokeds, evokeds_sem
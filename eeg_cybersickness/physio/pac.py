@@ -0,0 +1,365 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from mne import find_events
+from mne.annotations import _annotations_starts_stops
+from mne.filter import filter_data
+from mne.io import BaseRaw
+from mne.io.pick import _picks_to_idx
+from mne.parallel import parallel_func
+from scipy.signal import decimate, hilbert
+
+from ..spectral._bands import _check_bands
+from ..spectral.envelope import _check_envelope_parameters, _iter_band_envelopes
+from ..triggers import load_triggers
+from ..triggers.config import _ROTATIONS
+from ..utils._checks import _ensure_int, check_type
+from ..utils._docs import fill_doc
+from ..utils.logs import logger
+from .egg import _GASTRIC_BANDS, _decimation_factors
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Generator, Iterable, Optional, Tuple
+
+    from numpy.typing import NDArray
+
+
+@fill_doc
+def compute_gastric_pac(
+    raw: BaseRaw,
+    bands: Optional[Dict[str, Tuple[float, float]]] = None,
+    egg_band: Optional[Tuple[float, float]] = None,
+    ch_name: str = "EGG",
+    target_sfreq: float = 2.0,
+    n_bins: int = 18,
+    event_id: Optional[Dict[str, int]] = None,
+    picks="eeg",
+    reject_by_annotation: bool = True,
+    n_surrogates: int = 200,
+    min_shift: float = 60.0,
+    seed: Optional[int] = None,
+    n_jobs: Optional[int] = None,
+    batch_size: int = 20,
+) -> Dict[str, Any]:
+    """Compute the coupling between the EGG phase and the EEG band amplitudes.
+
+    The phase of the gastric rhythm is computed once on the decimated EGG
+    channel, and the EEG band envelopes are computed in chunks as in
+    :func:`~eeg_cybersickness.spectral.compute_band_envelopes`. Each chunk is
+    decimated to the same rate before the next one is computed, thus the
+    envelopes are only stored at the rate of the EGG phase. The modulation
+    index is then evaluated for all channels and bands at once, and compared to
+    surrogates obtained by circularly shifting the phase in time.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording with an EGG channel and a synthetic STI channel.
+    bands : dict | None
+        The key is the name of the band and the value is a 2-tuple of floats
+        with the edges of the band in Hz. If None, the delta (1-4 Hz), theta
+        (4-8 Hz), alpha (8-13 Hz) and beta (13-30 Hz) bands are used.
+    egg_band : tuple | None
+        Edges of the gastric band in Hz used to extract the EGG phase. If None,
+        the normogastric band (2-4 cycles per minute) is used.
+    ch_name : str
+        Name of the EGG channel.
+    target_sfreq : float
+        Sampling frequency in Hz at which the coupling is evaluated.
+    n_bins : int
+        Number of phase bins of the modulation index.
+    event_id : dict | None
+        The key is the name of a condition and the value is its trigger code on
+        the synthetic STI channel. Only the samples recorded during those
+        conditions are used. If None, the rotation triggers from
+        :func:`~eeg_cybersickness.triggers.load_triggers` are used.
+    %(picks)s
+    reject_by_annotation : bool
+        If True, samples within an annotation whose description starts with
+        ``"bad"`` are excluded.
+    n_surrogates : int
+        Number of surrogates.
+    min_shift : float
+        Minimum time shift of the phase in seconds for the surrogates.
+    seed : int | None
+        Seed of the random generator of the surrogate shifts. The shifts depend
+        only on the seed, independently of ``n_jobs``.
+    %(n_jobs)s
+    batch_size : int
+        Number of surrogates evaluated together in a job.
+
+    Returns
+    -------
+    pac : dict
+        Phase-amplitude coupling with the keys:
+
+        - ``"ch_names"``: list of the EEG channel names.
+        - ``"bands"``: list of the band names.
+        - ``"mi"``: array of shape (n_bands, n_channels), modulation index.
+        - ``"zscore"``: array of shape (n_bands, n_channels), modulation index
+          z-scored against the surrogates.
+        - ``"pvalue"``: array of shape (n_bands, n_channels), permutation
+          p-value ``(1 + k) / (1 + n_surrogates)`` where ``k`` is the number of
+          surrogates larger or equal to the modulation index. The observed
+          modulation index is counted among the surrogates, thus the p-value is
+          at least ``1 / (1 + n_surrogates)``.
+        - ``"amplitude"``: array of shape (n_bands, n_channels, n_bins), mean
+          amplitude in each phase bin, normalized to sum to 1.
+        - ``"n_samples"``: number of samples used.
+        - ``"sfreq"``: sampling frequency in Hz at which the coupling is
+          evaluated.
+
+    Notes
+    -----
+    The modulation index is the normalized Kullback-Leibler divergence between
+    the distribution of the amplitude across phase bins and the uniform
+    distribution (Tort et al., 2010).
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    sfreq = raw.info["sfreq"]
+    bands = _check_bands(bands, sfreq)
+    if egg_band is None:
+        egg_band = _GASTRIC_BANDS["normogastria"]
+    check_type(egg_band, (tuple,), "egg_band")
+    check_type(ch_name, (str,), "ch_name")
+    if ch_name not in raw.ch_names:
+        raise ValueError(f"The channel '{ch_name}' is not present in the recording.")
+    check_type(target_sfreq, ("numeric",), "target_sfreq")
+    if target_sfreq <= 2 * egg_band[1]:
+        raise ValueError(
+            "Argument 'target_sfreq' should be above twice the highest frequency "
+            f"of the gastric band ({2 * egg_band[1]:.2f} Hz). {target_sfreq} is "
+            "invalid."
+        )
+    n_bins = _ensure_int(n_bins, "n_bins")
+    n_surrogates = _ensure_int(n_surrogates, "n_surrogates")
+    batch_size = _ensure_int(batch_size, "batch_size")
+    for var, name in ((n_bins, "n_bins"), (batch_size, "batch_size")):
+        if var <= 0:
+            raise ValueError(
+                f"Argument '{name}' should be a strictly positive integer. {var} is "
+                "invalid."
+            )
+    check_type(min_shift, ("numeric",), "min_shift")
+    check_type(reject_by_annotation, (bool,), "reject_by_annotation")
+    if event_id is None:
+        triggers = load_triggers()
+        event_id = {key: triggers[key] for key in _ROTATIONS}
+    check_type(event_id, (dict,), "event_id")
+    picks = _picks_to_idx(raw.info, picks, exclude="bads")
+
+    # decimation factors shared by the EGG and the envelopes
+    fmax = max(edges[1] for edges in bands.values())
+    factors_env = _decimation_factors(int(sfreq // (2 * fmax)))
+    decim_env = int(np.prod(factors_env))
+    factors = _decimation_factors(int(sfreq / decim_env // target_sfreq))
+    q = decim_env * int(np.prod(factors))
+    sfreq_pac = sfreq / q
+
+    # EGG phase, computed once
+    egg = raw.get_data(picks=[ch_name])[0]
+    for factor in factors_env + factors:
+        egg = decimate(egg, factor, ftype="fir", zero_phase=True)
+    egg = filter_data(
+        egg, sfreq_pac, egg_band[0], egg_band[1], method="fir", verbose=False
+    )
+    phase = np.angle(hilbert(egg))
+    bins = np.minimum(((phase + np.pi) / (2 * np.pi) * n_bins).astype(int), n_bins - 1)
+
+    # EEG envelopes, computed in chunks and decimated to the EGG rate
+    bands, picks, decim_env, n_half, n_fft = _check_envelope_parameters(
+        raw, bands, decim_env, picks, None
+    )
+    chunks = (
+        envelopes
+        for _, envelopes in _iter_band_envelopes(
+            raw, bands, picks, decim_env, n_half, n_fft
+        )
+    )
+    envelopes = np.concatenate(list(_decimate_chunks(chunks, factors)), axis=-1)
+    amplitude = envelopes.reshape(-1, envelopes.shape[-1]).T  # (n_times, n_features)
+
+    # select the samples recorded during the conditions
+    mask = _samples_mask(raw, event_id, q, phase.size, reject_by_annotation)
+    bins, amplitude = bins[mask], np.ascontiguousarray(amplitude[mask])
+    n_shift = int(np.round(min_shift * sfreq_pac))
+    if bins.size <= 2 * n_shift:
+        raise RuntimeError(
+            f"The {bins.size / sfreq_pac:.1f} seconds recorded during the conditions "
+            f"are too short for surrogates shifted by at least {min_shift} seconds."
+        )
+    logger.info(
+        "Computing the gastric phase-amplitude coupling on %i samples at %.2f Hz "
+        "for %i channels and %i bands.",
+        bins.size,
+        sfreq_pac,
+        picks.size,
+        len(bands),
+    )
+    mi, distribution = _modulation_index(bins[np.newaxis], amplitude, n_bins)
+
+    # surrogates in batches across jobs, each batch with its own seed
+    n_batches = int(np.ceil(n_surrogates / batch_size))
+    sizes = np.diff(np.linspace(0, n_surrogates, n_batches + 1).astype(int))
+    seeds = np.random.SeedSequence(seed).spawn(n_batches)
+    parallel, p_fun, _ = parallel_func(_surrogates_mi, n_jobs)
+    surrogates = parallel(
+        p_fun(bins, amplitude, n_bins, n_shift, size, seed)
+        for size, seed in zip(sizes, seeds)
+    )
+    surrogates = np.concatenate(surrogates, axis=0)
+    shape = (len(bands), picks.size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        zscore = (mi[0] - surrogates.mean(axis=0)) / surrogates.std(axis=0)
+    pvalue = (1 + np.sum(mi[0] <= surrogates, axis=0)) / (1 + n_surrogates)
+    return dict(
+        ch_names=[raw.ch_names[pick] for pick in picks],
+        bands=list(bands),
+        mi=mi[0].reshape(shape),
+        zscore=zscore.reshape(shape),
+        pvalue=pvalue.reshape(shape),
+        amplitude=distribution[0].T.reshape(shape + (n_bins,)),
+        n_samples=bins.size,
+        sfreq=sfreq_pac,
+    )
+
+
+def _decimate_chunks(
+    chunks: Iterable[NDArray[float]], factors: Tuple[int, ...]
+) -> Generator[NDArray[float], None, None]:
+    """Decimate a signal provided in consecutive chunks along the last axis.
+
+    The output matches :func:`scipy.signal.decimate` with ``ftype="fir"`` and
+    ``zero_phase=True`` applied successively with each factor on the
+    concatenated chunks. The chunks are decimated with margins covering the
+    filters of all the stages, and the margins are discarded.
+
+    Parameters
+    ----------
+    chunks : iterable of array of shape (..., n_times_chunk)
+        Consecutive chunks of the signal.
+    factors : tuple of int
+        Decimation factor of each stage.
+
+    Yields
+    ------
+    data : array of shape (..., n_times_decim)
+        Consecutive chunks of the decimated signal.
+    """
+    q = int(np.prod(factors))
+    # the FIR filter of a stage with the factor f spans 10 * f input samples on
+    # each side, i.e. 10 * f times the factors of the previous stages
+    n_margin = sum(11 * int(np.prod(factors[: k + 1])) for k in range(len(factors)))
+    n_margin = int(np.ceil(n_margin / q)) * q
+    buffer = None
+    offset = 0  # index of the first sample of the buffer
+    start = 0  # index of the first sample not yet decimated, multiple of q
+    for chunk in chunks:
+        buffer = chunk if buffer is None else np.concatenate((buffer, chunk), axis=-1)
+        stop = (offset + buffer.shape[-1] - n_margin) // q * q
+        if stop <= start:
+            continue
+        yield _decimate_segment(buffer, offset, start, stop, n_margin, factors)
+        start = stop
+        # keep the margin preceding the next segment
+        first = max(start - n_margin, 0)
+        buffer = buffer[..., first - offset :]
+        offset = first
+    if buffer is not None and start < offset + buffer.shape[-1]:
+        stop = offset + buffer.shape[-1]
+        yield _decimate_segment(buffer, offset, start, stop, n_margin, factors)
+
+
+def _decimate_segment(
+    buffer: NDArray[float],
+    offset: int,
+    start: int,
+    stop: int,
+    n_margin: int,
+    factors: Tuple[int, ...],
+) -> NDArray[float]:
+    """Decimate the samples between start and stop of a buffer with margins."""
+    q = int(np.prod(factors))
+    first = max(start - n_margin, 0)
+    data = buffer[..., first - offset : stop + n_margin - offset]
+    for factor in factors:
+        data = decimate(data, factor, ftype="fir", zero_phase=True)
+    idx = (start - first) // q
+    return data[..., idx : idx + int(np.ceil(stop / q)) - start // q]
+
+
+def _samples_mask(
+    raw: BaseRaw,
+    event_id: Dict[str, int],
+    decim: int,
+    n_samples: int,
+    reject_by_annotation: bool,
+) -> NDArray[bool]:
+    """Select the decimated samples recorded during the conditions."""
+    samples = np.arange(n_samples) * decim
+    events = find_events(raw, stim_channel="STI")
+    idx = np.searchsorted(events[:, 0] - raw.first_samp, samples, side="right") - 1
+    codes = np.where(0 <= idx, events[np.clip(idx, 0, None), 2], 0)
+    mask = np.isin(codes, list(event_id.values()))
+    if reject_by_annotation:
+        onsets, ends = _annotations_starts_stops(raw, ("bad",))
+        for onset, end in zip(onsets, ends):
+            mask[(onset <= samples) & (samples < end)] = False
+    return mask
+
+
+def _modulation_index(
+    bins: NDArray[int], amplitude: NDArray[float], n_bins: int
+) -> Tuple[NDArray[float], NDArray[float]]:
+    """Compute the modulation index for several phase series at once.
+
+    Parameters
+    ----------
+    bins : array of shape (n_series, n_times)
+        Phase bin of each sample.
+    amplitude : array of shape (n_times, n_features)
+        Amplitude of each feature, e.g. channel and band.
+    n_bins : int
+        Number of phase bins.
+
+    Returns
+    -------
+    mi : array of shape (n_series, n_features)
+        Modulation index.
+    distribution : array of shape (n_series, n_bins, n_features)
+        Normalized mean amplitude in each phase bin.
+    """
+    onehot = (bins[:, np.newaxis, :] == np.arange(n_bins)[:, np.newaxis]).astype(
+        amplitude.dtype
+    )
+    counts = onehot.sum(axis=-1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.einsum("sbt,tf->sbf", onehot, amplitude) / counts
+    mean = np.nan_to_num(mean)  # empty bins
+    distribution = mean / mean.sum(axis=1, keepdims=True)
+    entropy = -np.sum(
+        distribution * np.log(np.where(0 < distribution, distribution, 1)), axis=1
+    )
+    mi = (np.log(n_bins) - entropy) / np.log(n_bins)
+    return mi, distribution
+
+
+def _surrogates_mi(
+    bins: NDArray[int],
+    amplitude: NDArray[float],
+    n_bins: int,
+    n_shift: int,
+    n_surrogates: int,
+    seed: np.random.SeedSequence,
+) -> NDArray[float]:
+    """Compute the modulation index of a batch of time-shifted surrogates."""
+    rng = np.random.default_rng(seed)
+    shifts = rng.integers(
+        n_shift, bins.size - n_shift, size=n_surrogates, endpoint=True
+    )
+    # circular shifts gathered as a single index array
+    idx = (np.arange(bins.size) - shifts[:, np.newaxis]) % bins.size
+    mi, _ = _modulation_index(bins[idx], amplitude, n_bins)
+    return mi
@@ -0,0 +1,106 @@
+"""Test ecg.py"""
+
+import numpy as np
+import pytest
+from mne import create_info
+from mne.io import RawArray
+
+from ..ecg import compute_hrv, compute_hrv_participants, find_r_peaks
+
+
+def _simulate_ecg(beats, sfreq, n_times, rng):
+    """Simulate an ECG as narrow Gaussian QRS complexes with noise."""
+    times = np.arange(n_times) / sfreq
+    ecg = 0.05 * rng.standard_normal(n_times)
+    ecg += 0.2 * np.sin(2 * np.pi * 0.3 * times)  # respiration drift
+    for beat in beats:
+        ecg += np.exp(-0.5 * ((times - beat / sfreq) / 0.01) ** 2)
+    return ecg
+
+
+@pytest.fixture(scope="module")
+def ecg():
+    """Create a recording with an ECG channel and known beats."""
+    rng = np.random.default_rng(101)
+    sfreq = 512.0
+    rr = 0.8 + 0.05 * np.sin(2 * np.pi * 0.1 * np.arange(400) * 0.8)
+    beats = np.round((0.5 + np.cumsum(rr)) * sfreq).astype(int)
+    n_times = int(300 * sfreq)
+    beats = beats[beats < n_times - sfreq]
+    data = np.vstack(
+        (
+            _simulate_ecg(beats, sfreq, n_times, rng),
+            rng.standard_normal(n_times) * 1e-6,
+        )
+    )
+    info = create_info(["ECG", "Cz"], sfreq, ["ecg", "eeg"])
+    return RawArray(data, info), beats
+
+
+def test_find_r_peaks(ecg):
+    """Test the detection of R-peaks on a simulated ECG."""
+    raw, beats = ecg
+    r_peaks = find_r_peaks(raw)
+    assert r_peaks.shape == beats.shape
+    assert np.max(np.abs(r_peaks - beats)) <= 2
+    # inverted polarity and shorter chunks
+    raw_inv = RawArray(-raw.get_data(), raw.info)
+    r_peaks = find_r_peaks(raw_inv, chunk_duration=17.0)
+    assert r_peaks.shape == beats.shape
+    assert np.max(np.abs(r_peaks - beats)) <= 2
+
+    # no R-peak on a flat ECG
+    raw_flat = RawArray(np.zeros((2, raw.n_times)), raw.info)
+    r_peaks = find_r_peaks(raw_flat)
+    assert r_peaks.size == 0
+    hrv = compute_hrv(r_peaks, raw.info["sfreq"], raw.n_times)
+    assert np.all(hrv["n_rr"] == 0)
+    assert np.all(np.isnan(hrv["hr"]))
+
+    with pytest.raises(ValueError, match="not present"):
+        find_r_peaks(raw, ch_name="EKG")
+    with pytest.raises(ValueError, match="cutoffs"):
+        find_r_peaks(raw, l_freq=20.0, h_freq=10.0)
+
+
+def test_compute_hrv(ecg):
+    """Test the heart rate variability time course."""
+    raw, beats = ecg
+    sfreq = raw.info["sfreq"]
+    hrv = compute_hrv(beats, sfreq, raw.n_times)
+    assert list(hrv.columns) == ["times", "n_rr", "hr", "rmssd", "lf_hf"]
+    assert np.allclose(hrv["times"], np.arange(0, 300, 60))
+
+    # compare to the values computed beat by beat
+    rr = np.diff(beats) / sfreq
+    for k, tmin in enumerate(hrv["times"]):
+        mask = (tmin <= beats[1:] / sfreq) & (beats[1:] / sfreq < tmin + 60)
+        assert hrv["n_rr"][k] == np.count_nonzero(mask)
+        assert np.isclose(hrv["hr"][k], 60 / rr[mask].mean())
+        drr = np.diff(rr)[mask[1:]]
+        assert np.isclose(hrv["rmssd"][k], 1e3 * np.sqrt(np.mean(drr**2)))
+    # RR modulated at 0.1 Hz: power dominated by the LF band
+    assert np.all(hrv["lf_hf"][1:-1] > 1)
+    # the first window starts before the first beat
+    assert np.isnan(hrv["lf_hf"][0])
+
+    # intervals longer than 2 seconds from missed beats are dropped
+    hrv_missed = compute_hrv(np.delete(beats, [100, 101]), sfreq, raw.n_times)
+    window = int(beats[100] / sfreq // 60)
+    assert hrv_missed["n_rr"][window] == hrv["n_rr"][window] - 3
+    assert np.isclose(hrv_missed["hr"][window], hrv["hr"][window], rtol=0.02)
+
+
+def test_compute_hrv_participants(ecg, tmp_path):
+    """Test the parallel computation over participants."""
+    raw, beats = ecg
+    for participant in (1, 2):
+        folder = tmp_path / "derivatives" / f"P{str(participant).zfill(2)}"
+        folder.mkdir(parents=True)
+        raw.save(folder / f"P{str(participant).zfill(2)}_S1-raw.fif")
+    hrv = compute_hrv_participants(tmp_path, [1, 2], 1, n_jobs=2)
+    assert hrv.shape == (10, 7)
+    assert np.all(hrv["participant"].values == np.repeat([1, 2], 5))
+    assert np.all(hrv["session"] == 1)
+    expected = compute_hrv(beats, raw.info["sfreq"], raw.n_times)
+    assert np.allclose(hrv["hr"][:5], expected["hr"], rtol=1e-3)
@@ -0,0 +1,79 @@
+"""Test egg.py"""
+
+import numpy as np
+import pytest
+from mne import Annotations, create_info
+from mne.io import RawArray
+
+from ..egg import _decimation_factors, compute_egg_participants, compute_egg_spectrum
+
+
+@pytest.fixture(scope="module")
+def raw():
+    """Create a recording with a normogastric then tachygastric EGG."""
+    rng = np.random.default_rng(101)
+    sfreq = 500.0
+    times = np.arange(int(1200 * sfreq)) / sfreq
+    freq = np.where(times < 600, 3.0 / 60, 6.0 / 60)
+    phase = 2 * np.pi * np.cumsum(freq) / sfreq
+    egg = 1e-4 * np.sin(phase) + 1e-3 + 1e-5 * rng.standard_normal(times.size)
+    eeg = 1e-6 * rng.standard_normal(times.size)
+    info = create_info(["Cz", "EGG"], sfreq, ["eeg", "misc"])
+    return RawArray(np.vstack((eeg, egg)), info)
+
+
+def test_decimation_factors():
+    """Test the split of the decimation factor in stages."""
+    assert _decimation_factors(500) == (10, 10, 5)
+    assert _decimation_factors(250) == (10, 5, 5)
+    assert _decimation_factors(17) == (8, 2)
+    assert _decimation_factors(1) == ()
+
+
+def test_compute_egg_spectrum(raw):
+    """Test the gastric rhythm parameters."""
+    egg = compute_egg_spectrum(raw)
+    assert list(egg.columns) == [
+        "times",
+        "dominant_frequency",
+        "dominant_power",
+        "bradygastria",
+        "normogastria",
+        "tachygastria",
+    ]
+    assert np.allclose(egg["times"], np.arange(0, 1081, 60))
+    normo = egg[egg["times"] + 120 <= 600]
+    tachy = egg[600 <= egg["times"]]
+    assert np.allclose(normo["dominant_frequency"], 3.0 / 60, atol=0.2 / 60)
+    assert np.allclose(tachy["dominant_frequency"], 6.0 / 60, atol=0.2 / 60)
+    assert np.all(normo["normogastria"] > 0.9)
+    assert np.all(tachy["tachygastria"] > 0.9)
+    ratios = egg[["bradygastria", "normogastria", "tachygastria"]].sum(axis=1)
+    assert np.allclose(ratios, 1)
+    # power of a sine of amplitude 1e-4 V spread over the peak
+    assert np.all(1e-8 < normo["dominant_power"])
+
+    # bad segment
+    raw_bad = raw.copy()
+    raw_bad.set_annotations(Annotations([130.0], [10.0], "bad_segment"))
+    egg_bad = compute_egg_spectrum(raw_bad)
+    assert np.allclose(egg_bad["times"], [0] + list(range(180, 1081, 60)))
+
+    with pytest.raises(ValueError, match="not present"):
+        compute_egg_spectrum(raw, ch_name="EGG2")
+    with pytest.raises(ValueError, match="target_sfreq"):
+        compute_egg_spectrum(raw, target_sfreq=0.2)
+
+
+def test_compute_egg_participants(raw, tmp_path):
+    """Test the parallel computation over participants."""
+    for participant in ("P01", "P02"):
+        (tmp_path / "derivatives" / participant).mkdir(parents=True)
+        raw.save(tmp_path / "derivatives" / participant / f"{participant}_S3-raw.fif")
+    egg = compute_egg_participants(tmp_path, [1, 2], 3, n_jobs=2)
+    expected = compute_egg_spectrum(raw)
+    assert egg.shape == (2 * expected.shape[0], expected.shape[1] + 2)
+    assert np.all(egg["session"] == 3)
+    assert np.allclose(
+        egg["dominant_frequency"][: expected.shape[0]], expected["dominant_frequency"]
+    )
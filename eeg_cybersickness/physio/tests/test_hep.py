@@ -0,0 +1,66 @@
+"""Test hep.py"""
+
+import numpy as np
+import pytest
+from mne import Annotations, Epochs, create_info
+from mne.io import RawArray
+
+from ...triggers import load_triggers
+from ..hep import compute_hep
+
+
+@pytest.fixture(scope="module")
+def raw():
+    """Create a random raw recording with beats and rotation triggers."""
+    rng = np.random.default_rng(101)
+    triggers = load_triggers()
+    data = rng.standard_normal((3, 30000)) * 1e-6
+    r_peaks = np.arange(100, 30000, 200) + rng.integers(-20, 20, 150)
+    data[:, r_peaks[:, np.newaxis] + np.arange(25, 50)] += 5e-6
+    sti = np.zeros((1, data.shape[1]))
+    sti[0, [10, 10000, 20000]] = [
+        triggers["pitch"],
+        triggers["none"],
+        triggers["roll_yaw"],
+    ]
+    info = create_info(["Fz", "Cz", "Pz", "STI"], 250.0, ["eeg"] * 3 + ["stim"])
+    return RawArray(np.vstack((data, sti)), info), r_peaks
+
+
+def test_compute_hep(raw):
+    """Test the heartbeat-evoked potentials against MNE epochs."""
+    raw, r_peaks = raw
+    evokeds, evokeds_sem = compute_hep(raw, r_peaks, baseline=(None, 0), batch_size=7)
+    assert sorted(evokeds) == ["pitch", "roll_yaw"]
+    assert evokeds["pitch"].data.shape == (3, 201)
+    assert np.isclose(evokeds["pitch"].times[0], -0.2)
+    assert evokeds_sem["pitch"].kind == "standard_error"
+
+    # compare with MNE on the epochs entirely contained in each condition
+    events = np.c_[r_peaks, np.zeros_like(r_peaks), np.ones_like(r_peaks)]
+    epochs = Epochs(
+        raw, events, tmin=-0.2, tmax=0.6, baseline=(None, 0), picks="eeg", preload=True
+    )
+    for name, (start, stop) in (("pitch", (10, 10000)), ("roll_yaw", (20000, 30000))):
+        onsets = epochs.events[:, 0] - 50
+        mask = (start <= onsets) & (onsets + 201 <= stop)
+        assert evokeds[name].nave == np.count_nonzero(mask)
+        assert np.allclose(evokeds[name].data, epochs[mask].average().data)
+        assert np.allclose(evokeds_sem[name].data, epochs[mask].standard_error().data)
+    # the evoked response is recovered
+    assert np.all(evokeds["pitch"].data[:, 75:100].mean(axis=-1) > 4e-6)
+
+    # bad segment and custom conditions
+    raw_bad = raw.copy()
+    raw_bad.set_annotations(Annotations([30.0], [20.0], "bad_segment"))
+    triggers = load_triggers()
+    evokeds, _ = compute_hep(raw_bad, r_peaks, event_id={"none": triggers["none"]})
+    assert list(evokeds) == ["none"]
+    onsets = r_peaks - 50
+    mask = (12500 <= onsets) & (onsets + 201 <= 20000)
+    assert evokeds["none"].nave == np.count_nonzero(mask)
+
+    with pytest.raises(RuntimeError, match="No heartbeat epoch"):
+        compute_hep(raw, r_peaks, event_id={"question": triggers["question"]})
+    with pytest.raises(ValueError, match="does not contain any sample"):
+        compute_hep(raw, r_peaks, baseline=(-1.0, -0.5))
@@ -0,0 +1,93 @@
+"""Test pac.py"""
+
+import numpy as np
+import pytest
+from mne import Annotations, create_info
+from mne.io import RawArray
+from scipy.signal import decimate
+
+from ...triggers import load_triggers
+from ..pac import _decimate_chunks, _modulation_index, compute_gastric_pac
+
+
+@pytest.fixture(scope="module")
+def raw():
+    """Create a recording with an alpha rhythm modulated by the gastric phase."""
+    rng = np.random.default_rng(101)
+    sfreq = 250.0
+    times = np.arange(int(1200 * sfreq)) / sfreq
+    # gastric rhythm with a drifting frequency around 3 cycles per minute
+    drift = np.cumsum(rng.standard_normal(times.size))
+    drift = 0.01 * drift / np.abs(drift).max()
+    gastric = 2 * np.pi * np.cumsum(0.05 + drift) / sfreq
+    alpha = np.sin(2 * np.pi * 10 * times)
+    data = 0.2 * rng.standard_normal((3, times.size))
+    data[0] += (1 + 0.8 * np.cos(gastric)) * alpha
+    data[1] += alpha
+    egg = np.sin(gastric) + 0.05 * rng.standard_normal(times.size)
+    triggers = load_triggers()
+    sti = np.zeros(times.size)
+    sti[[10, int(1000 * sfreq)]] = [triggers["pitch"], triggers["question"]]
+    info = create_info(
+        ["Fz", "Cz", "Pz", "EGG", "STI"], sfreq, ["eeg"] * 3 + ["misc", "stim"]
+    )
+    return RawArray(np.vstack((data * 1e-6, egg * 1e-4, sti)), info)
+
+
+def test_modulation_index():
+    """Test the modulation index on known distributions."""
+    bins = np.tile(np.arange(4), 100)[np.newaxis]
+    amplitude = np.ones((400, 2))
+    amplitude[bins[0] == 0, 1] = 5
+    mi, distribution = _modulation_index(bins, amplitude, 4)
+    assert np.isclose(mi[0, 0], 0)
+    assert 0 < mi[0, 1]
+    assert np.allclose(distribution[0, :, 1], [5 / 8, 1 / 8, 1 / 8, 1 / 8])
+
+
+@pytest.mark.parametrize("factors", ((), (5,), (10, 3), (13, 2, 2)))
+@pytest.mark.parametrize("n_chunk", (7, 250, 3000))
+def test_decimate_chunks(factors, n_chunk):
+    """Test the decimation by chunks against the decimation of the signal."""
+    data = np.random.default_rng(101).standard_normal((2, 3, 5003))
+    expected = data
+    for factor in factors:
+        expected = decimate(expected, factor, ftype="fir", zero_phase=True)
+    chunks = (
+        data[..., start : start + n_chunk]
+        for start in range(0, data.shape[-1], n_chunk)
+    )
+    decimated = np.concatenate(list(_decimate_chunks(chunks, factors)), axis=-1)
+    assert decimated.shape == expected.shape
+    assert np.allclose(decimated, expected)
+
+
+def test_compute_gastric_pac(raw):
+    """Test the gastric phase-amplitude coupling and its surrogates."""
+    bands = dict(alpha=(8.0, 12.0))
+    pac = compute_gastric_pac(raw, bands, n_surrogates=40, seed=101)
+    assert pac["ch_names"] == ["Fz", "Cz", "Pz"]
+    assert pac["bands"] == ["alpha"]
+    assert pac["mi"].shape == pac["pvalue"].shape == (1, 3)
+    assert pac["amplitude"].shape == (1, 3, 18)
+    # only the pitch condition is used, between 0 and 1000 seconds
+    assert np.isclose(pac["n_samples"] / pac["sfreq"], 1000, rtol=0.01)
+    assert pac["mi"][0, 0] > 10 * pac["mi"][0, 1]
+    assert pac["pvalue"][0, 0] == 1 / 41
+    assert 0.05 < pac["pvalue"][0, 1]
+    assert 5 < pac["zscore"][0, 0]
+    # amplitude peaks at the EGG phase -pi/2, i.e. between the bins 4 and 5
+    assert np.argmax(pac["amplitude"][0, 0]) in (4, 5)
+
+    # surrogates are deterministic independently of the number of jobs
+    pac2 = compute_gastric_pac(raw, bands, n_surrogates=40, seed=101, n_jobs=2)
+    assert np.array_equal(pac["zscore"], pac2["zscore"])
+
+    # bad segments are excluded
+    raw_bad = raw.copy()
+    raw_bad.set_annotations(Annotations([100.0], [200.0], "bad_segment"))
+    pac_bad = compute_gastric_pac(raw_bad, bands, n_surrogates=10, seed=101)
+    assert np.isclose(pac_bad["n_samples"] / pac_bad["sfreq"], 800, rtol=0.01)
+
+    with pytest.raises(RuntimeError, match="too short"):
+        compute_gastric_pac(raw, bands, n_surrogates=10, min_shift=600.0)
@@ -0,0 +1,15 @@
+"""Preprocessing module."""
+
+from .bad_channels import find_bad_channels  # noqa: F401
+from .bad_segments import annotate_bad_segments  # noqa: F401
+from .blocks import process_blocks  # noqa: F401
+from .bridges import compute_bridged_electrodes, interpolate_bridges  # noqa: F401
+from .decimation import decimate_raw  # noqa: F401
+from .filter import filter_raw  # noqa: F401
+from .ica import apply_ica, fit_ica, label_ica  # noqa: F401
+from .pipeline import (  # noqa: F401
+    preprocess,
+    preprocess_participants,
+    review_preprocessing,
+)
+from .reference import set_average_reference  # noqa: F401
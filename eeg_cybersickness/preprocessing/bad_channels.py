@@ -0,0 +1,226 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from mne.channels import make_standard_montage
+from mne.io import BaseRaw
+from mne.io.pick import _picks_to_idx
+from scipy.fft import rfft, rfftfreq
+
+from ..utils._checks import _ensure_int, check_type, check_value
+from ..utils._windows import _batch_size, _iter_window_batches, _window_onsets
+from ..utils.logs import logger
+
+if TYPE_CHECKING:
+    from typing import Dict, List, Optional, Tuple
+
+    from numpy.typing import NDArray
+
+
+_CRITERIA = ("deviation", "correlation", "noise", "flat")
+
+
+def find_bad_channels(
+    raw: BaseRaw,
+    picks="eeg",
+    duration: float = 1.0,
+    deviation_threshold: float = 5.0,
+    correlation_threshold: float = 0.4,
+    noise_threshold: float = 5.0,
+    flat_threshold: float = 1e-7,
+    bad_fraction: float = 0.05,
+    n_neighbors: int = 4,
+    hf_freq: float = 50.0,
+    batch_size: Optional[int] = None,
+    criteria: Tuple[str, ...] = _CRITERIA,
+) -> Tuple[Dict[str, List[str]], pd.DataFrame]:
+    """Detect the bad channels and add them to ``raw.info["bads"]`` in-place.
+
+    The recording is cut in non-overlapping windows which are read in batches,
+    and the statistics of every channel and window of a batch are computed at
+    once. Four criteria can be evaluated:
+
+    - ``"deviation"``: robust z-score, across channels, of the median standard
+      deviation of each channel above ``deviation_threshold``.
+    - ``"correlation"``: fraction of windows in which the maximum correlation
+      of a channel with its ``n_neighbors`` nearest neighbors is below
+      ``correlation_threshold`` above ``bad_fraction``.
+    - ``"noise"``: robust z-score, across channels, of the median ratio between
+      the power above and below ``hf_freq`` above ``noise_threshold``.
+    - ``"flat"``: fraction of windows with a peak-to-peak amplitude below
+      ``flat_threshold`` above ``bad_fraction``.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording, preloaded or not.
+    picks : str | array-like | slice | None
+        Channels to include. The channels already marked as bad are excluded.
+    duration : float
+        Duration of the windows in seconds.
+    deviation_threshold : float
+        Threshold on the robust z-score of the amplitude.
+    correlation_threshold : float
+        Threshold on the correlation with the neighbors.
+    noise_threshold : float
+        Threshold on the robust z-score of the high-frequency noise ratio.
+    flat_threshold : float
+        Peak-to-peak amplitude in Volts below which a window is flat.
+    bad_fraction : float
+        Fraction of windows above which a channel is bad for the correlation
+        and flat criteria.
+    n_neighbors : int
+        Number of nearest neighbors of each channel, based on the montage of
+        the recording or on the ``"standard_1020"`` montage if no montage is
+        set.
+    hf_freq : float
+        Frequency in Hz separating the high-frequency noise from the signal.
+    batch_size : int | None
+        Number of windows processed together. If None, the batch size is chosen
+        to keep the intermediate arrays below 64 MiB.
+    criteria : tuple of str
+        Criteria evaluated, among ``"deviation"``, ``"correlation"``,
+        ``"noise"`` and ``"flat"``. Default to all of them.
+
+    Returns
+    -------
+    report : dict
+        The key is the evaluated criterion and the value is the list of
+        channels marked as bad by this criterion.
+    scores : DataFrame
+        Score of each channel for each evaluated criterion, indexed by channel
+        name.
+
+    Notes
+    -----
+    The windows overlapping an annotation whose description starts with
+    ``"bad"`` are ignored. The slow drifts inflate the ``"deviation"`` and
+    ``"correlation"`` criteria, thus they should be evaluated on high-pass
+    filtered data, while the ``"noise"`` criterion requires the frequencies
+    above ``hf_freq``, thus it should be evaluated before a low-pass filter.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    for var, name in (
+        (duration, "duration"),
+        (deviation_threshold, "deviation_threshold"),
+        (correlation_threshold, "correlation_threshold"),
+        (noise_threshold, "noise_threshold"),
+        (flat_threshold, "flat_threshold"),
+        (bad_fraction, "bad_fraction"),
+        (hf_freq, "hf_freq"),
+    ):
+        check_type(var, ("numeric",), name)
+    n_neighbors = _ensure_int(n_neighbors, "n_neighbors")
+    criteria = (criteria,) if isinstance(criteria, str) else criteria
+    check_type(criteria, (tuple,), "criteria")
+    for criterion in criteria:
+        check_value(criterion, _CRITERIA, "criteria")
+    picks = _picks_to_idx(raw.info, picks, exclude="bads")
+    if picks.size <= n_neighbors:
+        raise ValueError(
+            f"At least {n_neighbors + 1} good channels are required to find "
+            f"{n_neighbors} neighbors per channel. {picks.size} found."
+        )
+    ch_names = [raw.ch_names[pick] for pick in picks]
+    neighbors = _nearest_neighbors(raw, ch_names, n_neighbors)
+    sfreq = raw.info["sfreq"]
+    n_window = max(int(np.round(duration * sfreq)), 1)
+    onsets = _window_onsets(raw, 0.0, None, n_window, n_window, True)
+    if onsets.size == 0:
+        raise RuntimeError("No valid window was found in the recording.")
+    hf_mask = hf_freq < rfftfreq(n_window, 1.0 / sfreq)
+    if batch_size is None:
+        batch_size = _batch_size(picks.size * max(n_window, picks.size) * 16)
+
+    # statistics of each window and channel, one batch at a time
+    std = np.empty((onsets.size, picks.size))
+    ptp = np.empty((onsets.size, picks.size))
+    correlation = np.empty((onsets.size, picks.size))
+    noise = np.empty((onsets.size, picks.size))
+    for sl, data in _iter_window_batches(raw, picks, onsets, n_window, batch_size):
+        data = data - data.mean(axis=-1, keepdims=True)
+        ptp[sl] = np.ptp(data, axis=-1)
+        std[sl] = np.sqrt(np.einsum("bct,bct->bc", data, data) / n_window)
+        cov = np.einsum("bct,bdt->bcd", data, data) / n_window
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = cov / (std[sl, :, np.newaxis] * std[sl, np.newaxis, :])
+        # maximum correlation with the neighbors
+        corr = np.take_along_axis(corr, neighbors[np.newaxis], axis=-1)
+        correlation[sl] = np.nan_to_num(corr, nan=0.0).max(axis=-1)
+        spectrum = rfft(data, axis=-1)
+        power = spectrum.real**2 + spectrum.imag**2
+        with np.errstate(invalid="ignore", divide="ignore"):
+            noise[sl] = power[..., hf_mask].sum(axis=-1) / power[..., ~hf_mask].sum(
+                axis=-1
+            )
+
+    scores = pd.DataFrame(
+        dict(
+            deviation=_robust_zscore(np.median(std, axis=0)),
+            correlation=np.mean(correlation < correlation_threshold, axis=0),
+            noise=_robust_zscore(np.nanmedian(noise, axis=0)),
+            flat=np.mean(ptp < flat_threshold, axis=0),
+        ),
+        index=pd.Index(ch_names, name="ch_name"),
+    )
+    flat = scores["flat"] > bad_fraction
+    report = dict(
+        deviation=scores.index[deviation_threshold < scores["deviation"]].tolist(),
+        # flat channels are not correlated with their neighbors
+        correlation=scores.index[
+            (bad_fraction < scores["correlation"]) & ~flat
+        ].tolist(),
+        noise=scores.index[noise_threshold < scores["noise"]].tolist(),
+        flat=scores.index[flat].tolist(),
+    )
+    report = {key: value for key, value in report.items() if key in criteria}
+    scores = scores[[criterion for criterion in _CRITERIA if criterion in criteria]]
+    bads = [ch for ch in ch_names if any(ch in chs for chs in report.values())]
+    logger.info("%i bad channels found: %s", len(bads), report)
+    raw.info["bads"] = raw.info["bads"] + bads
+    return report, scores
+
+
+def _nearest_neighbors(
+    raw: BaseRaw, ch_names: List[str], n_neighbors: int
+) -> NDArray[int]:
+    """Find the nearest neighbors of each channel.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording.
+    ch_names : list of str
+        Name of the channels.
+    n_neighbors : int
+        Number of neighbors.
+
+    Returns
+    -------
+    neighbors : array of shape (n_channels, n_neighbors)
+        Index of the neighbors of each channel in ``ch_names``.
+    """
+    montage = raw.get_montage()
+    if montage is None:
+        montage = make_standard_montage("standard_1020")
+    ch_pos = montage.get_positions()["ch_pos"]
+    missing = [ch for ch in ch_names if ch not in ch_pos]
+    if len(missing) != 0:
+        raise ValueError(
+            f"The position of the channels {missing} is unknown. Set a montage "
+            "including those channels."
+        )
+    pos = np.array([ch_pos[ch] for ch in ch_names])
+    distances = np.linalg.norm(pos[:, np.newaxis] - pos[np.newaxis], axis=-1)
+    # the closest channel is the channel itself
+    return np.argsort(distances, axis=1)[:, 1 : n_neighbors + 1]
+
+
+def _robust_zscore(x: NDArray[float]) -> NDArray[float]:
+    """Compute the z-score with the median and the median absolute deviation."""
+    median = np.nanmedian(x)
+    mad = 1.4826 * np.nanmedian(np.abs(x - median))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (x - median) / mad
@@ -0,0 +1,100 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from mne import Annotations
+from mne.annotations import _adjust_onset_meas_date
+from mne.io import BaseRaw
+from mne.io.pick import _picks_to_idx
+
+from ..utils._checks import check_type
+from ..utils._docs import fill_doc
+from ..utils._windows import _batch_size, _iter_window_batches
+from ..utils.logs import logger
+
+if TYPE_CHECKING:
+    from typing import Optional
+
+
+@fill_doc
+def annotate_bad_segments(
+    raw: BaseRaw,
+    duration: float = 1.0,
+    threshold: float = 5.0,
+    picks="eeg",
+    batch_size: Optional[int] = None,
+) -> Annotations:
+    """Annotate the segments with an abnormal peak-to-peak amplitude.
+
+    The recording is cut in non-overlapping windows and the peak-to-peak
+    amplitude of each channel is computed on every window. A window is bad if
+    the log peak-to-peak amplitude of any channel deviates from the median of
+    this channel by more than ``threshold`` robust standard deviations.
+    Consecutive bad windows are merged in a single annotation.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording, preloaded or not.
+    duration : float
+        Duration of the windows in seconds.
+    threshold : float
+        Threshold on the robust z-score, computed with the median absolute
+        deviation of each channel.
+    %(picks)s
+    batch_size : int | None
+        Number of windows processed together. If None, the batch size is chosen
+        to keep the intermediate arrays below 64 MiB.
+
+    Returns
+    -------
+    annotations : Annotations
+        Annotations with the description ``"BAD_segment"``.
+
+    Notes
+    -----
+    The thresholds are relative to each channel, thus a noisy channel does not
+    mark the whole recording as bad. Noisy channels should be marked as bad in
+    ``raw.info["bads"]`` beforehand.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    check_type(duration, ("numeric",), "duration")
+    check_type(threshold, ("numeric",), "threshold")
+    if duration <= 0:
+        raise ValueError("Argument 'duration' should be a strictly positive number.")
+    if threshold <= 0:
+        raise ValueError("Argument 'threshold' should be a strictly positive number.")
+    picks = _picks_to_idx(raw.info, picks, exclude="bads")
+    n_window = max(int(np.round(duration * raw.info["sfreq"])), 1)
+    onsets = np.arange(0, raw.n_times - n_window + 1, n_window)
+    if batch_size is None:
+        batch_size = _batch_size(picks.size * n_window * 8)
+    ptp = np.empty((onsets.size, picks.size))
+    for sl, data in _iter_window_batches(raw, picks, onsets, n_window, batch_size):
+        ptp[sl] = np.ptp(data, axis=-1)
+    with np.errstate(divide="ignore"):
+        ptp = np.log(ptp)
+    median = np.median(ptp, axis=0)
+    mad = 1.4826 * np.median(np.abs(ptp - median), axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        zscore = np.abs(ptp - median) / mad
+    bad = np.any(threshold < zscore, axis=1)
+    logger.info(
+        "%i / %i windows of %.1f seconds annotated as bad.",
+        np.count_nonzero(bad),
+        bad.size,
+        duration,
+    )
+    # merge consecutive bad windows
+    edges = np.diff(np.concatenate(([0], bad.astype(int), [0])))
+    starts, stops = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    sfreq = raw.info["sfreq"]
+    annotations = Annotations(
+        onsets[starts] / sfreq,
+        (stops - starts) * n_window / sfreq,
+        "BAD_segment",
+        orig_time=raw.info["meas_date"],
+    )
+    _adjust_onset_meas_date(annotations, raw)
+    return annotations
@@ -0,0 +1,331 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from mne.filter import _filt_check_picks, _filt_update_info
+from mne.io import BaseRaw, RawArray
+from mne.io.constants import FIFF
+from mne.io.pick import _picks_to_idx
+from mne.io.utils import _mult_cal_one
+from mne.preprocessing import ICA
+from mne.utils import use_log_level
+from scipy.signal import fftconvolve
+
+from ..utils._checks import _check_memory, check_type, ensure_path
+from ..utils._docs import fill_doc
+from ..utils.logs import logger
+from .filter import _design_filter
+from .reference import _add_reference_channel
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Any, Dict, Optional, Tuple, Union
+
+    from mne import Info
+    from numpy.typing import NDArray
+
+
+# number of arrays of the size of a block (margins included) allocated while
+# a block is computed: the source data, the padded data, the spectrum, the
+# product of the spectra, the inverse FFT and the filtered data, with a margin.
+_N_BLOCK_ARRAYS = 8
+
+
+@fill_doc
+def process_blocks(
+    raw: BaseRaw,
+    fname: Union[str, Path],
+    l_freq: Optional[float] = None,
+    h_freq: Optional[float] = None,
+    picks=None,
+    reference: bool = False,
+    ref_channel: Optional[str] = None,
+    ica: Optional[ICA] = None,
+    max_memory: Union[int, str] = "256M",
+    overwrite: bool = False,
+) -> Path:
+    """Filter, re-reference and clean a recording block by block into a file.
+
+    The recording is never loaded as a whole. Each block is read with the
+    margins required by the filter, processed and written to the output FIF
+    file before the next block is read. The processing steps are applied in
+    order:
+
+    - FIR bandpass filter, with the same design as the preprocessing pipeline
+      (``method="fir"``, ``phase="zero-double"``, ``fir_window="hamming"``,
+      ``fir_design="firwin"`` and ``pad="edge"``), computed by overlap-save.
+    - addition of the flat reference electrode of the recording, e.g. CPz.
+    - common average reference of the EEG channels.
+    - application of the ICA, i.e. unmixing, exclusion of the components in
+      ``ica.exclude`` and remixing.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording, preloaded or not.
+    fname : path-like
+        Path to the output FIF file, which should end with ``-raw.fif``.
+    l_freq : float | None
+        Lower pass-band edge of the filter in Hz.
+    h_freq : float | None
+        Upper pass-band edge of the filter in Hz. If ``l_freq`` and ``h_freq``
+        are None, the recording is not filtered.
+    picks : str | array-like | slice | None
+        Channels to filter. None (default) will pick all data channels.
+    reference : bool
+        If True, the EEG channels are re-referenced to the average of the good
+        EEG channels.
+    ref_channel : str | None
+        Name of the reference electrode of the recording, appended as a flat EEG
+        channel after the filter, thus included in the average reference. If
+        None, no channel is added.
+    ica : ICA | None
+        Fitted ICA applied to the recording. The ICA should be fitted on data
+        filtered and re-referenced like the output recording.
+    %(max_memory)s
+    overwrite : bool
+        If True, an existing file is overwritten.
+
+    Returns
+    -------
+    fname : Path
+        Path to the output FIF file.
+
+    Notes
+    -----
+    The output matches ``raw.filter()``,
+    :func:`~eeg_cybersickness.preprocessing.set_average_reference` and
+    ``ica.apply(raw)`` applied to a preloaded recording, except for
+    recordings shorter than the filter. The recording is filtered as a single
+    segment, regardless of the ``"edge"`` annotations.
+
+    The interpolation of the bridged electrodes and the detection of the bad
+    channels and of the bad segments of
+    :func:`~eeg_cybersickness.preprocessing.preprocess` require the whole
+    recording, thus the pipeline still loads it in memory before the ICA.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    fname = ensure_path(fname, must_exist=False)
+    check_type(reference, (bool,), "reference")
+    check_type(ref_channel, (str, None), "ref_channel")
+    check_type(ica, (ICA, None), "ica")
+    check_type(overwrite, (bool,), "overwrite")
+    max_memory = _check_memory(max_memory)
+    if fname.exists() and not overwrite:
+        raise FileExistsError(
+            f"The file {fname} already exists. Use 'overwrite=True' to replace it."
+        )
+    info = raw.info.copy()
+
+    # filter
+    if l_freq is None and h_freq is None:
+        kernel = None
+        n_half = 0
+        filter_picks = np.array([], dtype=int)
+    else:
+        update_info, filter_picks = _filt_check_picks(info, picks, h_freq, l_freq)
+        kernel = _design_filter(
+            info["sfreq"],
+            None if l_freq is None else float(l_freq),
+            None if h_freq is None else float(h_freq),
+        )
+        n_half = kernel.size // 2
+        _filt_update_info(info, update_info, l_freq, h_freq)
+
+    # reference
+    if ref_channel is not None:
+        # MNE adds the reference channel to the information of an instance
+        inst = RawArray(np.zeros((info["nchan"], 1)), info, verbose=False)
+        _add_reference_channel(inst, ref_channel)
+        info = inst.info
+        del inst
+    # the blocks are computed in physical units
+    for ch in info["chs"]:
+        ch["cal"] = 1.0
+        ch["range"] = 1.0
+    if reference:
+        ref_picks = _picks_to_idx(info, "eeg", exclude="bads")
+        with info._unlock():
+            info["custom_ref_applied"] = FIFF.FIFFV_MNE_CUSTOM_REF_ON
+    else:
+        ref_picks = np.array([], dtype=int)
+
+    # ICA
+    if ica is None:
+        ica_picks = np.array([], dtype=int)
+        projection, offset = None, None
+    else:
+        missing = [ch for ch in ica.ch_names if ch not in info["ch_names"]]
+        if len(missing) != 0:
+            raise ValueError(
+                f"The channels {missing} of the ICA are missing from the recording."
+            )
+        ica_picks = np.array([info["ch_names"].index(ch) for ch in ica.ch_names])
+        projection, offset = _ica_operator(ica)
+
+    # the filter margins are read with every block
+    n_bytes = 8 * _N_BLOCK_ARRAYS * info["nchan"]
+    n_min = 1 if kernel is None else kernel.size
+    n_block = min(max_memory // n_bytes - 4 * n_half, raw.n_times)
+    if n_block < min(n_min, raw.n_times):
+        raise ValueError(
+            f"Argument 'max_memory' is too small to process blocks of {n_min} "
+            f"samples. At least {n_bytes * (n_min + 4 * n_half)} bytes are "
+            f"required, {max_memory} is invalid."
+        )
+    logger.info(
+        "Processing %i samples in %i blocks of %i samples.",
+        raw.n_times,
+        int(np.ceil(raw.n_times / n_block)),
+        n_block,
+    )
+    out = _BlockRaw(
+        raw,
+        info,
+        n_block,
+        kernel,
+        n_half,
+        filter_picks,
+        ref_picks,
+        ica_picks,
+        projection,
+        offset,
+    )
+    out.save(fname, overwrite=overwrite, verbose=False)
+    return fname
+
+
+class _BlockRaw(BaseRaw):
+    """Recording whose data is computed block by block from another recording.
+
+    The data is computed when it is read, thus saving this recording writes the
+    processed blocks incrementally to disk. The last computed block is kept to
+    serve the consecutive reads of the FIF writer.
+    """
+
+    def __init__(
+        self,
+        raw: BaseRaw,
+        info: Info,
+        n_block: int,
+        kernel: Optional[NDArray[float]],
+        n_half: int,
+        filter_picks: NDArray[int],
+        ref_picks: NDArray[int],
+        ica_picks: NDArray[int],
+        projection: Optional[NDArray[float]],
+        offset: Optional[NDArray[float]],
+    ):
+        # MNE only exposes the raw extras to _read_segment_file
+        raw_extras = dict(
+            source=raw,
+            first_samp=raw.first_samp,
+            n_channels=info["nchan"],
+            n_block=n_block,
+            kernel=kernel,
+            n_half=n_half,
+            filter_picks=filter_picks,
+            ref_picks=ref_picks,
+            ica_picks=ica_picks,
+            projection=projection,
+            offset=offset,
+            block=(-1, None),
+        )
+        super().__init__(
+            info,
+            preload=False,
+            first_samps=(raw.first_samp,),
+            last_samps=(raw.last_samp,),
+            raw_extras=[raw_extras],
+            verbose=False,
+        )
+        self.set_annotations(raw.annotations, emit_warning=False)
+
+    def _read_segment_file(self, data, idx, fi, start, stop, cals, mult):
+        """Read a segment of data from the processed blocks."""
+        extras = self._raw_extras[fi]
+        n_block = extras["n_block"]
+        # MNE requests the samples as indices in the file, i.e. with first_samp
+        start -= extras["first_samp"]
+        stop -= extras["first_samp"]
+        one = np.empty((extras["n_channels"], stop - start))
+        pos = start
+        while pos < stop:
+            k = pos // n_block
+            if extras["block"][0] != k:
+                # release the previous block before computing the next one
+                extras["block"] = (-1, None)
+                extras["block"] = (k, _compute_block(extras, k))
+            block = extras["block"][1]
+            end = min(stop, k * n_block + block.shape[1])
+            if end <= pos:
+                raise RuntimeError(
+                    f"The block {k} does not contain the sample {pos}, which "
+                    "could be a bug."
+                )
+            one[:, pos - start : end - start] = block[
+                :, pos - k * n_block : end - k * n_block
+            ]
+            pos = end
+        _mult_cal_one(data, one, idx, cals, mult)
+
+
+def _compute_block(extras: Dict[str, Any], k: int) -> NDArray[float]:
+    """Read and process the k-th block of the source recording."""
+    n_times = extras["source"].n_times
+    n_half = extras["n_half"]
+    start = k * extras["n_block"]
+    stop = min(start + extras["n_block"], n_times)
+    # margins required by the filter, padded with the edge values
+    first = max(start - n_half, 0)
+    last = min(stop + n_half, n_times)
+    data = extras["source"].get_data(start=first, stop=last)
+    block = data[:, start - first : stop - first]
+    picks = extras["filter_picks"]
+    if extras["kernel"] is not None and picks.size != 0:
+        padded = np.pad(
+            data[picks],
+            ((0, 0), (n_half - start + first, n_half - last + stop)),
+            mode="edge",
+        )
+        # overlap-save: only the samples unaffected by the block edges are kept
+        block[picks] = fftconvolve(
+            padded, extras["kernel"][np.newaxis], mode="valid", axes=-1
+        )
+        del padded
+    if block.shape[0] != extras["n_channels"]:
+        # flat reference channel appended after the channels of the source
+        block = np.concatenate((block, np.zeros((1, block.shape[1]))))
+    picks = extras["ref_picks"]
+    if picks.size != 0:
+        block[picks] -= block[picks].mean(axis=0)
+    if extras["projection"] is not None:
+        picks = extras["ica_picks"]
+        block[picks] = (
+            extras["projection"] @ block[picks] + extras["offset"][:, np.newaxis]
+        )
+    return block
+
+
+def _ica_operator(ica: ICA) -> Tuple[NDArray[float], NDArray[float]]:
+    """Compute the affine operator applying the ICA to its channels.
+
+    Parameters
+    ----------
+    ica : ICA
+        Fitted ICA.
+
+    Returns
+    -------
+    projection : array of shape (n_channels, n_channels)
+        Linear part of the operator, which unmixes the data, zeroes the excluded
+        components and remixes the data.
+    offset : array of shape (n_channels,)
+        Constant part of the operator, due to the mean removed before the PCA.
+    """
+    n_channels = len(ica.ch_names)
+    with use_log_level("WARNING"):
+        offset = ica._pick_sources(np.zeros((n_channels, 1)), None, ica.exclude, None)
+        projection = ica._pick_sources(np.eye(n_channels), None, ica.exclude, None)
+    return projection - offset, offset[:, 0]
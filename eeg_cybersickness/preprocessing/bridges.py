@@ -0,0 +1,150 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from mne import pick_types
+from mne.io import BaseRaw
+from mne.preprocessing import interpolate_bridged_electrodes
+from scipy.optimize import minimize_scalar
+from scipy.stats import gaussian_kde
+
+from ..utils._checks import check_type
+from ..utils._windows import _batch_size, _iter_window_batches, _window_onsets
+from ..utils.logs import logger
+
+if TYPE_CHECKING:
+    from typing import List, Optional, Tuple, Union
+
+    from numpy.typing import NDArray
+
+
+def compute_bridged_electrodes(
+    raw: BaseRaw,
+    lm_cutoff: float = 16.0,
+    epoch_threshold: float = 0.5,
+    l_freq: float = 0.5,
+    h_freq: float = 30.0,
+    epoch_duration: float = 2.0,
+    bw_method: Optional[Union[str, float]] = None,
+    batch_size: Optional[int] = None,
+) -> Tuple[List[Tuple[int, int]], NDArray[float]]:
+    """Compute the electrical distance between pairs of EEG electrodes.
+
+    Drop-in replacement for :func:`mne.preprocessing.compute_bridged_electrodes`
+    which computes the electrical distance of all pairs of electrodes from the
+    covariance matrix of each epoch, with
+    ``var(x - y) = var(x) + var(y) - 2 cov(x, y)``, instead of looping over the
+    pairs.
+
+    Parameters
+    ----------
+    raw : Raw
+        Preloaded continuous recording.
+    lm_cutoff : float
+        The distance in µV² cutoff below which to search for a local minimum
+        indicative of bridging.
+    epoch_threshold : float
+        The proportion of epochs with electrical distance less than the local
+        minimum to consider a pair of electrodes bridged.
+    l_freq : float
+        The low cutoff frequency of the filter applied before the computation.
+    h_freq : float
+        The high cutoff frequency of the filter applied before the computation.
+    epoch_duration : float
+        The duration of the epochs in seconds.
+    bw_method : str | float | None
+        The bandwidth method of :class:`scipy.stats.gaussian_kde`.
+    batch_size : int | None
+        Number of epochs processed together. If None, the batch size is chosen
+        to keep the intermediate arrays below 64 MiB.
+
+    Returns
+    -------
+    bridged_idx : list of tuple
+        Pairs of bridged electrodes, as indices in ``raw.ch_names``.
+    ed_matrix : array of shape (n_epochs, n_channels, n_channels)
+        Electrical distance in µV² of each pair of good EEG electrodes, in the
+        upper triangle. The other elements are NaN.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    check_type(lm_cutoff, ("numeric",), "lm_cutoff")
+    check_type(epoch_threshold, ("numeric",), "epoch_threshold")
+    check_type(epoch_duration, ("numeric",), "epoch_duration")
+    picks = pick_types(raw.info, eeg=True)
+    if picks.size == 0:
+        raise RuntimeError("No EEG channels found, cannot compute electrode bridging.")
+    inst = raw.copy().pick(picks)
+    inst.filter(l_freq=l_freq, h_freq=h_freq, picks="all", verbose=False)
+    n_window = int(np.round(epoch_duration * inst.info["sfreq"]))
+    onsets = _window_onsets(inst, 0.0, None, n_window, n_window, True)
+    if batch_size is None:
+        batch_size = _batch_size(max(n_window, picks.size) * picks.size * 8)
+
+    # electrical distance of all pairs from the covariance matrices
+    ed_matrix = np.empty((onsets.size, picks.size, picks.size))
+    iu = np.triu_indices(picks.size, k=1)
+    for sl, data in _iter_window_batches(
+        inst, np.arange(picks.size), onsets, n_window, batch_size
+    ):
+        mean = data.mean(axis=-1)
+        cov = np.einsum("bct,bdt->bcd", data, data) / n_window
+        cov -= mean[:, :, np.newaxis] * mean[:, np.newaxis, :]
+        var = np.diagonal(cov, axis1=1, axis2=2)
+        ed_matrix[sl] = var[:, :, np.newaxis] + var[:, np.newaxis, :] - 2 * cov
+    il = np.tril_indices(picks.size)
+    ed_matrix[:, il[0], il[1]] = np.nan
+    ed_matrix *= 1e12  # scale to µV²
+    # rounding errors on identical channels can yield small negative distances
+    ed_matrix[:, iu[0], iu[1]] = np.maximum(ed_matrix[:, iu[0], iu[1]], 0)
+
+    # if not enough values below local minimum cutoff, return no bridges
+    n_epochs = onsets.size
+    ed_flat = ed_matrix[:, iu[0], iu[1]].ravel()
+    if ed_flat[ed_flat < lm_cutoff].size / n_epochs < epoch_threshold:
+        return list(), ed_matrix
+    kde = gaussian_kde(ed_flat[ed_flat < lm_cutoff], bw_method=bw_method)
+    with np.errstate(invalid="ignore"):
+        local_minimum = float(
+            minimize_scalar(
+                lambda x: kde(x) if x < lm_cutoff and x > 0 else np.inf
+            ).x.item()
+        )
+    logger.info("Local minimum %s found.", local_minimum)
+
+    # pairs below the local minimum on a sufficient proportion of epochs
+    count = np.sum(ed_matrix[:, iu[0], iu[1]] < local_minimum, axis=0)
+    bridged = count / n_epochs > epoch_threshold
+    bridged_idx = [(picks[i], picks[j]) for i, j in zip(iu[0][bridged], iu[1][bridged])]
+    return bridged_idx, ed_matrix
+
+
+def interpolate_bridges(raw: BaseRaw) -> List[Tuple[str, str]]:
+    """Detect and interpolate the gel-bridged electrodes in-place.
+
+    Parameters
+    ----------
+    raw : Raw
+        Preloaded continuous recording.
+
+    Returns
+    -------
+    bridges : list of tuple
+        Pairs of bridged electrodes, as channel names.
+
+    Notes
+    -----
+    The bridges are detected with :func:`compute_bridged_electrodes` and
+    interpolated with :func:`mne.preprocessing.interpolate_bridged_electrodes`.
+    The montage ``"standard_1020"`` is set during the interpolation and removed
+    afterwards.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    bridged_idx, _ = compute_bridged_electrodes(raw)
+    bridges = [(raw.ch_names[idx1], raw.ch_names[idx2]) for idx1, idx2 in bridged_idx]
+    logger.info("%i bridged electrode pairs found: %s", len(bridges), bridges)
+    if len(bridged_idx) != 0:
+        raw.set_montage("standard_1020")
+        interpolate_bridged_electrodes(raw, bridged_idx)
+        raw.set_montage(None)
+    return bridges
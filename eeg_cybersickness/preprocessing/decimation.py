@@ -0,0 +1,112 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from mne import pick_types
+from mne.io import BaseRaw, RawArray
+
+from ..utils._checks import _ensure_int, check_type
+from ..utils.logs import logger
+
+if TYPE_CHECKING:
+    from typing import Optional
+
+
+def decimate_raw(
+    raw: BaseRaw,
+    decim: Optional[int] = None,
+    chunk_duration: float = 60.0,
+) -> BaseRaw:
+    """Decimate a low-pass filtered recording to an analysis sampling rate.
+
+    The recording is decimated by keeping one sample every ``decim`` samples,
+    thus it should be low-pass filtered beforehand, e.g. by the bandpass filter
+    of the preprocessing, to avoid aliasing. The kept samples are aligned on
+    the multiples of ``decim`` since the start of the acquisition, thus the
+    annotations remain at their original times. The events of the stim
+    channels, including the events shorter than ``decim`` samples, are moved
+    to the nearest kept sample.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording, preloaded or not, low-pass filtered.
+    decim : int | None
+        Decimation factor. If None, the largest factor yielding a sampling
+        rate of at least 3 times the low-pass frequency of ``raw.info`` is
+        used.
+    chunk_duration : float
+        Duration of the chunks of samples read at once from the recording in
+        seconds.
+
+    Returns
+    -------
+    raw : RawArray
+        Decimated recording.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    check_type(chunk_duration, ("numeric",), "chunk_duration")
+    if chunk_duration <= 0:
+        raise ValueError(
+            "Argument 'chunk_duration' should be a strictly positive number. "
+            f"{chunk_duration} is invalid."
+        )
+    sfreq = raw.info["sfreq"]
+    lowpass = raw.info["lowpass"]
+    if decim is None:
+        # same criterion as MNE to avoid aliasing when decimating epochs
+        decim = max(int(sfreq // (3 * lowpass)), 1)
+    decim = _ensure_int(decim, "decim")
+    if decim <= 0:
+        raise ValueError(
+            f"Argument 'decim' should be a strictly positive integer. {decim} is "
+            "invalid."
+        )
+    if sfreq / decim < 3 * lowpass:
+        logger.warning(
+            "The decimation factor %i yields a sampling rate of %.1f Hz, below 3 "
+            "times the low-pass frequency of %.1f Hz.",
+            decim,
+            sfreq / decim,
+            lowpass,
+        )
+    # first kept sample, aligned on the multiples of decim
+    offset = -raw.first_samp % decim
+    n_times = len(range(offset, raw.n_times, decim))
+    data = np.empty((raw.info["nchan"], n_times))
+    n_chunk = max(int(chunk_duration * sfreq) // decim, 1) * decim
+    for start in range(offset, raw.n_times, n_chunk):
+        data[:, (start - offset) // decim : (start - offset + n_chunk) // decim] = (
+            raw.get_data(start=start, stop=start + n_chunk)[:, ::decim]
+        )
+
+    # events of the stim channels at the nearest kept sample
+    picks = pick_types(raw.info, meg=False, stim=True, exclude=())
+    if picks.size != 0:
+        stim = raw.get_data(picks)
+        for k, pick in enumerate(picks):
+            onsets = np.flatnonzero(np.diff(stim[k], prepend=0) != 0)
+            onsets = onsets[stim[k, onsets] != 0]
+            idx = np.floor((onsets - offset) / decim + 0.5).astype(int)
+            data[pick, np.clip(idx, 0, n_times - 1)] = stim[k, onsets]
+
+    info = raw.info.copy()
+    with info._unlock():
+        info["sfreq"] = sfreq / decim
+    raw_decim = RawArray(
+        data, info, first_samp=(raw.first_samp + offset) // decim, verbose=False
+    )
+    annotations = raw.annotations.copy()
+    if annotations.orig_time is None:
+        # without measurement date, the onsets are set relative to the first
+        # sample, which is shifted by the offset
+        annotations.onset = np.maximum(annotations.onset - raw_decim.first_time, 0)
+    raw_decim.set_annotations(annotations)
+    logger.info(
+        "Recording decimated by %i from %.1f Hz to %.1f Hz.",
+        decim,
+        sfreq,
+        sfreq / decim,
+    )
+    return raw_decim
@@ -0,0 +1,258 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from hashlib import sha256
+from os import makedirs
+from typing import TYPE_CHECKING
+
+import numpy as np
+from mne import compute_rank, pick_info
+from mne.annotations import _annotations_starts_stops
+from mne.io import BaseRaw, RawArray
+from mne.io.pick import _picks_to_idx
+from mne.preprocessing import ICA, read_ica
+from mne_icalabel import label_components
+
+from ..utils._checks import check_type, ensure_path
+from ..utils._docs import fill_doc
+from ..utils.logs import logger
+from .blocks import process_blocks
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Dict, List, Optional, Tuple, Union
+
+    from numpy.typing import NDArray
+
+
+# labels of the ICLabel components that are kept
+_ICLABEL_KEEP: Tuple[str, ...] = ("brain", "other")
+
+
+def fit_ica(
+    raw: Union[BaseRaw, List[BaseRaw]],
+    max_samples: Optional[int] = None,
+    seed: Optional[int] = None,
+    cache: Optional[Union[str, Path]] = None,
+    chunk_duration: float = 60.0,
+) -> ICA:
+    """Fit a picard ICA on a decimated subset of the clean EEG samples.
+
+    The samples within an annotation whose description starts with ``"bad"``
+    are excluded, and the remaining samples are decimated to fit in the sample
+    budget ``max_samples``. Only the selected samples are read from the
+    recordings, chunk by chunk.
+
+    Parameters
+    ----------
+    raw : Raw | list of Raw
+        Continuous recording(s), filtered and re-referenced to a common average.
+        If a list is provided, e.g. the sessions of a participant, a single ICA
+        is fitted on the samples pooled across recordings, using the EEG
+        channels which are good in every recording.
+    max_samples : int | None
+        Maximum number of samples used to fit the ICA. If None, the budget is
+        set to ``40 * n_channels ** 2`` samples.
+    seed : int | None
+        Seed of the random initialization of the ICA.
+    cache : path-like | None
+        Path to a folder in which the fitted ICA is stored under a hash of the
+        selected samples and of the parameters. If a matching ICA is found, it
+        is loaded instead of being fitted.
+    chunk_duration : float
+        Duration of the chunks in seconds.
+
+    Returns
+    -------
+    ica : ICA
+        Fitted ICA. The number of components is set to the rank of the EEG data.
+    """
+    raws = raw if isinstance(raw, (list, tuple)) else [raw]
+    for k, raw in enumerate(raws):
+        check_type(raw, (BaseRaw,), f"raw[{k}]")
+    check_type(max_samples, ("int", None), "max_samples")
+    check_type(seed, ("int", None), "seed")
+    check_type(chunk_duration, ("numeric",), "chunk_duration")
+    if chunk_duration <= 0:
+        raise ValueError(
+            "Argument 'chunk_duration' should be a strictly positive number. "
+            f"{chunk_duration} is invalid."
+        )
+    ch_names = [
+        raws[0].ch_names[pick]
+        for pick in _picks_to_idx(raws[0].info, "eeg", exclude="bads")
+    ]
+    for raw in raws[1:]:
+        picks = _picks_to_idx(raw.info, "eeg", exclude="bads")
+        ch_names = [ch for ch in ch_names if ch in [raw.ch_names[k] for k in picks]]
+    if max_samples is None:
+        max_samples = 40 * len(ch_names) ** 2
+    if max_samples <= 0:
+        raise ValueError(
+            "Argument 'max_samples' should be a strictly positive integer. "
+            f"{max_samples} is invalid."
+        )
+
+    # select the clean samples, decimated to fit in the budget
+    masks = [_good_samples_mask(raw) for raw in raws]
+    n_good = sum(np.count_nonzero(mask) for mask in masks)
+    if n_good == 0:
+        raise RuntimeError("No clean sample was found to fit the ICA.")
+    step = int(np.ceil(n_good / max_samples))
+    data, offset = list(), 0
+    for raw, mask in zip(raws, masks):
+        samples = np.flatnonzero(mask)
+        # the decimation continues across recordings
+        samples = samples[(-offset) % step :: step]
+        offset += np.count_nonzero(mask)
+        picks = np.array([raw.ch_names.index(ch) for ch in ch_names])
+        data.append(_get_samples(raw, picks, samples, chunk_duration))
+    data = np.concatenate(data, axis=1)
+    logger.info(
+        "Fitting the ICA on %i / %i clean samples (decimation by %i).",
+        data.shape[1],
+        n_good,
+        step,
+    )
+    info = pick_info(raws[0].info, _picks_to_idx(raws[0].info, ch_names))
+    raw = RawArray(data, info, verbose="WARNING")
+    # the FIF recordings are stored in single precision, thus the rank
+    # deficiency of the average reference is only exact up to float32 precision
+    rank = compute_rank(
+        raw, rank=None, tol=1e-6, tol_kind="relative", verbose="WARNING"
+    )["eeg"]
+    ica = ICA(
+        n_components=rank,
+        method="picard",
+        fit_params=dict(ortho=False, extended=True),
+        random_state=seed,
+    )
+
+    if cache is not None:
+        cache = ensure_path(cache, must_exist=False)
+        sha = sha256(data.tobytes())
+        sha.update(
+            repr((ch_names, rank, ica.method, ica.fit_params, seed)).encode("utf-8")
+        )
+        fname = cache / f"{sha.hexdigest()[:16]}-ica.fif"
+        if fname.exists():
+            logger.info("Loading the cached ICA %s.", fname)
+            return read_ica(fname, verbose="WARNING")
+    ica.fit(raw, picks="eeg")
+    if cache is not None:
+        makedirs(cache, exist_ok=True)
+        ica.save(fname, verbose="WARNING")
+    return ica
+
+
+def label_ica(
+    raw: BaseRaw, ica: ICA, threshold: float = 0.8
+) -> Dict[str, Tuple[int, ...]]:
+    """Label the ICA components and exclude the artifacts.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording on which the ICA was fitted, with a montage and
+        referenced to a common average.
+    ica : ICA
+        Fitted ICA. The artifact components are added to ``ica.exclude``
+        in-place.
+    threshold : float
+        Minimum probability of the ICLabel label to exclude a component.
+
+    Returns
+    -------
+    labels : dict
+        The key is the ICLabel label and the value is the tuple of components
+        assigned to that label.
+
+    Notes
+    -----
+    The components are labelled with ICLabel from ``mne-icalabel``. A component
+    is excluded if its label is neither ``"brain"`` nor ``"other"`` and if its
+    probability is above ``threshold``.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    check_type(ica, (ICA,), "ica")
+    check_type(threshold, ("numeric",), "threshold")
+    if not 0 <= threshold <= 1:
+        raise ValueError(
+            "Argument 'threshold' should be a probability between 0 and 1. "
+            f"{threshold} is invalid."
+        )
+    component_labels = label_components(raw, ica, method="iclabel")
+    labels = np.array(component_labels["labels"])
+    proba = component_labels["y_pred_proba"]
+    exclude = np.flatnonzero(~np.isin(labels, _ICLABEL_KEEP) & (threshold <= proba))
+    ica.exclude = sorted(set(ica.exclude) | set(exclude.tolist()))
+    logger.info("Excluding %i ICA components: %s", exclude.size, labels[exclude])
+    return {
+        label: tuple(np.flatnonzero(labels == label)) for label in np.unique(labels)
+    }
+
+
+@fill_doc
+def apply_ica(
+    raw: BaseRaw,
+    ica: ICA,
+    fname: Union[str, Path],
+    max_memory: Union[int, str] = "256M",
+    overwrite: bool = False,
+) -> Path:
+    """Apply the ICA block by block and write the cleaned recording to disk.
+
+    Each block is read, unmixed, cleaned from the components in
+    ``ica.exclude``, remixed and written to the output FIF file before the next
+    block is read, thus neither the recording nor its sources are held in
+    memory as a whole.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording, preloaded or not.
+    ica : ICA
+        Fitted ICA.
+    fname : path-like
+        Path to the output FIF file, which should end with ``-raw.fif``.
+    %(max_memory)s
+    overwrite : bool
+        If True, an existing file is overwritten.
+
+    Returns
+    -------
+    fname : Path
+        Path to the cleaned recording.
+
+    See Also
+    --------
+    eeg_cybersickness.preprocessing.process_blocks
+    """
+    check_type(ica, (ICA,), "ica")
+    logger.info("Excluding the ICA components %s.", ica.exclude)
+    return process_blocks(
+        raw, fname, ica=ica, max_memory=max_memory, overwrite=overwrite
+    )
+
+
+def _good_samples_mask(raw: BaseRaw) -> NDArray[bool]:
+    """Mask the samples outside the annotations whose description starts with bad."""
+    mask = np.ones(raw.n_times, dtype=bool)
+    for onset, end in zip(*_annotations_starts_stops(raw, ("bad",))):
+        mask[onset:end] = False
+    return mask
+
+
+def _get_samples(
+    raw: BaseRaw, picks: NDArray[int], samples: NDArray[int], chunk_duration: float
+) -> NDArray[float]:
+    """Read a subset of samples from the recording, chunk by chunk."""
+    n_chunk = max(int(chunk_duration * raw.info["sfreq"]), 1)
+    data = np.empty((picks.size, samples.size))
+    bounds = np.searchsorted(samples, np.arange(0, raw.n_times + n_chunk, n_chunk))
+    for k, (idx_start, idx_stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+        if idx_start == idx_stop:
+            continue
+        start = k * n_chunk
+        chunk = raw.get_data(picks, start=start, stop=samples[idx_stop - 1] + 1)
+        data[:, idx_start:idx_stop] = chunk[:, samples[idx_start:idx_stop] - start]
+    return data
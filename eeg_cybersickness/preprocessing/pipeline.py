@@ -0,0 +1,333 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+from mne.io import BaseRaw, read_raw_fif
+from mne.parallel import parallel_func
+from mne.preprocessing import read_ica
+
+from ..io import read_raw
+from ..utils._checks import check_type
+from ..utils._docs import fill_doc
+from ..utils.path import get_derivative_stem
+from .bad_channels import find_bad_channels
+from .bad_segments import annotate_bad_segments
+from .bridges import interpolate_bridges
+from .decimation import decimate_raw
+from .filter import filter_raw
+from .ica import apply_ica, fit_ica, label_ica
+from .reference import set_average_reference
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Dict, List, Optional, Tuple, Union
+
+
+@fill_doc
+def preprocess(
+    root: Union[str, Path],
+    participant: int,
+    session: int,
+    l_freq: float = 1.0,
+    h_freq: float = 40.0,
+    threshold: float = 5.0,
+    ic_threshold: float = 0.8,
+    max_samples: Optional[int] = None,
+    seed: Optional[int] = None,
+    cache: bool = True,
+    overwrite: bool = False,
+    max_memory: Union[int, str] = "256M",
+    decimate: bool = False,
+    n_jobs: Optional[int] = None,
+) -> Path:
+    """Preprocess a raw recording without user interaction.
+
+    The preprocessing runs the following steps:
+
+    - detection and interpolation of the gel-bridged electrodes.
+    - detection of the noisy and flat channels with
+      :func:`~eeg_cybersickness.preprocessing.find_bad_channels`, on the
+      unfiltered recording which retains the high-frequency noise.
+    - FIR bandpass filter of the EEG and ECG channels.
+    - detection of the deviating and uncorrelated channels on the band-passed
+      recording, without the slow drifts which inflate those criteria.
+    - optional decimation to an analysis sampling rate.
+    - annotation of the bad segments with
+      :func:`~eeg_cybersickness.preprocessing.annotate_bad_segments`.
+    - addition of the reference electrode CPz and common average reference.
+    - picard ICA and exclusion of the artifact components labelled by ICLabel,
+      applied block by block from the pre-ICA recording to disk.
+
+    The pre-ICA recording, the ICA decomposition and the preprocessed recording
+    are saved in the derivatives as ``PXX_SY-pre-ica-raw.fif``,
+    ``PXX_SY-ica.fif`` and ``PXX_SY-raw.fif``.
+
+    Parameters
+    ----------
+    %(root)s
+    %(participant)s
+    %(session)s
+    %(preprocessing)s
+    %(max_memory)s
+    %(decimate)s
+    n_jobs : int | None
+        Number of threads filtering the channels, c.f.
+        :func:`~eeg_cybersickness.preprocessing.filter_raw`. ``-1`` uses all
+        available cores. If None, a single thread is used.
+
+    Returns
+    -------
+    fname : Path
+        Path to the preprocessed recording.
+
+    See Also
+    --------
+    review_preprocessing
+    """
+    return _preprocess_recordings(
+        root,
+        participant,
+        (session,),
+        l_freq,
+        h_freq,
+        threshold,
+        ic_threshold,
+        max_samples,
+        seed,
+        cache,
+        overwrite,
+        max_memory,
+        decimate,
+        n_jobs,
+    )[0]
+
+
+@fill_doc
+def preprocess_participants(
+    root: Union[str, Path],
+    participants: List[int],
+    sessions: Tuple[int, ...] = (1, 2, 3, 4),
+    l_freq: float = 1.0,
+    h_freq: float = 40.0,
+    threshold: float = 5.0,
+    ic_threshold: float = 0.8,
+    max_samples: Optional[int] = None,
+    seed: Optional[int] = None,
+    cache: bool = True,
+    overwrite: bool = False,
+    max_memory: Union[int, str] = "256M",
+    decimate: bool = False,
+    ica_per_participant: bool = False,
+    n_jobs: Optional[int] = None,
+) -> List[Path]:
+    """Preprocess the raw recordings of several participants and sessions.
+
+    Parameters
+    ----------
+    %(root)s
+    participants : list of int
+        Participant IDs.
+    sessions : tuple of int
+        Session IDs.
+    %(preprocessing)s
+    %(max_memory)s
+    %(decimate)s
+    ica_per_participant : bool
+        If True, a single ICA is fitted on the pooled sessions of each
+        participant and the components labelled as artifacts in any session
+        are excluded from all sessions. If False, an ICA is fitted per session.
+    %(n_jobs)s
+
+    Returns
+    -------
+    fnames : list of Path
+        Path to the preprocessed recordings.
+
+    See Also
+    --------
+    preprocess
+    """
+    check_type(participants, (list, tuple), "participants")
+    check_type(sessions, (list, tuple), "sessions")
+    check_type(ica_per_participant, (bool,), "ica_per_participant")
+    if len(sessions) == 0:
+        raise ValueError("Argument 'sessions' should contain at least one session.")
+    if ica_per_participant:
+        groups = [(participant, tuple(sessions)) for participant in participants]
+    else:
+        groups = [
+            (participant, (session,))
+            for participant in participants
+            for session in sessions
+        ]
+    parallel, p_fun, _ = parallel_func(_preprocess_recordings, n_jobs)
+    outputs = parallel(
+        p_fun(
+            root,
+            participant,
+            group,
+            l_freq,
+            h_freq,
+            threshold,
+            ic_threshold,
+            max_samples,
+            seed,
+            cache,
+            overwrite,
+            max_memory,
+            decimate,
+            1,  # the recordings are already processed in parallel
+        )
+        for participant, group in groups
+    )
+    return [fname for output in outputs for fname in output]
+
+
+def _preprocess_recordings(
+    root: Union[str, Path],
+    participant: int,
+    sessions: Tuple[int, ...],
+    l_freq: float,
+    h_freq: float,
+    threshold: float,
+    ic_threshold: float,
+    max_samples: Optional[int],
+    seed: Optional[int],
+    cache: bool,
+    overwrite: bool,
+    max_memory: Union[int, str],
+    decimate: bool,
+    n_jobs: Optional[int],
+) -> List[Path]:
+    """Preprocess the sessions of a participant with a shared ICA."""
+    check_type(cache, (bool,), "cache")
+    check_type(overwrite, (bool,), "overwrite")
+    check_type(decimate, (bool,), "decimate")
+    fnames = [_get_fnames(root, participant, session) for session in sessions]
+    if not overwrite:
+        for fname in (fname for fnames_ in fnames for fname in fnames_.values()):
+            if fname.exists():
+                raise FileExistsError(
+                    f"The file {fname} already exists. Use 'overwrite=True' to "
+                    "replace it."
+                )
+    # a single session is preloaded at once, the others are read from disk
+    for session, fnames_ in zip(sessions, fnames):
+        raw = read_raw(root, participant, session)
+        raw = _clean_raw(raw, l_freq, h_freq, threshold, decimate, n_jobs)
+        raw.save(fnames_["pre-ica"], overwrite=overwrite)
+        del raw
+    raws = [read_raw_fif(fnames_["pre-ica"], preload=False) for fnames_ in fnames]
+    cache = fnames[0]["raw"].parent / "ica-cache" if cache else None
+    ica = fit_ica(raws, max_samples, seed, cache)
+    # the exclusions of every session are merged in ica.exclude
+    for raw in raws:
+        label_ica(raw, ica, ic_threshold)
+    # the ICA is applied block by block from the pre-ICA recordings
+    for raw, fnames_ in zip(raws, fnames):
+        ica.save(fnames_["ica"], overwrite=overwrite)
+        apply_ica(raw, ica, fnames_["raw"], max_memory, overwrite)
+    return [fnames_["raw"] for fnames_ in fnames]
+
+
+@fill_doc
+def review_preprocessing(
+    root: Union[str, Path], participant: int, session: int, refit: bool = False
+) -> Path:
+    """Review the bad segments and the excluded ICA components interactively.
+
+    The pre-ICA recording is plotted to edit the bad segments and the ICA
+    components are plotted to edit the excluded components. The derivatives
+    written by :func:`preprocess` are updated once the figures are closed.
+
+    Parameters
+    ----------
+    %(root)s
+    %(participant)s
+    %(session)s
+    refit : bool
+        If True, the ICA is fitted again on the reviewed bad segments before the
+        review of the components.
+
+    Returns
+    -------
+    fname : Path
+        Path to the preprocessed recording.
+    """
+    check_type(refit, (bool,), "refit")
+    fnames = _get_fnames(root, participant, session)
+    raw = read_raw_fif(fnames["pre-ica"], preload=True)
+    raw.plot(theme="light", block=True)
+    raw.save(fnames["pre-ica"], overwrite=True)
+    if refit:
+        ica = fit_ica(raw, cache=fnames["raw"].parent / "ica-cache")
+        label_ica(raw, ica)
+    else:
+        ica = read_ica(fnames["ica"])
+    ica.plot_components(inst=raw)
+    ica.plot_sources(inst=raw, theme="light", block=True)
+    ica.save(fnames["ica"], overwrite=True)
+    apply_ica(raw, ica, fnames["raw"], overwrite=True)
+    return fnames["raw"]
+
+
+def _clean_raw(
+    raw: BaseRaw,
+    l_freq: float,
+    h_freq: float,
+    threshold: float,
+    decimate: bool,
+    n_jobs: Optional[int] = None,
+) -> BaseRaw:
+    """Run the preprocessing steps preceding the ICA.
+
+    Parameters
+    ----------
+    raw : Raw
+        Preloaded continuous recording.
+    l_freq : float
+        Lower pass-band edge of the filter in Hz.
+    h_freq : float
+        Upper pass-band edge of the filter in Hz.
+    threshold : float
+        Threshold on the robust z-score of the peak-to-peak amplitude used to
+        annotate the bad segments.
+    decimate : bool
+        If True, the recording is decimated after the filter.
+    n_jobs : int | None
+        Number of threads filtering the channels.
+
+    Returns
+    -------
+    raw : Raw
+        The preprocessed recording, modified in-place or decimated.
+    """
+    interpolate_bridges(raw)
+    # the noise ratio requires the frequencies removed by the low-pass filter
+    find_bad_channels(raw, criteria=("noise", "flat"))
+    filter_raw(raw, l_freq, h_freq, picks=["eeg", "ecg"], n_jobs=n_jobs)
+    # the slow drifts inflate the amplitude and decorrelate the channels
+    find_bad_channels(raw, criteria=("deviation", "correlation"))
+    if decimate:
+        if "misc" in raw.get_channel_types():
+            # the EGG is only low-pass filtered, to avoid aliasing
+            filter_raw(raw, None, h_freq, picks="misc", n_jobs=n_jobs)
+        raw = decimate_raw(raw)
+    raw.set_annotations(
+        raw.annotations + annotate_bad_segments(raw, threshold=threshold)
+    )
+    set_average_reference(raw, "CPz")
+    raw.set_montage("standard_1020")
+    return raw
+
+
+def _get_fnames(
+    root: Union[str, Path], participant: int, session: int
+) -> Dict[str, Path]:
+    """Get the file names of the preprocessing derivatives."""
+    stem = get_derivative_stem(root, participant, session)
+    return {
+        "pre-ica": stem.with_name(f"{stem.name}-pre-ica-raw.fif"),
+        "ica": stem.with_name(f"{stem.name}-ica.fif"),
+        "raw": stem.with_name(f"{stem.name}-raw.fif"),
+    }
@@ -0,0 +1,105 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from mne import add_reference_channels
+from mne.io import BaseRaw
+from mne.io.constants import FIFF
+from mne.io.pick import _picks_to_idx
+from mne.utils import use_log_level
+
+from ..utils._checks import check_type
+from ..utils.logs import logger
+
+if TYPE_CHECKING:
+    from typing import Optional
+
+
+def set_average_reference(
+    raw: BaseRaw,
+    ref_channel: Optional[str] = "CPz",
+    projection: bool = False,
+    chunk_duration: float = 10.0,
+) -> BaseRaw:
+    """Add the reference electrode and re-reference to the average in-place.
+
+    This function is equivalent to ``raw.add_reference_channels(ref_channel)``
+    followed by ``raw.set_eeg_reference("average")`` without their full-size
+    copies of the data array. The array is resized in-place to append the flat
+    reference channel, or copied once in a preallocated buffer if it can not
+    be resized, and the average is subtracted one chunk of samples at a time.
+
+    Parameters
+    ----------
+    raw : Raw
+        Preloaded continuous recording, modified in-place.
+    ref_channel : str | None
+        Name of the reference electrode of the recording, added as a flat EEG
+        channel. If None, no channel is added.
+    projection : bool
+        If True, the average reference is added as a projector instead of being
+        applied to the data, thus the computation is deferred until the
+        projector is applied, e.g. when the data is read with ``proj=True`` or
+        when epochs are created.
+    chunk_duration : float
+        Duration of the chunks of samples re-referenced together in seconds.
+
+    Returns
+    -------
+    raw : Raw
+        The re-referenced recording, modified in-place.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    check_type(ref_channel, (str, None), "ref_channel")
+    check_type(projection, (bool,), "projection")
+    check_type(chunk_duration, ("numeric",), "chunk_duration")
+    if chunk_duration <= 0:
+        raise ValueError(
+            "Argument 'chunk_duration' should be a strictly positive number. "
+            f"{chunk_duration} is invalid."
+        )
+    if not raw.preload:
+        raise RuntimeError("The raw recording should be preloaded.")
+    if ref_channel is not None:
+        _add_reference_channel(raw, ref_channel)
+    if projection:
+        raw.set_eeg_reference("average", projection=True)
+        return raw
+
+    picks = _picks_to_idx(raw.info, "eeg", exclude="bads")
+    n_chunk = max(int(np.round(chunk_duration * raw.info["sfreq"])), 1)
+    data = raw._data
+    for start in range(0, data.shape[1], n_chunk):
+        sl = slice(start, start + n_chunk)
+        chunk = data[picks, sl]
+        chunk -= chunk.mean(axis=0)
+        data[picks, sl] = chunk
+    with raw.info._unlock():
+        raw.info["custom_ref_applied"] = FIFF.FIFFV_MNE_CUSTOM_REF_ON
+    logger.info("Average reference applied on %i EEG channels.", picks.size)
+    return raw
+
+
+def _add_reference_channel(raw: BaseRaw, ref_channel: str) -> None:
+    """Append a flat reference channel to the preloaded data in-place."""
+    data = raw._data
+    # MNE updates the measurement information on an empty array, to avoid the
+    # copy of the data array
+    raw._data = data[:, :0]
+    try:
+        with use_log_level("WARNING"):
+            add_reference_channels(raw, ref_channel, copy=False)
+    finally:
+        raw._data = data
+    del raw._data
+    try:
+        # the appended row is filled with zeros
+        data.resize((data.shape[0] + 1, data.shape[1]), refcheck=True)
+    except ValueError:
+        # the array does not own its data or is referenced elsewhere
+        buffer = np.empty((data.shape[0] + 1, data.shape[1]), dtype=data.dtype)
+        buffer[:-1] = data
+        buffer[-1] = 0.0
+        data = buffer
+    raw._data = data
@@ -0,0 +1,58 @@
+"""Test bad_channels.py"""
+
+import numpy as np
+import pytest
+from mne import create_info
+from mne.channels import make_standard_montage
+from mne.io import RawArray
+
+from ..bad_channels import find_bad_channels
+
+
+def test_find_bad_channels():
+    """Test the detection of the bad channels on spatially smooth data."""
+    rng = np.random.default_rng(101)
+    ch_names = [
+        "Fp1", "Fp2", "F7", "F3", "Fz", "F4", "F8", "FC5", "FC1", "FC2", "FC6",
+        "T7", "C3", "Cz", "C4", "T8", "CP5", "CP1", "CP2", "CP6", "P7", "P3",
+        "Pz", "P4", "P8", "O1", "Oz", "O2",
+    ]  # fmt: skip
+    ch_pos = make_standard_montage("standard_1020").get_positions()["ch_pos"]
+    pos = np.array([ch_pos[ch] for ch in ch_names])
+    # sources located on the scalp with a smooth spatial gain
+    sources = pos[rng.choice(len(ch_names), 8, replace=False)]
+    gain = np.exp(-np.sum((pos[:, None] - sources[None]) ** 2, axis=-1) / 0.08**2)
+    sfreq, n_times = 250.0, 120 * 250
+    data = gain @ rng.standard_normal((8, n_times)) * 1e-5
+    data += rng.standard_normal(data.shape) * 1e-6
+    data[3] *= 20  # deviation
+    data[12] = rng.standard_normal(n_times) * data[12].std()  # correlation
+    data[22] += np.sin(2 * np.pi * 100 * np.arange(n_times) / sfreq) * 2e-6  # noise
+    data[26, 10000:12000] = 0  # flat for 8 seconds
+    info = create_info(ch_names + ["ECG"], sfreq, ["eeg"] * len(ch_names) + ["ecg"])
+    raw = RawArray(np.vstack((data, data[:1])), info)
+    raw.info["bads"] = ["Fp1"]
+    report, scores = find_bad_channels(raw, batch_size=13)
+    assert report == dict(
+        deviation=["F3"], correlation=["C3"], noise=["Pz"], flat=["Oz"]
+    )
+    assert raw.info["bads"] == ["Fp1", "F3", "C3", "Pz", "Oz"]
+    assert scores.shape == (len(ch_names) - 1, 4)
+    assert np.isclose(scores.loc["Oz", "flat"], 8 / 120)
+
+    # subset of the criteria
+    raw.info["bads"] = ["Fp1"]
+    report, scores = find_bad_channels(raw, criteria=("noise", "flat"))
+    assert report == dict(noise=["Pz"], flat=["Oz"])
+    assert list(scores.columns) == ["noise", "flat"]
+    assert raw.info["bads"] == ["Fp1", "Pz", "Oz"]
+    with pytest.raises(ValueError, match="Invalid value"):
+        find_bad_channels(raw, criteria=("amplitude",))
+    raw.info["bads"] = ["Fp1", "F3", "C3", "Pz", "Oz"]
+
+    # with a montage and a larger window, without the bad channels
+    raw.set_montage("standard_1020")
+    report, _ = find_bad_channels(raw, duration=2.0)
+    assert all(len(chs) == 0 for chs in report.values())
+    with pytest.raises(ValueError, match="position of the channels"):
+        find_bad_channels(raw.copy().rename_channels({"Fz": "X"}).set_montage(None))
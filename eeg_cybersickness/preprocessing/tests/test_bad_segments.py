@@ -0,0 +1,34 @@
+"""Test bad_segments.py"""
+
+import numpy as np
+import pytest
+from mne import create_info
+from mne.io import RawArray
+
+from ..bad_segments import annotate_bad_segments
+
+
+def test_annotate_bad_segments():
+    """Test the annotation of segments with large artifacts."""
+    rng = np.random.default_rng(101)
+    sfreq = 250.0
+    data = rng.standard_normal((4, 60 * 250)) * 1e-6
+    data[1, 2500:3000] *= 50  # 2 seconds from 10 s
+    data[3, 10130:10140] += 1e-4  # spike at 40.5 s
+    data[2] *= 100  # noisy channel, relative to itself
+    info = create_info(["Fz", "Cz", "Pz", "Oz"], sfreq, "eeg")
+    raw = RawArray(data, info)
+    raw.set_meas_date(0)
+    raw.crop(1.0, None)  # first_samp != 0
+    annotations = annotate_bad_segments(raw, batch_size=7)
+    assert list(annotations.description) == ["BAD_segment"] * 2
+    raw.set_annotations(annotations)
+    assert np.allclose(raw.annotations.onset - raw.first_time, [9.0, 39.0])
+    assert np.allclose(raw.annotations.duration, [2.0, 1.0])
+
+    annotations = annotate_bad_segments(raw, duration=0.5)
+    raw.set_annotations(annotations)
+    assert np.allclose(raw.annotations.onset - raw.first_time, [9.0, 39.5])
+    assert np.allclose(raw.annotations.duration, [2.0, 0.5])
+    with pytest.raises(ValueError, match="'threshold' should be"):
+        annotate_bad_segments(raw, threshold=0)
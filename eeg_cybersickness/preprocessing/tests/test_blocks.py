@@ -0,0 +1,159 @@
+"""Test blocks.py"""
+
+import tracemalloc
+
+import numpy as np
+import pytest
+from mne import create_info
+from mne.io import RawArray, read_raw_fif
+from mne.preprocessing import ICA
+
+from ..blocks import process_blocks
+from ..reference import set_average_reference
+
+
+@pytest.fixture(scope="module")
+def fname(tmp_path_factory):
+    """Save a recording with EEG, ECG and misc channels."""
+    rng = np.random.default_rng(101)
+    ch_names = ["Fz", "Cz", "Pz", "Oz", "C3", "C4", "ECG", "EGG"]
+    info = create_info(ch_names, 250.0, ["eeg"] * 6 + ["ecg", "misc"])
+    raw = RawArray(rng.laplace(size=(8, 60 * 250)) * 1e-5, info)
+    raw.info["bads"] = ["Oz"]
+    fname = tmp_path_factory.mktemp("blocks") / "data-raw.fif"
+    raw.save(fname)
+    return fname
+
+
+def test_process_blocks(fname, tmp_path):
+    """Test the block processing against the in-memory processing."""
+    raw = read_raw_fif(fname, preload=True)
+    raw.filter(
+        1.0,
+        40.0,
+        method="fir",
+        phase="zero-double",
+        fir_window="hamming",
+        fir_design="firwin",
+        pad="edge",
+    )
+    raw.set_eeg_reference("average")
+    ica = ICA(n_components=4, method="picard", max_iter=500, random_state=101)
+    ica.fit(raw)
+    ica.exclude = [1]
+    # a budget of 3 MiB requires several blocks
+    out = process_blocks(
+        read_raw_fif(fname, preload=False),
+        tmp_path / "out-raw.fif",
+        1.0,
+        40.0,
+        reference=True,
+        ica=ica,
+        max_memory="3M",
+    )
+    ica.apply(raw)
+    raw_out = read_raw_fif(out, preload=True)
+    assert raw_out.info["highpass"] == 1.0 and raw_out.info["lowpass"] == 40.0
+    assert raw_out.info["custom_ref_applied"]
+    assert raw_out.info["bads"] == ["Oz"]
+    # the data is written in single precision
+    assert np.allclose(raw_out.get_data(), raw.get_data(), rtol=1e-6, atol=1e-11)
+
+    # without processing, the recording is copied
+    raw = read_raw_fif(fname, preload=False)
+    out = process_blocks(raw, tmp_path / "copy-raw.fif", max_memory="64K")
+    assert np.allclose(read_raw_fif(out).get_data(), raw.get_data(), atol=1e-11)
+
+    with pytest.raises(FileExistsError, match="already exists"):
+        process_blocks(raw, out)
+    with pytest.raises(ValueError, match="'max_memory' is too small"):
+        process_blocks(raw, out, 1.0, 40.0, max_memory="64K", overwrite=True)
+    ica.ch_names = ica.ch_names + ["Fp1"]
+    with pytest.raises(ValueError, match="missing from the recording"):
+        process_blocks(raw, out, ica=ica, overwrite=True)
+
+
+@pytest.mark.parametrize("max_memory", ("3M", "256M"))
+def test_process_blocks_cropped(fname, tmp_path, max_memory):
+    """Test the block processing of a recording with a first sample."""
+    kwargs = dict(
+        method="fir",
+        phase="zero-double",
+        fir_window="hamming",
+        fir_design="firwin",
+        pad="edge",
+    )
+    raw = read_raw_fif(fname, preload=False).crop(1.0, None)
+    assert raw.first_samp == 250
+    out = process_blocks(
+        raw,
+        tmp_path / "out-raw.fif",
+        1.0,
+        40.0,
+        reference=True,
+        max_memory=max_memory,
+    )
+    raw_out = read_raw_fif(out, preload=True)
+    assert raw_out.first_samp == 250
+    raw.load_data().filter(1.0, 40.0, **kwargs).set_eeg_reference("average")
+    assert np.allclose(raw_out.get_data(), raw.get_data(), rtol=1e-6, atol=1e-11)
+
+
+def test_process_blocks_ref_channel(fname, tmp_path):
+    """Test the addition of the reference channel against the pipeline."""
+    raw = read_raw_fif(fname, preload=True)
+    raw.filter(
+        1.0,
+        40.0,
+        picks=["eeg", "ecg"],
+        method="fir",
+        phase="zero-double",
+        fir_window="hamming",
+        fir_design="firwin",
+        pad="edge",
+    )
+    set_average_reference(raw, "CPz")
+    ica = ICA(n_components=4, method="picard", max_iter=500, random_state=101)
+    ica.fit(raw)
+    ica.exclude = [1]
+    out = process_blocks(
+        read_raw_fif(fname, preload=False),
+        tmp_path / "out-raw.fif",
+        1.0,
+        40.0,
+        picks=["eeg", "ecg"],
+        reference=True,
+        ref_channel="CPz",
+        ica=ica,
+        max_memory="3M",
+    )
+    ica.apply(raw)
+    raw_out = read_raw_fif(out, preload=True)
+    assert raw_out.ch_names == raw.ch_names and raw_out.ch_names[-1] == "CPz"
+    assert raw_out.get_channel_types(picks="CPz") == ["eeg"]
+    assert raw_out.info["custom_ref_applied"]
+    assert np.allclose(raw_out.get_data(), raw.get_data(), rtol=1e-6, atol=1e-11)
+
+    with pytest.raises(ValueError, match="already"):
+        process_blocks(read_raw_fif(out), tmp_path / "out2-raw.fif", ref_channel="CPz")
+
+
+def test_process_blocks_memory(tmp_path):
+    """Test that the memory budget is respected."""
+    rng = np.random.default_rng(101)
+    raw = RawArray(
+        rng.standard_normal((20, 400 * 250)) * 1e-5, create_info(20, 250.0, "eeg")
+    )
+    raw.save(tmp_path / "data-raw.fif")
+    n_bytes = raw._data.nbytes
+    del raw
+    raw = read_raw_fif(tmp_path / "data-raw.fif", preload=False)
+    tracemalloc.start()
+    try:
+        process_blocks(
+            raw, tmp_path / "out-raw.fif", 1.0, 40.0, reference=True, max_memory="8M"
+        )
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < 8 * 2**20 < n_bytes
@@ -0,0 +1,50 @@
+"""Test bridges.py"""
+
+import numpy as np
+import pytest
+from mne import Annotations, create_info
+from mne.io import RawArray
+from mne.preprocessing import compute_bridged_electrodes as compute_bridged_mne
+
+from ..bridges import compute_bridged_electrodes, interpolate_bridges
+
+
+@pytest.fixture(scope="module")
+def raw():
+    """Create a recording with 2 pairs of bridged electrodes."""
+    rng = np.random.default_rng(101)
+    ch_names = ["Fz", "FCz", "Cz", "Pz", "Oz", "C3", "C4", "P3", "P4", "F3", "F4"]
+    data = rng.standard_normal((len(ch_names), 120 * 250)) * 1e-5
+    data[2] = data[1] + rng.standard_normal(data.shape[1]) * 1e-7
+    data[8] = data[7] + rng.standard_normal(data.shape[1]) * 2e-7
+    info = create_info(ch_names + ["ECG"], 250.0, ["eeg"] * len(ch_names) + ["ecg"])
+    raw = RawArray(np.vstack((data, data[:1])), info)
+    raw.info["bads"] = ["F4"]
+    raw.set_annotations(Annotations([30.5], [3.0], ["bad_test"]))
+    return raw
+
+
+def test_compute_bridged_electrodes(raw):
+    """Test the detection of bridges against MNE."""
+    bridged_idx, ed_matrix = compute_bridged_electrodes(raw, batch_size=7)
+    bridged_idx_mne, ed_matrix_mne = compute_bridged_mne(raw)
+    assert bridged_idx == bridged_idx_mne == [(1, 2), (7, 8)]
+    assert ed_matrix.shape == ed_matrix_mne.shape == (58, 10, 10)
+    assert np.array_equal(np.isnan(ed_matrix), np.isnan(ed_matrix_mne))
+    assert np.allclose(ed_matrix, ed_matrix_mne, equal_nan=True)
+
+    # without bridges
+    raw2 = raw.copy().drop_channels(["Cz", "P4"])
+    bridged_idx, ed_matrix = compute_bridged_electrodes(raw2)
+    bridged_idx_mne, ed_matrix_mne = compute_bridged_mne(raw2)
+    assert bridged_idx == bridged_idx_mne == []
+    assert np.allclose(ed_matrix, ed_matrix_mne, equal_nan=True)
+
+
+def test_interpolate_bridges(raw):
+    """Test the interpolation of the bridged electrodes."""
+    raw = raw.copy()
+    bridges = interpolate_bridges(raw)
+    assert bridges == [("FCz", "Cz"), ("P3", "P4")]
+    assert raw.get_montage() is None
+    assert not np.allclose(raw.get_data("FCz"), raw.get_data("Cz"))
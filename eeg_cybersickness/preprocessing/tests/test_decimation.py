@@ -0,0 +1,50 @@
+"""Test decimation.py"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+from mne import Annotations, create_info, find_events
+from mne.annotations import _annotations_starts_stops
+from mne.io import RawArray
+
+from ..decimation import decimate_raw
+
+
+@pytest.mark.parametrize("meas_date", (None, datetime(2022, 1, 1, tzinfo=timezone.utc)))
+def test_decimate_raw(meas_date):
+    """Test the decimation of a recording with events and annotations."""
+    rng = np.random.default_rng(101)
+    info = create_info(["Fz", "Cz", "STI"], 1000.0, ["eeg", "eeg", "stim"])
+    with info._unlock():
+        info["lowpass"] = 40.0
+    data = rng.standard_normal((3, 60000))
+    data[2] = 0
+    data[2, [1003, 5007, 20001]] = [1, 2, 3]
+    raw = RawArray(data, info, first_samp=1234)
+    raw.set_meas_date(meas_date)
+    raw.set_annotations(Annotations([10.0], [2.0], ["bad"], orig_time=meas_date))
+
+    # 125 Hz is the lowest rate above 3 * 40 Hz
+    raw_decim = decimate_raw(raw, chunk_duration=7.0)
+    assert raw_decim.info["sfreq"] == 125.0
+    # the kept samples are the multiples of 8 since the start of the acquisition
+    offset = -1234 % 8
+    assert raw_decim.first_samp * 8 == 1234 + offset
+    assert np.allclose(raw_decim.get_data()[:2], data[:2, offset::8])
+    # single-sample events are moved to the nearest kept sample
+    events = find_events(raw_decim, shortest_event=1)
+    assert np.array_equal(events[:, 0], [280, 780, 2654])
+    assert np.array_equal(events[:, 2], [1, 2, 3])
+    # the annotations remain at their original time
+    starts, stops = _annotations_starts_stops(raw, "bad")
+    starts_decim, stops_decim = _annotations_starts_stops(raw_decim, "bad")
+    assert np.allclose(starts / 1000.0, starts_decim / 125.0, atol=8e-3)
+    assert np.allclose(stops / 1000.0, stops_decim / 125.0, atol=8e-3)
+
+    raw_decim = decimate_raw(raw, decim=2)
+    assert raw_decim.info["sfreq"] == 500.0
+    with pytest.raises(ValueError, match="strictly positive integer"):
+        decimate_raw(raw, decim=0)
+    with pytest.raises(TypeError, match="must be an integer"):
+        decimate_raw(raw, decim=2.5)
@@ -0,0 +1,61 @@
+"""Test filter.py"""
+
+import numpy as np
+import pytest
+from mne import Annotations, create_info
+from mne.io import RawArray
+
+from ..filter import _design_filter, filter_raw
+
+
+@pytest.fixture
+def raw():
+    """Create a recording with EEG, ECG and EGG channels."""
+    rng = np.random.default_rng(101)
+    ch_names = ["Fz", "Cz", "Pz", "Oz", "C3", "C4", "ECG", "EGG"]
+    info = create_info(ch_names, 250.0, ["eeg"] * 6 + ["ecg", "misc"])
+    return RawArray(rng.standard_normal((8, 60 * 250)) * 1e-5, info)
+
+
+@pytest.mark.parametrize("n_jobs", (None, 2))
+@pytest.mark.parametrize("l_freq, h_freq", ((1.0, 40.0), (None, 40.0), (1.0, None)))
+def test_filter_raw(raw, l_freq, h_freq, n_jobs):
+    """Test the parallel filter against MNE."""
+    kwargs = dict(
+        phase="zero-double", fir_window="hamming", fir_design="firwin", pad="edge"
+    )
+    raw_mne = raw.copy().filter(l_freq, h_freq, picks=["eeg", "ecg"], **kwargs)
+    filter_raw(raw, l_freq, h_freq, picks=["eeg", "ecg"], n_jobs=n_jobs)
+    assert np.allclose(raw.get_data(), raw_mne.get_data(), rtol=0, atol=1e-18)
+    assert raw.info["highpass"] == raw_mne.info["highpass"]
+    assert raw.info["lowpass"] == raw_mne.info["lowpass"]
+
+
+def test_filter_raw_segments(raw):
+    """Test the filter of segments shorter than the filter."""
+    kwargs = dict(
+        phase="zero-double", fir_window="hamming", fir_design="firwin", pad="edge"
+    )
+    raw.set_annotations(Annotations([0.5, 30.0], [0.0, 0.0], ["edge", "edge"]))
+    # the first segment is shorter than the filter
+    raw_mne = raw.copy().filter(1.0, 40.0, verbose="error", **kwargs)
+    filter_raw(raw, 1.0, 40.0, n_jobs=-1)
+    assert np.allclose(raw.get_data(), raw_mne.get_data(), rtol=0, atol=1e-18)
+
+
+def test_filter_raw_invalid(raw):
+    """Test the validation of the arguments."""
+    with pytest.raises(ValueError, match="At least one"):
+        filter_raw(raw, None, None)
+    with pytest.raises(TypeError, match="must be an instance of"):
+        filter_raw(raw, 1.0, 40.0, n_jobs=1.5)
+
+
+def test_design_filter():
+    """Test that the design is cached and read-only."""
+    kernel = _design_filter(250.0, 1.0, 40.0)
+    assert _design_filter(250.0, 1.0, 40.0) is kernel
+    assert kernel.size % 2 == 1
+    assert np.allclose(kernel, kernel[::-1])
+    with pytest.raises(ValueError, match="read-only"):
+        kernel[0] = 0
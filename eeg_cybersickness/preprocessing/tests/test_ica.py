@@ -0,0 +1,107 @@
+"""Test ica.py"""
+
+import numpy as np
+import pytest
+from mne import Annotations, create_info
+from mne.io import RawArray, read_raw_fif
+
+from ..ica import apply_ica, fit_ica, label_ica
+
+
+@pytest.fixture(scope="module")
+def raw():
+    """Create a recording mixing independent sources."""
+    rng = np.random.default_rng(101)
+    ch_names = ["Fz", "FCz", "Cz", "Pz", "Oz", "C3", "C4", "P3", "P4", "F3", "F4"]
+    sources = rng.laplace(size=(len(ch_names), 60 * 250))
+    data = rng.standard_normal((len(ch_names), len(ch_names))) @ sources * 1e-6
+    info = create_info(ch_names, 250.0, "eeg")
+    raw = RawArray(data - data.mean(axis=0), info)
+    raw.filter(1.0, None)
+    raw.set_montage("standard_1020")
+    return raw
+
+
+def test_fit_ica(raw, tmp_path):
+    """Test the ICA fit on rank deficient average referenced data."""
+    ica = fit_ica(raw, seed=101)
+    assert ica.n_components_ == len(raw.ch_names) - 1
+    assert ica.n_samples_ == raw.n_times // 4  # budget of 40 * 11**2 samples
+    ica2 = fit_ica(raw, seed=101)
+    assert np.allclose(ica.unmixing_matrix_, ica2.unmixing_matrix_)
+
+    # decimated subset of the clean samples
+    raw2 = raw.copy().set_annotations(Annotations([10.0], [20.0], ["bad_test"]))
+    ica = fit_ica(raw2, max_samples=2000, seed=101, chunk_duration=7.0)
+    assert ica.n_samples_ == 2000
+    with pytest.raises(RuntimeError, match="No clean sample"):
+        fit_ica(raw.copy().set_annotations(Annotations([0], [60], ["bad"])))
+
+    # pooled recordings with different bad channels
+    raw3 = raw.copy()
+    raw3.info["bads"] = ["Oz"]
+    ica = fit_ica([raw2, raw3], max_samples=3000, seed=101)
+    assert ica.n_samples_ == int(np.ceil(25000 / 9))  # decimation by 9
+    assert "Oz" not in ica.ch_names
+    assert len(ica.ch_names) == len(raw.ch_names) - 1
+
+    # cache
+    ica = fit_ica(raw2, max_samples=2000, seed=101, cache=tmp_path / "cache")
+    fnames = list((tmp_path / "cache").glob("*-ica.fif"))
+    assert len(fnames) == 1
+    mtime = fnames[0].stat().st_mtime_ns
+    ica2 = fit_ica(raw2, max_samples=2000, seed=101, cache=tmp_path / "cache")
+    assert fnames[0].stat().st_mtime_ns == mtime
+    assert np.allclose(ica.unmixing_matrix_, ica2.unmixing_matrix_)
+    fit_ica(raw2, max_samples=2000, seed=102, cache=tmp_path / "cache")
+    assert len(list((tmp_path / "cache").glob("*-ica.fif"))) == 2
+
+
+def test_apply_ica(raw, tmp_path):
+    """Test the application of the ICA block by block to disk."""
+    ica = fit_ica(raw, seed=101)
+    ica.exclude = [0, 3]
+    raw.save(tmp_path / "data-raw.fif")
+    fname = apply_ica(
+        read_raw_fif(tmp_path / "data-raw.fif"),
+        ica,
+        tmp_path / "clean-raw.fif",
+        max_memory="256K",
+    )
+    raw_clean = read_raw_fif(fname)
+    assert raw_clean.annotations == raw.annotations
+    data = ica.apply(read_raw_fif(tmp_path / "data-raw.fif", preload=True)).get_data()
+    assert np.allclose(raw_clean.get_data(), data, rtol=1e-6, atol=1e-12)
+    with pytest.raises(FileExistsError, match="already exists"):
+        apply_ica(raw, ica, fname)
+
+
+@pytest.mark.parametrize("max_memory", ("256K", "256M"))
+def test_apply_ica_cropped(raw, tmp_path, max_memory):
+    """Test the application of the ICA to a recording with a first sample."""
+    ica = fit_ica(raw, seed=101)
+    ica.exclude = [0, 3]
+    raw.copy().crop(1.0, None).save(tmp_path / "data-raw.fif")
+    raw_cropped = read_raw_fif(tmp_path / "data-raw.fif")
+    assert raw_cropped.first_samp == 250
+    fname = apply_ica(raw_cropped, ica, tmp_path / "clean-raw.fif", max_memory)
+    raw_clean = read_raw_fif(fname)
+    assert raw_clean.first_samp == 250
+    data = ica.apply(read_raw_fif(tmp_path / "data-raw.fif", preload=True)).get_data()
+    assert np.allclose(raw_clean.get_data(), data, rtol=1e-6, atol=1e-12)
+
+
+def test_label_ica(raw):
+    """Test the exclusion of the components labelled by ICLabel."""
+    ica = fit_ica(raw, seed=101)
+    labels = label_ica(raw, ica, threshold=0.0)
+    assert sum(len(idx) for idx in labels.values()) == ica.n_components_
+    excluded = [
+        k
+        for label, idx in labels.items()
+        if label not in ("brain", "other")
+        for k in idx
+    ]
+    assert sorted(ica.exclude) == sorted(excluded)
+    with pytest.raises(ValueError, match="probability between 0 and 1"):
+        label_ica(raw, ica, threshold=2)
@@ -0,0 +1,138 @@
+"""Test pipeline.py"""
+
+import numpy as np
+import pytest
+from mne import create_info, find_events
+from mne.channels import make_standard_montage
+from mne.io import RawArray, read_raw_fif
+from mne.preprocessing import read_ica
+
+from .. import pipeline
+from ..pipeline import _clean_raw, preprocess, preprocess_participants
+
+
+@pytest.fixture
+def raw():
+    """Create a recording with a bridge, a bad channel and an artifact."""
+    rng = np.random.default_rng(101)
+    ch_names = ["Fz", "FCz", "Cz", "Pz", "Oz", "C3", "C4", "P3", "P4", "F3", "F4"]
+    ch_pos = make_standard_montage("standard_1020").get_positions()["ch_pos"]
+    pos = np.array([ch_pos[ch] for ch in ch_names])
+    gain = np.exp(-np.sum((pos[:, None] - pos[None]) ** 2, axis=-1) / 0.08**2)
+    data = gain @ rng.standard_normal((gain.shape[1], 60 * 250)) * 1e-5
+    data += rng.standard_normal(data.shape) * 1e-6
+    data[2] = data[1] + rng.standard_normal(data.shape[1]) * 1e-7  # bridge
+    data[8] *= 20  # bad channel
+    data[4, 5000:5020] += 1e-3  # artifact at 20 s
+    info = create_info(ch_names + ["ECG"], 250.0, ["eeg"] * len(ch_names) + ["ecg"])
+    return RawArray(np.vstack((data, data[:1])), info)
+
+
+def test_clean_raw(raw):
+    """Test the preprocessing steps preceding the ICA."""
+    # slow drift removed by the filter, which should not mark the channel as bad
+    raw._data[5] += 1e-4 * np.sin(2 * np.pi * 0.05 * raw.times)
+    raw = _clean_raw(raw, 1.0, 40.0, 5.0, False)
+    assert raw.ch_names[-1] == "CPz"
+    assert raw.info["bads"] == ["P4"]
+    assert raw.info["custom_ref_applied"]
+    assert raw.info["highpass"] == 1.0 and raw.info["lowpass"] == 40.0
+    assert raw.get_montage() is not None
+    eeg = raw.get_data(picks="eeg")
+    # the bad channel is excluded from the average reference
+    assert np.allclose(np.delete(eeg, 8, axis=0).mean(axis=0), 0)
+    # the bridged electrodes are interpolated with the virtual midpoint channel
+    assert not np.allclose(eeg[1], eeg[2])
+    assert list(raw.annotations.description) == ["BAD_segment"]
+    # the filter spreads the artifact in time
+    onset, duration = raw.annotations.onset[0], raw.annotations.duration[0]
+    assert 18 <= onset <= 20 and 20.1 <= onset + duration <= 22
+
+
+def test_clean_raw_decimate(raw):
+    """Test the decimation to the analysis sampling rate."""
+    sti = np.zeros((2, raw.n_times))
+    sti[0] = np.random.default_rng(101).standard_normal(raw.n_times) * 1e-3
+    sti[1, [251, 2501, 7503]] = [1, 2, 3]
+    info = create_info(["EGG", "STI"], raw.info["sfreq"], ["misc", "stim"])
+    raw.add_channels([RawArray(sti, info)])
+    raw = _clean_raw(raw, 1.0, 40.0, 5.0, True)
+    assert raw.info["sfreq"] == 125.0
+    assert raw.n_times == 60 * 125
+    assert raw.info["bads"] == ["P4"]
+    assert list(raw.annotations.description) == ["BAD_segment"]
+    onset, duration = raw.annotations.onset[0], raw.annotations.duration[0]
+    assert 18 <= onset <= 20 and 20.1 <= onset + duration <= 22
+    events = find_events(raw, stim_channel="STI", shortest_event=1)
+    assert np.array_equal(events[:, 0], [126, 1251, 3752])
+    assert np.array_equal(events[:, 2], [1, 2, 3])
+
+
+@pytest.fixture
+def root(raw, tmp_path, monkeypatch):
+    """Replace the reader of the raw recordings with cropped copies of raw."""
+
+    def read_raw(root, participant, session):
+        # as read_raw, the recording does not start at the first sample, and the
+        # recordings differ between sessions
+        return raw.copy().crop(session, None)
+
+    monkeypatch.setattr(pipeline, "read_raw", read_raw)
+    return tmp_path
+
+
+def test_preprocess(root):
+    """Test the headless preprocessing of a recording."""
+    fname = preprocess(root, 1, 2, seed=101, cache=False)
+    folder = root / "derivatives" / "P01"
+    assert fname == folder / "P01_S2-raw.fif"
+    assert sorted(elt.name for elt in folder.iterdir()) == [
+        "P01_S2-ica.fif",
+        "P01_S2-pre-ica-raw.fif",
+        "P01_S2-raw.fif",
+    ]
+    raw_pre = read_raw_fif(folder / "P01_S2-pre-ica-raw.fif", preload=True)
+    raw_clean = read_raw_fif(fname, preload=True)
+    assert raw_clean.first_samp == raw_pre.first_samp == 500
+    assert raw_clean.ch_names == raw_pre.ch_names
+    assert raw_clean.ch_names[-1] == "CPz"
+    assert raw_clean.info["bads"] == ["P4"]
+    ica = read_ica(folder / "P01_S2-ica.fif")
+    assert np.allclose(
+        raw_clean.get_data(), ica.apply(raw_pre).get_data(), rtol=1e-5, atol=1e-11
+    )
+    with pytest.raises(FileExistsError, match="already exists"):
+        preprocess(root, 1, 2)
+    preprocess(root, 1, 2, seed=101, cache=False, overwrite=True)
+
+
+@pytest.mark.parametrize("ica_per_participant", (False, True))
+def test_preprocess_participants(root, ica_per_participant):
+    """Test the preprocessing of several participants and sessions."""
+    with pytest.raises(ValueError, match="at least one session"):
+        preprocess_participants(root, [2], (), ica_per_participant=ica_per_participant)
+    fnames = preprocess_participants(
+        root,
+        [2, 3],
+        (1, 3),
+        seed=101,
+        cache=False,
+        ica_per_participant=ica_per_participant,
+    )
+    assert fnames == [
+        root
+        / "derivatives"
+        / f"P0{participant}"
+        / f"P0{participant}_S{session}-raw.fif"
+        for participant in (2, 3)
+        for session in (1, 3)
+    ]
+    assert all(fname.exists() for fname in fnames)
+    # the sessions of a participant share their ICA only if requested
+    icas = [
+        read_ica(fname.with_name(fname.name.replace("-raw.fif", "-ica.fif")))
+        for fname in fnames
+    ]
+    shared = np.array_equal(icas[0].unmixing_matrix_, icas[1].unmixing_matrix_)
+    assert shared == ica_per_participant
+    assert np.array_equal(icas[0].unmixing_matrix_, icas[2].unmixing_matrix_)
@@ -0,0 +1,77 @@
+"""Test reference.py"""
+
+import tracemalloc
+
+import numpy as np
+import pytest
+from mne import create_info
+from mne.io import RawArray
+
+from ..reference import set_average_reference
+
+
+@pytest.fixture
+def raw():
+    """Create a recording with EEG and ECG channels."""
+    rng = np.random.default_rng(101)
+    ch_names = ["Fz", "Cz", "Pz", "Oz", "C3", "C4", "ECG"]
+    info = create_info(ch_names, 250.0, ["eeg"] * 6 + ["ecg"])
+    raw = RawArray(rng.standard_normal((7, 120 * 250)) * 1e-5, info)
+    raw.info["bads"] = ["Oz"]
+    return raw
+
+
+def test_set_average_reference(raw):
+    """Test the in-place re-referencing against MNE."""
+    raw_mne = raw.copy().add_reference_channels("CPz")
+    raw_mne.set_eeg_reference("average")
+    set_average_reference(raw, "CPz", chunk_duration=7.0)
+    assert raw.ch_names == raw_mne.ch_names
+    assert raw.info["custom_ref_applied"]
+    assert raw.get_channel_types()[-1] == "eeg"
+    assert np.allclose(raw.get_data(), raw_mne.get_data(), rtol=0, atol=1e-20)
+    # the bad channel and the ECG channel are not re-referenced
+    assert np.allclose(raw.get_data(["Oz", "ECG"]), raw_mne.get_data(["Oz", "ECG"]))
+
+    # a recording whose array is shared is copied in a new buffer
+    data = np.random.default_rng(101).standard_normal((7, 1000))
+    raw = RawArray(data.copy(), raw_mne.copy().drop_channels("CPz").info)
+    raw._data = data
+    set_average_reference(raw, "CPz")
+    assert raw.get_data().shape == (8, 1000)
+    assert data.shape == (7, 1000)
+
+    # without the reference electrode
+    raw = raw_mne.copy()
+    set_average_reference(raw, None)
+    assert raw.ch_names == raw_mne.ch_names
+    assert np.allclose(raw.get_data(), raw_mne.get_data())
+
+    with pytest.raises(ValueError, match="strictly positive"):
+        set_average_reference(raw, None, chunk_duration=0)
+
+
+def test_set_average_reference_projection(raw):
+    """Test the deferred re-referencing with a projector."""
+    raw_mne = raw.copy().add_reference_channels("CPz")
+    raw_mne.set_eeg_reference("average")
+    data = raw.get_data()
+    set_average_reference(raw, "CPz", projection=True)
+    assert not raw.info["custom_ref_applied"]
+    assert len(raw.info["projs"]) == 1
+    assert np.allclose(raw.get_data()[:-1], data)
+    raw.apply_proj()
+    assert np.allclose(raw.get_data(), raw_mne.get_data())
+
+
+def test_set_average_reference_memory(raw):
+    """Test that the data array is not copied."""
+    n_bytes = raw._data.nbytes
+    tracemalloc.start()
+    try:
+        set_average_reference(raw, "CPz")
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    # the array grows by one channel and the chunks are small
+    assert peak < 1.5 * n_bytes
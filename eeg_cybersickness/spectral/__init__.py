@@ -0,0 +1,7 @@
+"""Spectral analysis module."""
+
+from .baseline import compute_baseline_spectrum, normalize_spectrum  # noqa: F401
+from .connectivity import compute_connectivity_windows  # noqa: F401
+from .envelope import compute_band_envelopes  # noqa: F401
+from .psd import compute_psd_windows  # noqa: F401
+from .tfr import compute_rotation_tfr  # noqa: F401
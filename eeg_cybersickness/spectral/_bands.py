@@ -0,0 +1,60 @@
+"""Frequency bands used across the spectral analyses."""
+
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+from ..utils._checks import check_type
+
+if TYPE_CHECKING:
+    from typing import Dict, Optional, Tuple
+
+
+_BANDS: Dict[str, Tuple[float, float]] = {
+    "delta": (1.0, 4.0),
+    "theta": (4.0, 8.0),
+    "alpha": (8.0, 13.0),
+    "beta": (13.0, 30.0),
+}
+
+
+def _check_bands(
+    bands: Optional[Dict[str, Tuple[float, float]]], sfreq: float
+) -> Dict[str, Tuple[float, float]]:
+    """Check the frequency bands.
+
+    Parameters
+    ----------
+    bands : dict | None
+        The key is the name of the band and the value is a 2-tuple of floats
+        with the edges of the band in Hz. If None, the delta, theta, alpha and
+        beta bands are used.
+    sfreq : float
+        Sampling frequency in Hz.
+
+    Returns
+    -------
+    bands : dict
+        The validated frequency bands.
+    """
+    if bands is None:
+        return dict(_BANDS)
+    check_type(bands, (dict,), "bands")
+    if len(bands) == 0:
+        raise ValueError("Argument 'bands' should contain at least one band.")
+    for name, edges in bands.items():
+        check_type(name, (str,), "band name")
+        check_type(edges, (tuple,), f"bands['{name}']")
+        if len(edges) != 2:
+            raise ValueError(
+                f"The band '{name}' should be defined by 2 edges (fmin, fmax). "
+                f"{edges} is invalid."
+            )
+        for edge in edges:
+            check_type(edge, ("numeric",), f"bands['{name}']")
+        if not 0 < edges[0] < edges[1] < sfreq / 2:
+            raise ValueError(
+                f"The band '{name}' should satisfy 0 < fmin < fmax < Nyquist "
+                f"({sfreq / 2} Hz). {edges} is invalid."
+            )
+    return bands
@@ -0,0 +1,196 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from fooof import FOOOFGroup
+from h5io import read_hdf5, write_hdf5
+from mne.io import read_raw_fif
+from mne.io.pick import _picks_to_idx
+
+from ..utils._checks import check_type, check_value
+from ..utils._docs import fill_doc
+from ..utils._stats import _RunningStats
+from ..utils._windows import _check_window_parameters, _window_onsets
+from ..utils.logs import logger
+from ..utils.path import get_derivative_stem
+from .psd import _get_freqs, _iter_psd_batches
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Any, Dict, List, Optional, Union
+
+    from numpy.typing import NDArray
+
+
+@fill_doc
+def compute_baseline_spectrum(
+    root: Union[str, Path],
+    participant: int,
+    duration: float = 2.0,
+    overlap: float = 1.9,
+    method: str = "welch",
+    fmin: float = 1.0,
+    fmax: float = 30.0,
+    bandwidth: Optional[float] = None,
+    overwrite: bool = False,
+) -> Dict[str, Any]:
+    """Compute the baseline spectral statistics from the session 2.
+
+    The statistics are computed once from the preprocessed session 2 derivative
+    ``derivatives/PXX/PXX_S2-raw.fif`` and cached next to it in
+    ``derivatives/PXX/PXX_S2-baseline-spectrum.h5``. Subsequent calls with the
+    same parameters load the cache, as long as the derivative is unchanged, i.e.
+    same modification time, size, sampling frequency and good EEG channels.
+
+    Parameters
+    ----------
+    %(root)s
+    %(participant)s
+    %(duration_overlap)s
+    method : ``"welch"`` | ``"multitaper"``
+        Spectral estimation method, see
+        :func:`~eeg_cybersickness.spectral.compute_psd_windows`.
+    fmin : float
+        Minimum frequency of interest in Hz.
+    fmax : float
+        Maximum frequency of interest in Hz.
+    bandwidth : float | None
+        Frequency bandwidth of the multitaper window function in Hz.
+    overwrite : bool
+        If True, the statistics are recomputed even if a cache exists.
+
+    Returns
+    -------
+    baseline : dict
+        Baseline spectral statistics with the keys:
+
+        - ``"ch_names"``: list of the EEG channel names.
+        - ``"freqs"``: array of shape (n_freqs,), frequencies in Hz.
+        - ``"mean"``: array of shape (n_channels, n_freqs), mean PSD.
+        - ``"std"``: array of shape (n_channels, n_freqs), standard deviation of
+          the PSD across windows.
+        - ``"aperiodic_params"``: array of shape (n_channels, 2), aperiodic
+          (offset, exponent) fitted with FOOOF on the mean PSD.
+        - ``"n_windows"``: number of windows.
+        - ``"params"``: dict of the parameters used to compute the statistics.
+        - ``"source"``: dict describing the derivative used to compute the
+          statistics (``"mtime_ns"``, ``"size"``, ``"sfreq"``, ``"ch_names"``).
+    """
+    check_type(overwrite, (bool,), "overwrite")
+    check_value(method, ("welch", "multitaper"), "method")
+    stem = get_derivative_stem(root, participant, 2)
+    fname = stem.with_name(f"{stem.name}-baseline-spectrum.h5")
+    params = dict(
+        duration=float(duration),
+        overlap=float(overlap),
+        method=method,
+        fmin=float(fmin),
+        fmax=float(fmax),
+        bandwidth=None if bandwidth is None else float(bandwidth),
+    )
+    fname_raw = stem.with_name(f"{stem.name}-raw.fif")
+    raw = read_raw_fif(fname_raw, preload=False)
+    picks = _picks_to_idx(raw.info, "eeg", exclude="bads")
+    # the cache is tied to the derivative it was computed from
+    stat = fname_raw.stat()
+    source = dict(
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+        sfreq=float(raw.info["sfreq"]),
+        ch_names=[raw.ch_names[pick] for pick in picks],
+    )
+    if fname.exists() and not overwrite:
+        baseline = read_hdf5(fname)
+        if baseline["params"] == params and baseline.get("source") == source:
+            logger.info("Loading cached baseline spectrum from %s.", fname)
+            return baseline
+        logger.info(
+            "The cached baseline spectrum parameters or derivative differ, "
+            "recomputing."
+        )
+
+    n_window, n_step = _check_window_parameters(raw.info["sfreq"], duration, overlap)
+    onsets = _window_onsets(raw, 0.0, None, n_window, n_step, True)
+    freqs = _get_freqs(raw.info["sfreq"], n_window, fmin, fmax)
+    stats = _RunningStats((picks.size, freqs.size))
+    for _, psd in _iter_psd_batches(
+        raw, picks, onsets, n_window, method, fmin, fmax, bandwidth, None
+    ):
+        stats.update(psd)
+    if stats.count == 0:
+        raise RuntimeError("No valid window was found in the baseline recording.")
+
+    fg = FOOOFGroup(peak_width_limits=(2, 12), verbose=False)
+    fg.fit(freqs, stats.mean)
+    baseline = dict(
+        ch_names=source["ch_names"],
+        freqs=freqs,
+        mean=stats.mean,
+        std=stats.std,
+        aperiodic_params=fg.get_params("aperiodic_params"),
+        n_windows=stats.count,
+        params=params,
+        source=source,
+    )
+    write_hdf5(fname, baseline, overwrite=True)
+    logger.info("Baseline spectrum cached in %s.", fname)
+    return baseline
+
+
+def normalize_spectrum(
+    psds: NDArray[float],
+    ch_names: List[str],
+    freqs: NDArray[float],
+    baseline: Dict[str, Any],
+    mode: str = "db",
+) -> NDArray[float]:
+    """Normalize power spectral densities against the baseline statistics.
+
+    Parameters
+    ----------
+    psds : array of shape (..., n_channels, n_freqs)
+        Power spectral densities to normalize, e.g. the windows returned by
+        :func:`~eeg_cybersickness.spectral.compute_psd_windows`.
+    ch_names : list of str
+        Channel names of the second to last axis of ``psds``.
+    freqs : array of shape (n_freqs,)
+        Frequencies of the last axis of ``psds``.
+    baseline : dict
+        Baseline statistics returned by
+        :func:`~eeg_cybersickness.spectral.compute_baseline_spectrum`.
+    mode : ``"db"`` | ``"zscore"``
+        ``"db"`` returns ``10 * log10(psd / mean)`` and ``"zscore"`` returns
+        ``(psd - mean) / std``.
+
+    Returns
+    -------
+    psds_norm : array of shape (..., n_channels, n_freqs)
+        Normalized power spectral densities. Channels absent from the baseline,
+        e.g. marked as bad in session 2, are set to NaN.
+    """
+    check_value(mode, ("db", "zscore"), "mode")
+    psds = np.asarray(psds)
+    if psds.shape[-2:] != (len(ch_names), len(freqs)):
+        raise ValueError(
+            f"The shape of 'psds' {psds.shape} does not match the number of "
+            f"channels ({len(ch_names)}) and frequencies ({len(freqs)})."
+        )
+    if len(freqs) != baseline["freqs"].size or not np.allclose(
+        freqs, baseline["freqs"]
+    ):
+        raise ValueError(
+            "The frequencies do not match the frequencies of the baseline. Use the "
+            "same window duration and frequency range."
+        )
+    # align the baseline on the channels, NaN for missing channels
+    idx = {ch: k for k, ch in enumerate(baseline["ch_names"])}
+    mean = np.full((len(ch_names), len(freqs)), np.nan)
+    std = np.full((len(ch_names), len(freqs)), np.nan)
+    for k, ch in enumerate(ch_names):
+        if ch in idx:
+            mean[k] = baseline["mean"][idx[ch]]
+            std[k] = baseline["std"][idx[ch]]
+    if mode == "db":
+        return 10 * np.log10(psds / mean)
+    return (psds - mean) / std
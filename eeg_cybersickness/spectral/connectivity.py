@@ -0,0 +1,192 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from mne.io import BaseRaw
+from mne.io.pick import _picks_to_idx
+from scipy.fft import rfft
+
+from ..utils._checks import check_type, check_value
+from ..utils._docs import fill_doc
+from ..utils._windows import (
+    _batch_size,
+    _check_window_parameters,
+    _iter_window_batches,
+    _window_conditions,
+    _window_onsets,
+)
+from ..utils.logs import logger
+from .psd import _get_freq_scaling, _get_freqs, _get_hamming
+
+if TYPE_CHECKING:
+    from typing import Dict, Optional, Tuple, Union
+
+    from numpy.typing import DTypeLike, NDArray
+
+
+_METHODS = ("coh", "imcoh", "wpli")
+
+
+@fill_doc
+def compute_connectivity_windows(
+    raw: BaseRaw,
+    start: float = 0.0,
+    stop: Optional[float] = None,
+    duration: float = 2.0,
+    overlap: float = 1.9,
+    method: Union[str, Tuple[str, ...]] = ("coh", "imcoh", "wpli"),
+    average: str = "chunk",
+    chunk_duration: float = 60.0,
+    fmin: float = 0.0,
+    fmax: float = np.inf,
+    picks="eeg",
+    dtype: DTypeLike = np.float64,
+    reject_by_annotation: bool = True,
+    batch_size: Optional[int] = None,
+) -> Tuple[Dict[str, NDArray[float]], NDArray[float], NDArray, NDArray[int]]:
+    """Compute the spectral connectivity between all channel pairs.
+
+    The cross-spectral matrices of all channel pairs are computed at once for a
+    batch of Hamming-tapered windows, and accumulated in place per chunk of
+    consecutive windows or per condition.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording. With ``average="condition"``, the recording must
+        include the synthetic STI channel.
+    %(start_stop)s
+    %(duration_overlap)s
+    method : str | tuple of str
+        Connectivity measure(s) to compute among ``"coh"`` (coherence),
+        ``"imcoh"`` (imaginary part of the coherency) and ``"wpli"`` (weighted
+        phase lag index).
+    average : ``"chunk"`` | ``"condition"``
+        How the windows are grouped before the cross-spectra are averaged.
+        ``"chunk"`` groups consecutive windows starting in the same chunk of
+        ``chunk_duration`` seconds. ``"condition"`` groups windows recorded
+        during the same event of the synthetic STI channel, windows overlapping
+        2 events are dropped.
+    chunk_duration : float
+        Duration of a chunk in seconds. Only used with ``average="chunk"``.
+    fmin : float
+        Minimum frequency of interest in Hz.
+    fmax : float
+        Maximum frequency of interest in Hz.
+    %(picks)s
+    dtype : dtype
+        Floating point precision of the FFT and of the accumulated
+        cross-spectra, ``np.float64`` or ``np.float32``. ``np.float32`` halves
+        the memory footprint.
+    %(reject_by_annotation)s
+    %(batch_size)s
+
+    Returns
+    -------
+    conn : dict
+        The key is the connectivity measure. The value is an array of shape
+        (n_groups, n_channels, n_channels, n_freqs).
+    freqs : array of shape (n_freqs,)
+        Frequencies in Hz.
+    groups : array of shape (n_groups,)
+        Start of each chunk in seconds, or trigger code of each condition.
+    n_windows : array of shape (n_groups,)
+        Number of windows averaged in each group.
+
+    Notes
+    -----
+    The memory footprint grows with the square of the number of channels. The
+    accumulated cross-spectra require ``n_groups * n_channels² * n_freqs``
+    complex numbers. The batch size is chosen such that the per-window
+    cross-spectra of a batch remain below 64 MiB. Both estimates are logged at
+    the ``"INFO"`` level.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    method = (method,) if isinstance(method, str) else method
+    check_type(method, (tuple,), "method")
+    for meth in method:
+        check_value(meth, _METHODS, "method")
+    check_value(average, ("chunk", "condition"), "average")
+    dtype = np.dtype(dtype)
+    check_value(dtype, (np.dtype(np.float32), np.dtype(np.float64)), "dtype")
+    cdtype = np.result_type(dtype, np.complex64)
+    sfreq = raw.info["sfreq"]
+    n_window, n_step = _check_window_parameters(sfreq, duration, overlap)
+    onsets = _window_onsets(raw, start, stop, n_window, n_step, reject_by_annotation)
+    picks = _picks_to_idx(raw.info, picks, exclude="bads")
+
+    # assign each window to a group
+    if average == "chunk":
+        check_type(chunk_duration, ("numeric",), "chunk_duration")
+        if chunk_duration < duration:
+            raise ValueError(
+                "Argument 'chunk_duration' should be at least as long as the window "
+                f"duration ({duration} seconds). {chunk_duration} is invalid."
+            )
+        istart = raw.time_as_index(start, use_rounding=True)[0]
+        labels = (onsets - istart) // int(np.round(chunk_duration * sfreq))
+        groups, labels = np.unique(labels, return_inverse=True)
+        groups = start + groups * chunk_duration
+    else:
+        labels = _window_conditions(raw, onsets, n_window)
+        onsets, labels = onsets[labels != 0], labels[labels != 0]
+        groups, labels = np.unique(labels, return_inverse=True)
+
+    # allocate accumulators and report memory usage
+    tapers, _ = _get_hamming(n_window)
+    tapers = tapers.astype(dtype)
+    freq_slice, _ = _get_freq_scaling(sfreq, n_window, fmin, fmax)
+    freqs = _get_freqs(sfreq, n_window, fmin, fmax)
+    shape = (groups.size, picks.size, picks.size, freqs.size)
+    csd = np.zeros(shape, dtype=cdtype)
+    psd = np.zeros((groups.size, picks.size, freqs.size), dtype=dtype)
+    if "wpli" in method:
+        im_abs_sum = np.zeros(shape, dtype=dtype)
+    n_bytes_window = picks.size**2 * freqs.size * cdtype.itemsize
+    if batch_size is None:
+        batch_size = _batch_size(n_bytes_window)
+    n_accumulators = 1.5 if "wpli" in method else 1.0
+    logger.info(
+        "Cross-spectra of %i channels and %i frequencies: %.1f MiB accumulated for "
+        "%i groups, %.1f MiB per batch of %i windows.",
+        picks.size,
+        freqs.size,
+        n_accumulators * csd.nbytes / 2**20,
+        groups.size,
+        batch_size * n_bytes_window / 2**20,
+        batch_size,
+    )
+
+    n_windows = np.bincount(labels, minlength=groups.size)
+    for sl, data in _iter_window_batches(raw, picks, onsets, n_window, batch_size):
+        data = data.astype(dtype, copy=False)
+        data = data - data.mean(axis=-1, keepdims=True)
+        spectra = rfft(data * tapers, axis=-1)[..., freq_slice]
+        psd_batch = spectra.real**2 + spectra.imag**2
+        for label in np.unique(labels[sl]):
+            mask = labels[sl] == label
+            psd[label] += psd_batch[mask].sum(axis=0)
+            if "wpli" in method:
+                csd_batch = np.einsum(
+                    "bif,bjf->bijf", spectra[mask], spectra[mask].conj()
+                )
+                csd[label] += csd_batch.sum(axis=0)
+                im_abs_sum[label] += np.abs(csd_batch.imag).sum(axis=0)
+            else:
+                csd[label] += np.einsum(
+                    "bif,bjf->ijf", spectra[mask], spectra[mask].conj()
+                )
+
+    # normalize the accumulated cross-spectra
+    conn = dict()
+    norm = np.sqrt(psd[:, :, np.newaxis, :] * psd[:, np.newaxis, :, :])
+    if "coh" in method:
+        conn["coh"] = np.abs(csd) / norm
+    if "imcoh" in method:
+        conn["imcoh"] = csd.imag / norm
+    if "wpli" in method:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            conn["wpli"] = np.abs(csd.imag) / im_abs_sum
+        conn["wpli"][im_abs_sum == 0] = 0
+    return conn, freqs, groups, n_windows
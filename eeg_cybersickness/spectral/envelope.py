@@ -0,0 +1,273 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from mne.io import BaseRaw
+from mne.io.pick import _picks_to_idx
+from scipy.fft import fft, ifft, next_fast_len, rfft
+from scipy.signal import firwin
+
+from ..utils._checks import _ensure_int, check_type
+from ..utils._docs import fill_doc
+from ..utils._windows import _get_data_padded
+from ..utils.logs import logger
+from ._bands import _check_bands
+
+if TYPE_CHECKING:
+    from typing import Dict, Generator, List, Optional, Tuple
+
+    from numpy.typing import NDArray
+
+
+@fill_doc
+def compute_band_envelopes(
+    raw: BaseRaw,
+    bands: Optional[Dict[str, Tuple[float, float]]] = None,
+    decim: Optional[int] = None,
+    picks="eeg",
+    n_fft: Optional[int] = None,
+    out: Optional[NDArray[float]] = None,
+) -> Tuple[NDArray[float], NDArray[float]]:
+    """Compute the amplitude envelope of several frequency bands in one pass.
+
+    The recording is processed in chunks with the overlap-save method. Each
+    chunk is transformed once with a forward FFT, and the analytic signal of
+    every band is obtained by applying a complex band-pass filter to the
+    spectrum followed by a short inverse FFT which directly yields the
+    decimated envelope.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording, preloaded or not.
+    bands : dict | None
+        The key is the name of the band and the value is a 2-tuple of floats
+        with the edges of the band in Hz. If None, the delta (1-4 Hz), theta
+        (4-8 Hz), alpha (8-13 Hz) and beta (13-30 Hz) bands are used.
+    decim : int | None
+        Decimation factor of the envelopes. The bandwidth of each band, including
+        its transitions, must fit below ``sfreq / decim``. If None, the largest
+        factor keeping the output sampling rate above twice the highest band edge
+        is used.
+    %(picks)s
+    n_fft : int | None
+        Length of the FFT applied to each chunk. Must be a multiple of ``decim``
+        longer than the filters. If None, a length of at least 8 times the
+        filters is used.
+    out : array of shape (n_bands, n_channels, n_times_decim) | None
+        Buffer in which the envelopes are written, e.g. a memory-mapped array.
+        If None, a new array is allocated.
+
+    Returns
+    -------
+    envelopes : array of shape (n_bands, n_channels, n_times_decim)
+        Amplitude envelope of each band, in the order of ``bands``.
+    times : array of shape (n_times_decim,)
+        Time of each envelope sample in seconds.
+
+    Notes
+    -----
+    Each band-pass filter is a Hamming-windowed FIR low-pass filter modulated
+    to the center of the band, thus its real part matches a zero-phase
+    band-pass filter and its magnitude matches the envelope obtained with a
+    Hilbert transform. The transition bandwidth follows MNE's default for the
+    lower edge, ``min(max(0.25 * fmin, 2), fmin)``. The recording edges are
+    padded with the edge values.
+    """
+    bands, picks, decim, n_half, n_fft = _check_envelope_parameters(
+        raw, bands, decim, picks, n_fft
+    )
+    n_out = int(np.ceil(raw.n_times / decim))
+    shape = (len(bands), picks.size, n_out)
+    if out is None:
+        out = np.empty(shape)
+    elif out.shape != shape:
+        raise ValueError(
+            f"The provided buffer has a shape {out.shape} while {shape} is expected."
+        )
+    for idx, envelopes in _iter_band_envelopes(raw, bands, picks, decim, n_half, n_fft):
+        out[:, :, idx] = envelopes
+    return out, raw.times[::decim]
+
+
+def _check_envelope_parameters(
+    raw: BaseRaw,
+    bands: Optional[Dict[str, Tuple[float, float]]],
+    decim: Optional[int],
+    picks,
+    n_fft: Optional[int],
+) -> Tuple[Dict[str, Tuple[float, float]], NDArray[int], int, int, int]:
+    """Check the parameters of the band envelopes.
+
+    Returns
+    -------
+    bands : dict
+        The validated frequency bands.
+    picks : array of int
+        Indices of the channels.
+    decim : int
+        Decimation factor of the envelopes.
+    n_half : int
+        Common half-length of the filters, multiple of ``decim``.
+    n_fft : int
+        Length of the FFT applied to each chunk.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    sfreq = raw.info["sfreq"]
+    bands = _check_bands(bands, sfreq)
+    picks = _picks_to_idx(raw.info, picks, exclude="bads")
+    widths = [
+        fmax - fmin + 2 * _transition_bandwidth(fmin) for fmin, fmax in bands.values()
+    ]
+    if decim is None:
+        fmax = max(edges[1] for edges in bands.values())
+        decim = max(int(sfreq // (2 * fmax)), 1)
+    decim = _ensure_int(decim, "decim")
+    if decim <= 0:
+        raise ValueError(
+            f"Argument 'decim' should be a strictly positive integer. {decim} is "
+            "invalid."
+        )
+    for name, width in zip(bands, widths):
+        if sfreq / decim <= width:
+            raise ValueError(
+                f"The decimation factor {decim} is too large for the band '{name}' "
+                f"which spans {width:.2f} Hz including transitions."
+            )
+
+    # filters are padded to a common half-length, multiple of the decimation
+    n_half = max(_filter_half_length(fmin, sfreq) for fmin, _ in bands.values())
+    n_half = int(np.ceil(n_half / decim)) * decim
+    if n_fft is None:
+        n_fft = decim * next_fast_len(int(np.ceil(max(16 * n_half, 2**14) / decim)))
+    n_fft = _ensure_int(n_fft, "n_fft")
+    if n_fft % decim != 0 or n_fft <= 2 * n_half:
+        raise ValueError(
+            f"Argument 'n_fft' should be a multiple of the decimation factor {decim} "
+            f"larger than {2 * n_half} samples. {n_fft} is invalid."
+        )
+    return bands, picks, decim, n_half, n_fft
+
+
+def _iter_band_envelopes(
+    raw: BaseRaw,
+    bands: Dict[str, Tuple[float, float]],
+    picks: NDArray[int],
+    decim: int,
+    n_half: int,
+    n_fft: int,
+) -> Generator[Tuple[slice, NDArray[float]], None, None]:
+    """Iterate over the band envelopes of consecutive chunks of the recording.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording, preloaded or not.
+    bands : dict
+        The key is the name of the band and the value is a 2-tuple of floats
+        with the edges of the band in Hz.
+    picks : array of int
+        Indices of the channels.
+    decim : int
+        Decimation factor of the envelopes.
+    n_half : int
+        Common half-length of the filters, multiple of ``decim``.
+    n_fft : int
+        Length of the FFT applied to each chunk.
+
+    Yields
+    ------
+    idx : slice
+        Indices of the decimated samples of the chunk.
+    envelopes : array of shape (n_bands, n_channels, n_times_chunk)
+        Amplitude envelope of each band on the chunk.
+    """
+    n_step = n_fft - 2 * n_half
+    filters = _design_filters(bands, raw.info["sfreq"], n_half, n_fft, decim)
+    logger.info(
+        "Computing %i band envelopes with filters of %i samples and chunks of %i "
+        "samples, decimated by %i.",
+        len(bands),
+        2 * n_half + 1,
+        n_fft,
+        decim,
+    )
+    n_out = int(np.ceil(raw.n_times / decim))
+    n_small = n_fft // decim
+    valid = slice(n_half // decim, (n_half + n_step) // decim)
+    for start in range(0, raw.n_times, n_step):
+        data = _get_data_padded(raw, picks, start - n_half, start - n_half + n_fft)
+        spectrum = rfft(data, axis=-1)
+        idx = slice(start // decim, min((start + n_step) // decim, n_out))
+        n_valid = idx.stop - idx.start
+        envelopes = np.empty((len(bands), picks.size, n_valid))
+        for k, (src, dst, response) in enumerate(filters):
+            baseband = np.zeros((picks.size, n_small), dtype=spectrum.dtype)
+            baseband[:, dst] = spectrum[:, src] * response
+            analytic = ifft(baseband, axis=-1)[:, valid][:, :n_valid]
+            envelopes[k] = np.abs(analytic)
+        yield idx, envelopes
+
+
+def _transition_bandwidth(fmin: float) -> float:
+    """Transition bandwidth of the band-pass filter, as MNE's default."""
+    return min(max(0.25 * fmin, 2.0), fmin)
+
+
+def _filter_half_length(fmin: float, sfreq: float) -> int:
+    """Half-length of the Hamming-windowed FIR filter, as MNE's default."""
+    return int(np.ceil(3.3 / _transition_bandwidth(fmin) * sfreq / 2))
+
+
+def _design_filters(
+    bands: Dict[str, Tuple[float, float]],
+    sfreq: float,
+    n_half: int,
+    n_fft: int,
+    decim: int,
+) -> List[Tuple[NDArray[int], NDArray[int], NDArray[complex]]]:
+    """Design the complex band-pass filters in the frequency domain.
+
+    Parameters
+    ----------
+    bands : dict
+        The key is the name of the band and the value is a 2-tuple of floats
+        with the edges of the band in Hz.
+    sfreq : float
+        Sampling frequency in Hz.
+    n_half : int
+        Common half-length of the filters, multiple of ``decim``.
+    n_fft : int
+        Length of the FFT applied to each chunk.
+    decim : int
+        Decimation factor of the envelopes.
+
+    Returns
+    -------
+    filters : list of tuple
+        For each band, the indices of the bins retrieved from the one-sided
+        spectrum of a chunk, the indices at which they are placed in the
+        baseband spectrum of length ``n_fft // decim``, and the frequency response
+        of the filter on those bins, scaled by ``1 / decim``.
+    """
+    n_small = n_fft // decim
+    filters = list()
+    for fmin, fmax in bands.values():
+        n_half_band = _filter_half_length(fmin, sfreq)
+        transition = _transition_bandwidth(fmin)
+        taps = np.arange(-n_half_band, n_half_band + 1)
+        lowpass = firwin(
+            taps.size, (fmax - fmin + transition) / 2, window="hamming", fs=sfreq
+        )
+        fcenter = (fmin + fmax) / 2
+        h = np.zeros(n_fft, dtype=complex)
+        h[taps % n_fft] = 2 * lowpass * np.exp(2j * np.pi * fcenter * taps / sfreq)
+        # center the band in the baseband spectrum, drop negative frequencies
+        bins = (
+            int(np.round(fcenter * n_fft / sfreq)) - n_small // 2 + np.arange(n_small)
+        )
+        mask = (0 <= bins) & (bins <= n_fft // 2)
+        response = fft(h)[bins[mask]] / decim
+        filters.append((bins[mask], np.where(mask)[0], response))
+    return filters
@@ -0,0 +1,314 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+import numpy as np
+from mne.io import BaseRaw
+from mne.io.pick import _picks_to_idx
+from mne.time_frequency import dpss_windows
+from scipy.fft import rfft, rfftfreq
+from scipy.signal import get_window
+
+from ..utils._checks import _check_dtype, check_type, check_value
+from ..utils._docs import fill_doc
+from ..utils._windows import (
+    _batch_size,
+    _check_window_parameters,
+    _iter_window_batches,
+    _window_onsets,
+)
+from ..utils.logs import logger
+
+if TYPE_CHECKING:
+    from typing import Generator, Optional, Tuple, Union
+
+    from numpy.typing import NDArray
+
+
+@fill_doc
+def compute_psd_windows(
+    raw: BaseRaw,
+    start: float = 0.0,
+    stop: Optional[float] = None,
+    duration: float = 2.0,
+    overlap: float = 1.9,
+    method: str = "welch",
+    fmin: float = 0.0,
+    fmax: float = np.inf,
+    picks="eeg",
+    bandwidth: Optional[float] = None,
+    reject_by_annotation: bool = True,
+    batch_size: Optional[int] = None,
+    dtype: Union[str, np.dtype] = "float64",
+) -> Tuple[NDArray[float], NDArray[float], NDArray[float]]:
+    """Compute the power spectral density on sliding windows.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording.
+    %(start_stop)s
+    %(duration_overlap)s
+    method : ``"welch"`` | ``"multitaper"``
+        Spectral estimation method. ``"welch"`` uses a single Hamming-tapered
+        segment spanning the window, as ``Epochs.compute_psd(method="welch")``
+        does with ``n_fft`` and ``n_per_seg`` set to the window length.
+        ``"multitaper"`` averages the periodograms obtained with DPSS tapers.
+    fmin : float
+        Minimum frequency of interest in Hz.
+    fmax : float
+        Maximum frequency of interest in Hz.
+    %(picks)s
+    bandwidth : float | None
+        Frequency bandwidth of the multitaper window function in Hz. If None,
+        the half-bandwidth is set to 4. Only used with ``method="multitaper"``.
+    %(reject_by_annotation)s
+    %(batch_size)s
+    %(dtype)s
+
+    Returns
+    -------
+    psds : array of shape (n_windows, n_channels, n_freqs)
+        Power spectral density in V²/Hz of each window, in ``dtype``.
+    freqs : array of shape (n_freqs,)
+        Frequencies in Hz.
+    times : array of shape (n_windows,)
+        Onset of each window in seconds.
+
+    Notes
+    -----
+    The tapers are computed once per window length and bandwidth and are cached
+    for subsequent calls.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    n_window, n_step = _check_window_parameters(raw.info["sfreq"], duration, overlap)
+    onsets = _window_onsets(raw, start, stop, n_window, n_step, reject_by_annotation)
+    picks = _picks_to_idx(raw.info, picks, exclude="bads")
+    freqs = _get_freqs(raw.info["sfreq"], n_window, fmin, fmax)
+    dtype = _check_dtype(dtype)
+    psds = np.empty((onsets.size, picks.size, freqs.size), dtype=dtype)
+    for sl, psd in _iter_psd_batches(
+        raw, picks, onsets, n_window, method, fmin, fmax, bandwidth, batch_size, dtype
+    ):
+        psds[sl] = psd
+    return psds, freqs, onsets / raw.info["sfreq"]
+
+
+def _iter_psd_batches(
+    raw: BaseRaw,
+    picks: NDArray[int],
+    onsets: NDArray[int],
+    n_window: int,
+    method: str,
+    fmin: float,
+    fmax: float,
+    bandwidth: Optional[float],
+    batch_size: Optional[int],
+    dtype: Union[str, np.dtype] = "float64",
+) -> Generator[Tuple[slice, NDArray[float]], None, None]:
+    """Iterate over the power spectral density of batches of windows.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording.
+    picks : array of int
+        Indices of the channels to retrieve.
+    onsets : array of shape (n_windows,)
+        Onset of each window, as an index in the data array.
+    n_window : int
+        Number of samples in a window.
+    method : ``"welch"`` | ``"multitaper"``
+        Spectral estimation method.
+    fmin : float
+        Minimum frequency of interest in Hz.
+    fmax : float
+        Maximum frequency of interest in Hz.
+    bandwidth : float | None
+        Frequency bandwidth of the multitaper window function in Hz.
+    batch_size : int | None
+        Number of windows processed together.
+    dtype : dtype
+        Floating point type in which the spectra are computed.
+
+    Yields
+    ------
+    sl : slice
+        Slice selecting the windows of the batch in ``onsets``.
+    psd : array of shape (n_batch, n_channels, n_freqs)
+        Power spectral density of the windows in the batch.
+    """
+    check_value(method, ("welch", "multitaper"), "method")
+    sfreq = raw.info["sfreq"]
+    if method == "welch":
+        tapers, weights = _get_hamming(n_window)
+    else:
+        tapers, weights = _get_dpss(n_window, _half_nbw(sfreq, n_window, bandwidth))
+        logger.info(
+            "Using multitaper spectrum estimation with %i DPSS windows.", weights.size
+        )
+    freq_slice, scaling = _get_freq_scaling(sfreq, n_window, fmin, fmax)
+    # in float32, the FFTs run in single precision, c.f. scipy.fft
+    dtype = _check_dtype(dtype)
+    tapers = tapers.astype(dtype, copy=False)
+    weights = weights.astype(dtype, copy=False)
+    scaling = scaling.astype(dtype, copy=False)
+    if batch_size is None:
+        batch_size = _batch_size(
+            picks.size
+            * weights.size
+            * dtype.itemsize
+            * (n_window + 2 * (n_window // 2 + 1))
+        )
+    for sl, data in _iter_window_batches(raw, picks, onsets, n_window, batch_size):
+        data = data.astype(dtype, copy=False)
+        yield sl, _tapered_psd(data, tapers, weights, freq_slice, scaling)
+
+
+def _tapered_psd(
+    data: NDArray[float],
+    tapers: NDArray[float],
+    weights: NDArray[float],
+    freq_slice: slice,
+    scaling: NDArray[float],
+) -> NDArray[float]:
+    """Compute the weighted average of the tapered periodograms.
+
+    Parameters
+    ----------
+    data : array of shape (n_batch, n_channels, n_times)
+        Data of the windows.
+    tapers : array of shape (n_tapers, n_times)
+        Tapers applied to each window.
+    weights : array of shape (n_tapers,)
+        Weight of each tapered periodogram in the average.
+    freq_slice : slice
+        Slice selecting the frequencies of interest in the one-sided spectrum.
+    scaling : array of shape (n_freqs,)
+        Scaling applied to each frequency to obtain a one-sided density.
+
+    Returns
+    -------
+    psd : array of shape (n_batch, n_channels, n_freqs)
+        Power spectral density of each window.
+    """
+    data = data - data.mean(axis=-1, keepdims=True)
+    # all tapers are applied to all windows in a single FFT call
+    spectra = rfft(data[:, :, np.newaxis, :] * tapers, axis=-1)[..., freq_slice]
+    power = spectra.real**2 + spectra.imag**2
+    return np.einsum("bctf,t,f->bcf", power, weights, scaling, optimize=True)
+
+
+def _get_freqs(sfreq: float, n_window: int, fmin: float, fmax: float) -> NDArray[float]:
+    """Get the frequencies of interest in the one-sided spectrum."""
+    freq_slice, _ = _get_freq_scaling(sfreq, n_window, fmin, fmax)
+    return rfftfreq(n_window, 1.0 / sfreq)[freq_slice]
+
+
+def _get_freq_scaling(
+    sfreq: float, n_window: int, fmin: float, fmax: float
+) -> Tuple[slice, NDArray[float]]:
+    """Get the frequency selection and the one-sided density scaling.
+
+    Parameters
+    ----------
+    sfreq : float
+        Sampling frequency in Hz.
+    n_window : int
+        Number of samples in a window.
+    fmin : float
+        Minimum frequency of interest in Hz.
+    fmax : float
+        Maximum frequency of interest in Hz.
+
+    Returns
+    -------
+    freq_slice : slice
+        Slice selecting the frequencies of interest in the one-sided spectrum.
+    scaling : array of shape (n_freqs,)
+        Scaling applied to each frequency to obtain a one-sided density.
+    """
+    check_type(fmin, ("numeric",), "fmin")
+    check_type(fmax, ("numeric",), "fmax")
+    if fmax < fmin:
+        raise ValueError(
+            f"Argument 'fmax' ({fmax}) should be larger than 'fmin' ({fmin})."
+        )
+    freqs = rfftfreq(n_window, 1.0 / sfreq)
+    freq_slice = slice(
+        np.searchsorted(freqs, fmin, side="left"),
+        np.searchsorted(freqs, fmax, side="right"),
+    )
+    if freq_slice.start == freq_slice.stop:
+        raise ValueError(
+            f"No frequency found between fmin={fmin} and fmax={fmax} Hz with a "
+            f"frequency resolution of {freqs[1] - freqs[0]} Hz."
+        )
+    scaling = np.full(freqs.size, 2.0 / sfreq)
+    scaling[0] /= 2  # DC
+    if n_window % 2 == 0:
+        scaling[-1] /= 2  # Nyquist
+    return freq_slice, scaling[freq_slice]
+
+
+def _half_nbw(sfreq: float, n_window: int, bandwidth: Optional[float]) -> float:
+    """Convert the multitaper bandwidth to a normalized half-bandwidth."""
+    check_type(bandwidth, ("numeric", None), "bandwidth")
+    half_nbw = 4.0 if bandwidth is None else float(bandwidth) * n_window / (2 * sfreq)
+    if half_nbw < 0.5:
+        raise ValueError(
+            f"The bandwidth {bandwidth} Hz yields a normalized half-bandwidth of "
+            f"{half_nbw} < 0.5. Use a bandwidth of at least {sfreq / n_window} Hz."
+        )
+    return half_nbw
+
+
+@lru_cache(maxsize=16)
+def _get_hamming(n_window: int) -> Tuple[NDArray[float], NDArray[float]]:
+    """Get the Hamming taper used by the Welch method.
+
+    Parameters
+    ----------
+    n_window : int
+        Number of samples in a window.
+
+    Returns
+    -------
+    tapers : array of shape (1, n_window)
+        Periodic Hamming window, as used by :func:`scipy.signal.welch`.
+    weights : array of shape (1,)
+        Inverse of the energy of the window.
+    """
+    tapers = get_window("hamming", n_window)[np.newaxis, :]
+    weights = 1.0 / np.sum(tapers**2, axis=-1)
+    tapers.flags.writeable = False
+    weights.flags.writeable = False
+    return tapers, weights
+
+
+@lru_cache(maxsize=16)
+def _get_dpss(n_window: int, half_nbw: float) -> Tuple[NDArray[float], NDArray[float]]:
+    """Get the DPSS tapers used by the multitaper method.
+
+    Parameters
+    ----------
+    n_window : int
+        Number of samples in a window.
+    half_nbw : float
+        Normalized half-bandwidth of the tapers.
+
+    Returns
+    -------
+    tapers : array of shape (n_tapers, n_window)
+        DPSS tapers with an eigenvalue above 0.9.
+    weights : array of shape (n_tapers,)
+        Eigenvalues of the tapers, normalized to sum to 1.
+    """
+    tapers, eigvals = dpss_windows(
+        n_window, half_nbw, int(2 * half_nbw), sym=False, low_bias=True
+    )
+    weights = eigvals / eigvals.sum()
+    tapers.flags.writeable = False
+    weights.flags.writeable = False
+    return tapers, weights
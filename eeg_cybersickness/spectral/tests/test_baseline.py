@@ -0,0 +1,86 @@
+"""Test baseline.py"""
+
+import numpy as np
+import pytest
+from mne import create_info
+from mne.io import RawArray, read_raw_fif
+
+from ..baseline import compute_baseline_spectrum, normalize_spectrum
+from ..psd import compute_psd_windows
+
+
+@pytest.fixture(scope="module")
+def root(tmp_path_factory):
+    """Create a root folder with a session 2 derivative."""
+    root = tmp_path_factory.mktemp("data")
+    rng = np.random.default_rng(101)
+    times = np.arange(15000) / 250.0
+    data = rng.standard_normal((3, times.size)) + 2 * np.sin(2 * np.pi * 10 * times)
+    info = create_info(["Fz", "Cz", "Pz"], 250.0, "eeg")
+    raw = RawArray(data * 1e-6, info)
+    raw.info["bads"] = ["Pz"]
+    (root / "derivatives" / "P01").mkdir(parents=True)
+    raw.save(root / "derivatives" / "P01" / "P01_S2-raw.fif")
+    return root
+
+
+def test_compute_baseline_spectrum(root):
+    """Test the baseline statistics and their cache."""
+    baseline = compute_baseline_spectrum(root, 1)
+    assert baseline["ch_names"] == ["Fz", "Cz"]
+    assert baseline["mean"].shape == (2, baseline["freqs"].size)
+    assert baseline["aperiodic_params"].shape == (2, 2)
+    fname = root / "derivatives" / "P01" / "P01_S2-baseline-spectrum.h5"
+    assert fname.exists()
+
+    # statistics match the ones computed on all windows at once
+    raw = read_raw_fif(root / "derivatives" / "P01" / "P01_S2-raw.fif")
+    psds, freqs, _ = compute_psd_windows(raw, fmin=1.0, fmax=30.0)
+    assert baseline["n_windows"] == psds.shape[0]
+    assert np.allclose(baseline["freqs"], freqs)
+    assert np.allclose(baseline["mean"], psds.mean(axis=0))
+    assert np.allclose(baseline["std"], psds.std(axis=0, ddof=1))
+
+    # cache is loaded, and invalidated when the parameters change
+    mtime = fname.stat().st_mtime_ns
+    baseline2 = compute_baseline_spectrum(root, 1)
+    assert fname.stat().st_mtime_ns == mtime
+    assert np.array_equal(baseline["mean"], baseline2["mean"])
+    baseline3 = compute_baseline_spectrum(root, 1, fmax=20.0)
+    assert baseline3["freqs"][-1] == 20.0
+    assert fname.stat().st_mtime_ns != mtime
+
+    # cache is invalidated when the derivative changes
+    mtime = fname.stat().st_mtime_ns
+    raw = RawArray(raw.get_data(), raw.info)
+    raw.info["bads"] = []
+    raw.save(root / "derivatives" / "P01" / "P01_S2-raw.fif", overwrite=True)
+    baseline4 = compute_baseline_spectrum(root, 1, fmax=20.0)
+    assert baseline4["ch_names"] == ["Fz", "Cz", "Pz"]
+    assert fname.stat().st_mtime_ns != mtime
+    raw.info["bads"] = ["Pz"]
+    raw.save(root / "derivatives" / "P01" / "P01_S2-raw.fif", overwrite=True)
+    assert compute_baseline_spectrum(root, 1)["ch_names"] == ["Fz", "Cz"]
+
+
+def test_normalize_spectrum(root):
+    """Test the normalization against the baseline."""
+    baseline = compute_baseline_spectrum(root, 1)
+    psds = np.stack([baseline["mean"][::-1], 10 * baseline["mean"][::-1]])
+    db = normalize_spectrum(psds, ["Cz", "Fz"], baseline["freqs"], baseline)
+    assert np.allclose(db[0], 0)
+    assert np.allclose(db[1], 10)
+    zscore = normalize_spectrum(
+        psds, ["Cz", "Fz"], baseline["freqs"], baseline, mode="zscore"
+    )
+    assert np.allclose(zscore[0], 0)
+    # channels missing from the baseline are set to NaN
+    db = normalize_spectrum(psds, ["Pz", "Fz"], baseline["freqs"], baseline)
+    assert np.all(np.isnan(db[:, 0])) and not np.any(np.isnan(db[:, 1]))
+
+    with pytest.raises(ValueError, match="does not match the number of channels"):
+        normalize_spectrum(psds, ["Fz"], baseline["freqs"], baseline)
+    with pytest.raises(ValueError, match="frequencies do not match"):
+        normalize_spectrum(
+            psds[..., :-1], ["Cz", "Fz"], baseline["freqs"][:-1], baseline
+        )
@@ -0,0 +1,92 @@
+"""Test connectivity.py"""
+
+import numpy as np
+import pytest
+from mne import create_info
+from mne.io import RawArray
+from scipy.signal import get_window
+
+from ..connectivity import compute_connectivity_windows
+
+
+@pytest.fixture(scope="module")
+def raw():
+    """Create a raw recording with 2 phase-lagged channels and a STI channel."""
+    rng = np.random.default_rng(101)
+    times = np.arange(6000) / 100.0
+    data = rng.standard_normal((4, times.size))
+    data[0] += 3 * np.sin(2 * np.pi * 10 * times)
+    data[1] += 3 * np.sin(2 * np.pi * 10 * times - np.pi / 2)
+    sti = np.zeros((1, times.size))
+    sti[0, [10, 3000]] = [3, 4]
+    info = create_info(["Fz", "Cz", "Pz", "Oz", "STI"], 100.0, ["eeg"] * 4 + ["stim"])
+    return RawArray(np.vstack((data * 1e-6, sti)), info)
+
+
+def test_compute_connectivity_windows(raw):
+    """Test connectivity averaged per chunk."""
+    conn, freqs, groups, n_windows = compute_connectivity_windows(
+        raw, duration=2.0, overlap=1.0, chunk_duration=30.0, fmin=5.0, fmax=15.0
+    )
+    assert sorted(conn) == ["coh", "imcoh", "wpli"]
+    assert conn["coh"].shape == (2, 4, 4, freqs.size)
+    assert np.allclose(groups, (0.0, 30.0))
+    assert np.array_equal(n_windows, (30, 29))
+    assert np.allclose(np.diagonal(conn["coh"], axis1=1, axis2=2), 1)
+    assert np.allclose(np.diagonal(conn["imcoh"], axis1=1, axis2=2), 0)
+    assert np.allclose(conn["coh"], conn["coh"].transpose(0, 2, 1, 3))
+    assert np.allclose(conn["imcoh"], -conn["imcoh"].transpose(0, 2, 1, 3))
+
+    # phase-lagged channels are coupled at 10 Hz
+    idx = np.where(freqs == 10)[0][0]
+    assert np.all(0.9 < conn["coh"][:, 0, 1, idx])
+    assert np.all(0.9 < np.abs(conn["imcoh"][:, 0, 1, idx]))
+    assert np.all(0.9 < conn["wpli"][:, 0, 1, idx])
+    assert np.all(conn["coh"][:, 2, 3, idx] < 0.5)
+
+    # compare coherence of the first chunk with a pair by pair computation
+    window = get_window("hamming", 200)
+    spectra = list()
+    for onset in range(0, 3000, 100):
+        x = raw.get_data(picks=[0, 2], start=onset, stop=onset + 200)
+        x = (x - x.mean(axis=-1, keepdims=True)) * window
+        spectra.append(np.fft.rfft(x)[:, 10:31])
+    spectra = np.array(spectra)
+    sxy = np.mean(spectra[:, 0] * spectra[:, 1].conj(), axis=0)
+    sxx = np.mean(np.abs(spectra[:, 0]) ** 2, axis=0)
+    syy = np.mean(np.abs(spectra[:, 1]) ** 2, axis=0)
+    assert np.allclose(conn["coh"][0, 0, 2], np.abs(sxy) / np.sqrt(sxx * syy))
+
+
+def test_connectivity_condition_float32(raw):
+    """Test connectivity averaged per condition with the float32 path."""
+    conn, _, groups, n_windows = compute_connectivity_windows(
+        raw, duration=2.0, overlap=1.0, method="coh", average="condition"
+    )
+    assert list(conn) == ["coh"]
+    assert np.array_equal(groups, (3, 4))
+    # the windows before the first event or overlapping 2 events are dropped
+    assert np.array_equal(n_windows, (28, 29))
+    conn32, _, _, _ = compute_connectivity_windows(
+        raw,
+        duration=2.0,
+        overlap=1.0,
+        method="coh",
+        average="condition",
+        dtype=np.float32,
+        batch_size=7,
+    )
+    assert conn32["coh"].dtype == np.float32
+    assert np.allclose(conn["coh"], conn32["coh"], atol=1e-4)
+
+
+def test_invalid_arguments(raw):
+    """Test invalid arguments."""
+    with pytest.raises(ValueError, match="Invalid value"):
+        compute_connectivity_windows(raw, method="pli")
+    with pytest.raises(ValueError, match="Invalid value"):
+        compute_connectivity_windows(raw, average="epochs")
+    with pytest.raises(ValueError, match="Invalid value"):
+        compute_connectivity_windows(raw, dtype=np.int32)
+    with pytest.raises(ValueError, match="chunk_duration"):
+        compute_connectivity_windows(raw, chunk_duration=1.0)
@@ -0,0 +1,65 @@
+"""Test envelope.py"""
+
+import numpy as np
+import pytest
+from mne import create_info
+from mne.io import RawArray
+
+from ..envelope import compute_band_envelopes
+
+
+@pytest.fixture(scope="module")
+def raw():
+    """Create a raw recording with an amplitude modulated alpha oscillation."""
+    times = np.arange(30000) / 250.0
+    envelope = 1 + 0.5 * np.sin(2 * np.pi * 0.2 * times)
+    data = np.vstack(
+        (
+            envelope * np.sin(2 * np.pi * 10 * times),
+            2 * np.sin(2 * np.pi * 20 * times),
+        )
+    )
+    info = create_info(["Fz", "Cz"], 250.0, "eeg")
+    return RawArray(data, info)
+
+
+def test_compute_band_envelopes(raw):
+    """Test the envelopes of a modulated oscillation."""
+    envelopes, times = compute_band_envelopes(raw)
+    # default decimation keeps the output rate above twice the beta edge (30 Hz)
+    assert envelopes.shape == (4, 2, times.size)
+    assert np.allclose(np.diff(times), 1 / 62.5)
+    expected = 1 + 0.5 * np.sin(2 * np.pi * 0.2 * times)
+    interior = slice(500, -500)
+    assert np.allclose(envelopes[2, 0, interior], expected[interior], atol=0.02)
+    assert np.allclose(envelopes[3, 1, interior], 2, atol=0.02)
+    assert np.all(envelopes[(0, 1, 3), 0, interior] < 0.05)
+    assert np.all(envelopes[(0, 1, 2), 1, interior] < 0.05)
+
+
+def test_decimation_and_chunking(raw):
+    """Test that decimation and chunking do not change the envelopes."""
+    bands = dict(alpha=(8.0, 13.0), beta=(13.0, 30.0))
+    envelopes, times = compute_band_envelopes(raw, bands, decim=1)
+    envelopes_decim, times_decim = compute_band_envelopes(raw, bands, decim=5)
+    assert np.allclose(times_decim, times[::5])
+    # only the stopband leakage outside the baseband spectrum is dropped
+    assert np.allclose(envelopes_decim, envelopes[:, :, ::5], atol=1e-3)
+    out = np.zeros_like(envelopes_decim)
+    envelopes_chunk, _ = compute_band_envelopes(
+        raw, bands, decim=5, n_fft=1000, out=out
+    )
+    assert envelopes_chunk is out
+    assert np.allclose(envelopes_chunk, envelopes_decim, atol=1e-3)
+
+
+def test_invalid_arguments(raw):
+    """Test invalid arguments."""
+    with pytest.raises(ValueError, match="too large for the band 'beta'"):
+        compute_band_envelopes(raw, decim=20)
+    with pytest.raises(ValueError, match="multiple of the decimation factor"):
+        compute_band_envelopes(raw, decim=4, n_fft=1001)
+    with pytest.raises(ValueError, match="Nyquist"):
+        compute_band_envelopes(raw, bands=dict(gamma=(30.0, 200.0)))
+    with pytest.raises(ValueError, match="expected"):
+        compute_band_envelopes(raw, out=np.empty((1, 2, 3)))
@@ -0,0 +1,109 @@
+"""Test psd.py"""
+
+import numpy as np
+import pytest
+from mne import Annotations, create_info
+from mne.io import RawArray
+from mne.time_frequency import psd_array_multitaper, psd_array_welch
+
+from ..psd import _get_dpss, compute_psd_windows
+
+
+@pytest.fixture(scope="module")
+def raw():
+    """Create a random raw recording."""
+    rng = np.random.default_rng(101)
+    info = create_info(["Fz", "Cz", "Pz", "Oz"], 100.0, "eeg")
+    return RawArray(rng.standard_normal((4, 3000)) * 1e-6, info)
+
+
+@pytest.mark.parametrize("method", ("welch", "multitaper"))
+def test_compute_psd_windows(raw, method):
+    """Test the windowed PSD against MNE."""
+    psds, freqs, times = compute_psd_windows(
+        raw, duration=2.0, overlap=1.0, method=method, fmin=1.0, fmax=30.0
+    )
+    assert psds.shape == (29, 4, freqs.size)
+    assert freqs[0] == 1.0 and freqs[-1] == 30.0
+    assert np.allclose(times, np.arange(29))
+
+    data = raw.get_data()[:, 500:700]
+    if method == "welch":
+        expected, freqs_mne = psd_array_welch(
+            data, 100.0, fmin=1.0, fmax=30.0, n_fft=200, verbose=False
+        )
+    else:
+        expected, freqs_mne = psd_array_multitaper(
+            data, 100.0, fmin=1.0, fmax=30.0, normalization="full", verbose=False
+        )
+    assert np.allclose(freqs, freqs_mne)
+    assert np.allclose(psds[5], expected)
+
+    # the batch size does not change the result
+    psds2, _, _ = compute_psd_windows(
+        raw,
+        duration=2.0,
+        overlap=1.0,
+        method=method,
+        fmin=1.0,
+        fmax=30.0,
+        batch_size=3,
+    )
+    assert np.allclose(psds, psds2)
+
+
+@pytest.mark.parametrize("method", ("welch", "multitaper"))
+def test_compute_psd_windows_float32(raw, method):
+    """Test the deviation of the single precision PSD from the double one."""
+    psds, _, _ = compute_psd_windows(raw, method=method, fmin=1.0, fmax=30.0)
+    psds32, _, _ = compute_psd_windows(
+        raw, method=method, fmin=1.0, fmax=30.0, dtype="float32"
+    )
+    assert psds32.dtype == np.float32
+    assert np.allclose(psds32, psds, rtol=1e-4, atol=0)
+
+    # the recording can be in float32 as well
+    raw32 = raw.copy()
+    raw32._data = raw32._data.astype(np.float32)
+    psds32_, _, _ = compute_psd_windows(
+        raw32, method=method, fmin=1.0, fmax=30.0, dtype="float32"
+    )
+    assert np.allclose(psds32_, psds, rtol=1e-4, atol=0)
+
+
+def test_dpss_cache(raw):
+    """Test that the DPSS tapers are computed once."""
+    _get_dpss.cache_clear()
+    for _ in range(3):
+        compute_psd_windows(raw, method="multitaper", bandwidth=2.0)
+    assert _get_dpss.cache_info().misses == 1
+    assert _get_dpss.cache_info().hits == 2
+    tapers, _ = _get_dpss(200, 2.0)
+    assert not tapers.flags.writeable
+
+
+def test_reject_by_annotation(raw):
+    """Test that windows overlapping bad segments are dropped."""
+    raw = raw.copy()
+    raw.set_annotations(Annotations(onset=[10.5], duration=[1.0], description="bad"))
+    _, _, times = compute_psd_windows(raw, duration=2.0, overlap=1.0)
+    assert times.size == 29 - 3
+    assert not np.any((9 <= times) & (times <= 11))
+    _, _, times = compute_psd_windows(
+        raw, duration=2.0, overlap=1.0, reject_by_annotation=False
+    )
+    assert times.size == 29
+
+
+def test_invalid_arguments(raw):
+    """Test invalid arguments."""
+    with pytest.raises(ValueError, match="Invalid value"):
+        compute_psd_windows(raw, method="101")
+    with pytest.raises(ValueError, match="precise number of samples"):
+        compute_psd_windows(raw, duration=1.005)
+    with pytest.raises(ValueError, match="strictly smaller than the duration"):
+        compute_psd_windows(raw, duration=1.0, overlap=1.0)
+    with pytest.raises(ValueError, match="half-bandwidth"):
+        compute_psd_windows(raw, method="multitaper", bandwidth=0.1)
+    with pytest.raises(ValueError, match="No frequency found"):
+        compute_psd_windows(raw, fmin=10.1, fmax=10.2)
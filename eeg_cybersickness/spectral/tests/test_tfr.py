@@ -0,0 +1,70 @@
+"""Test tfr.py"""
+
+import numpy as np
+import pytest
+from mne import Annotations, create_info
+from mne.io import RawArray
+from mne.time_frequency import tfr_array_morlet
+
+from ...triggers import load_triggers
+from ..tfr import compute_rotation_tfr
+
+
+@pytest.fixture(scope="module")
+def raw():
+    """Create a random raw recording with rotation triggers."""
+    rng = np.random.default_rng(101)
+    triggers = load_triggers()
+    data = rng.standard_normal((3, 20000)) * 1e-6
+    sti = np.zeros((1, data.shape[1]))
+    onsets = np.arange(500, 18500, 1000)
+    sti[0, onsets] = [triggers["pitch"], triggers["pitch_roll"]] * (onsets.size // 2)
+    info = create_info(["Fz", "Cz", "Pz", "STI"], 250.0, ["eeg"] * 3 + ["stim"])
+    return RawArray(np.vstack((data, sti)), info)
+
+
+def test_compute_rotation_tfr(raw, tmp_path):
+    """Test the rotation-locked TFR against MNE."""
+    freqs = np.arange(4.0, 30.0, 2.0)
+    tfrs = compute_rotation_tfr(
+        raw, freqs, n_cycles=freqs / 2, tmin=-0.5, tmax=1.5, decim=3, batch_size=4
+    )
+    assert sorted(tfrs) == ["pitch", "pitch_roll"]
+    assert tfrs["pitch"].nave == 9 and tfrs["pitch_roll"].nave == 9
+    assert tfrs["pitch"].data.shape == (3, freqs.size, 167)
+    assert np.isclose(tfrs["pitch"].times[0], -0.5)
+
+    # compare with MNE on the preloaded epochs
+    data = raw.get_data(picks="eeg")
+    epochs = np.array([data[:, on - 125 : on + 376] for on in range(500, 18500, 2000)])
+    expected = tfr_array_morlet(
+        epochs, 250.0, freqs, n_cycles=freqs / 2, output="avg_power", decim=3
+    )
+    assert np.allclose(tfrs["pitch"].data, expected)
+
+    # written to disk
+    fname = tmp_path / "tfr.npy"
+    tfrs_disk = compute_rotation_tfr(
+        raw, freqs, n_cycles=freqs / 2, tmin=-0.5, tmax=1.5, decim=3, fname=fname
+    )
+    stored = np.load(fname)
+    assert stored.shape == (2, 3, freqs.size, 167)
+    assert np.allclose(stored[0], tfrs["pitch"].data)
+    assert np.allclose(tfrs_disk["pitch_roll"].data, tfrs["pitch_roll"].data)
+
+
+def test_rotation_tfr_rejection(raw):
+    """Test that epochs overlapping bad segments are dropped."""
+    raw = raw.copy()
+    raw.set_annotations(Annotations(onset=[2.1], duration=[0.5], description="bad"))
+    tfrs = compute_rotation_tfr(raw, [10.0], tmin=-0.2, tmax=0.5)
+    assert tfrs["pitch"].nave == 8
+    tfrs = compute_rotation_tfr(
+        raw, [10.0], tmin=-0.2, tmax=0.5, reject_by_annotation=False
+    )
+    assert tfrs["pitch"].nave == 9
+
+    with pytest.raises(ValueError, match="should end with '.npy'"):
+        compute_rotation_tfr(raw, [10.0], fname="tfr.h5")
+    with pytest.raises(RuntimeError, match="No rotation epoch"):
+        compute_rotation_tfr(raw, [10.0], event_id=dict(yaw=5))
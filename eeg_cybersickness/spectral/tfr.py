@@ -0,0 +1,188 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from mne import find_events, pick_info
+from mne.io import BaseRaw
+from mne.io.pick import _picks_to_idx
+from mne.time_frequency import AverageTFR, morlet
+from scipy.fft import fft, ifft, next_fast_len
+
+from ..triggers import load_triggers
+from ..triggers.config import _ROTATIONS
+from ..utils._checks import _ensure_int, check_type, ensure_path
+from ..utils._docs import fill_doc
+from ..utils._windows import _batch_size, _drop_bad_windows, _iter_segment_batches
+from ..utils.logs import logger
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Dict, Optional, Union
+
+    from numpy.typing import ArrayLike
+
+
+@fill_doc
+def compute_rotation_tfr(
+    raw: BaseRaw,
+    freqs: ArrayLike,
+    n_cycles: Union[float, ArrayLike] = 7.0,
+    tmin: float = -0.5,
+    tmax: float = 2.0,
+    decim: int = 1,
+    event_id: Optional[Dict[str, int]] = None,
+    picks="eeg",
+    reject_by_annotation: bool = True,
+    fname: Optional[Union[str, Path]] = None,
+    batch_size: Optional[int] = None,
+) -> Dict[str, AverageTFR]:
+    """Compute the average Morlet power locked to the rotation onsets.
+
+    The epochs are gathered in batches from the raw recording and convolved
+    with the wavelets in the frequency domain. The power is decimated as it is
+    computed and summed in a running average per condition, thus the power of
+    individual epochs is never stored.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording with a synthetic STI channel.
+    freqs : array-like of shape (n_freqs,)
+        Frequencies of the wavelets in Hz.
+    n_cycles : float | array-like of shape (n_freqs,)
+        Number of cycles of the wavelets.
+    tmin : float
+        Start of the epochs in seconds, relative to the rotation onset.
+    tmax : float
+        End of the epochs in seconds, relative to the rotation onset.
+    decim : int
+        Decimation factor applied to the power.
+    event_id : dict | None
+        The key is the name of a condition and the value is its trigger code on
+        the synthetic STI channel. If None, the rotation triggers from
+        :func:`~eeg_cybersickness.triggers.load_triggers` are used.
+    %(picks)s
+    reject_by_annotation : bool
+        If True, epochs overlapping an annotation whose description starts with
+        ``"bad"`` are dropped.
+    fname : path-like | None
+        Path to a ``.npy`` file in which the average power of all conditions is
+        written, as an array of shape (n_conditions, n_channels, n_freqs,
+        n_times). If provided, the average power is written to disk one chunk
+        of frequencies at a time and the returned ``AverageTFR`` are backed by
+        the memory-mapped file.
+    %(batch_size)s
+
+    Returns
+    -------
+    tfrs : dict
+        The key is the name of the condition and the value is the
+        ``AverageTFR`` of that condition. Conditions without any epoch are
+        omitted.
+
+    Notes
+    -----
+    The wavelets and the convolution match
+    :func:`mne.time_frequency.tfr_array_morlet` with ``output="power"``. The
+    frequencies are processed in chunks, which bounds the memory usage
+    independently of the number of frequencies.
+    """
+    check_type(raw, (BaseRaw,), "raw")
+    sfreq = raw.info["sfreq"]
+    freqs = np.atleast_1d(np.asarray(freqs, dtype=float))
+    if freqs.ndim != 1 or np.any(freqs <= 0):
+        raise ValueError("Argument 'freqs' should be a 1D array of positive numbers.")
+    check_type(tmin, ("numeric",), "tmin")
+    check_type(tmax, ("numeric",), "tmax")
+    if tmax <= tmin:
+        raise ValueError(
+            f"Argument 'tmax' ({tmax}) should be larger than 'tmin' ({tmin})."
+        )
+    decim = _ensure_int(decim, "decim")
+    if decim <= 0:
+        raise ValueError(
+            f"Argument 'decim' should be a strictly positive integer. {decim} is "
+            "invalid."
+        )
+    check_type(reject_by_annotation, (bool,), "reject_by_annotation")
+    if event_id is None:
+        triggers = load_triggers()
+        event_id = {key: triggers[key] for key in _ROTATIONS}
+    check_type(event_id, (dict,), "event_id")
+    picks = _picks_to_idx(raw.info, picks, exclude="bads")
+
+    # select the epochs
+    events = find_events(raw, stim_channel="STI")
+    events = events[np.isin(events[:, 2], list(event_id.values()))]
+    offset = int(np.round(tmin * sfreq))
+    n_times = int(np.round((tmax - tmin) * sfreq)) + 1
+    onsets = events[:, 0] - raw.first_samp + offset
+    if reject_by_annotation:
+        good = _drop_bad_windows(raw, onsets, n_times)
+    else:
+        good = onsets[(0 <= onsets) & (onsets + n_times <= raw.n_times)]
+    valid = np.isin(onsets, good)
+    onsets, codes = onsets[valid], events[valid, 2]
+    if onsets.size == 0:
+        raise RuntimeError("No rotation epoch was found in the recording.")
+    conditions = {
+        name: code for name, code in event_id.items() if np.any(codes == code)
+    }
+    labels = np.argmax(codes[:, np.newaxis] == list(conditions.values()), axis=1)
+    nave = np.bincount(labels, minlength=len(conditions))
+    logger.info(
+        "Computing the Morlet power of %i epochs in %i conditions.",
+        onsets.size,
+        len(conditions),
+    )
+
+    # precompute the wavelets and their FFTs
+    wavelets = morlet(sfreq, freqs, n_cycles=n_cycles, zero_mean=False)
+    n_fft = next_fast_len(n_times + max(w.size for w in wavelets) - 1)
+    times_idx = np.arange(0, n_times, decim)
+    times = (offset + times_idx) / sfreq
+    # index of the output samples in the full convolution, per wavelet
+    indices = np.array([(w.size - 1) // 2 + times_idx for w in wavelets])
+
+    # allocate the output
+    shape = (len(conditions), picks.size, freqs.size, times.size)
+    if fname is None:
+        power = np.zeros(shape)
+    else:
+        fname = ensure_path(fname, must_exist=False)
+        if fname.suffix != ".npy":
+            raise ValueError(
+                f"Argument 'fname' should end with '.npy'. '{fname.name}' is invalid."
+            )
+        power = np.lib.format.open_memmap(fname, mode="w+", dtype=float, shape=shape)
+
+    # process the frequencies in chunks, the average power of a chunk is complete
+    # once all epochs have been processed
+    n_freqs_chunk = _batch_size(len(conditions) * picks.size * times.size * 8)
+    n_freqs_chunk = min(n_freqs_chunk, freqs.size)
+    if batch_size is None:
+        batch_size = _batch_size(picks.size * n_freqs_chunk * n_fft * 16)
+    for k in range(0, freqs.size, n_freqs_chunk):
+        fsl = slice(k, min(k + n_freqs_chunk, freqs.size))
+        fft_wavelets = np.array([fft(w, n_fft) for w in wavelets[fsl]])
+        accumulator = np.zeros(shape[:2] + (fft_wavelets.shape[0], times.size))
+        for sl, data in _iter_segment_batches(raw, picks, onsets, n_times, batch_size):
+            tfr = ifft(
+                fft(data, n_fft, axis=-1)[:, :, np.newaxis, :] * fft_wavelets, axis=-1
+            )
+            tfr = np.take_along_axis(tfr, indices[np.newaxis, np.newaxis, fsl], axis=-1)
+            tfr = tfr.real**2 + tfr.imag**2
+            for label in np.unique(labels[sl]):
+                accumulator[label] += tfr[labels[sl] == label].sum(axis=0)
+        power[:, :, fsl] = accumulator / nave[:, np.newaxis, np.newaxis, np.newaxis]
+        if fname is not None:
+            power.flush()
+
+    info = pick_info(raw.info, picks)
+    return {
+        name: AverageTFR(
+            info, power[k], times, freqs, nave[k], comment=name, method="morlet-power"
+        )
+        for k, name in enumerate(conditions)
+    }
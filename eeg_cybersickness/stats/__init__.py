@@ -0,0 +1,3 @@
+"""Statistics module."""
+
+from .glm import fit_glm  # noqa: F401
@@ -0,0 +1,149 @@
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from scipy.stats import t as t_dist
+
+from ..utils._checks import _ensure_int, check_type
+from ..utils._windows import _batch_size
+from ..utils.logs import logger
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional
+
+    from numpy.typing import ArrayLike
+
+
+def fit_glm(
+    design: ArrayLike,
+    data: ArrayLike,
+    contrasts: Optional[Dict[str, ArrayLike]] = None,
+    names: Optional[List[str]] = None,
+    chunk_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Fit a linear model to every response with a shared design matrix.
+
+    All the responses, e.g. every channel, band and window of a feature
+    tensor, are fitted with a single pseudo-inverse of the design matrix. The
+    observations are read in chunks of contiguous rows, once to accumulate the
+    coefficients and once to accumulate the residual sum of squares, thus
+    ``data`` can be a memory-mapped array larger than the memory.
+
+    Parameters
+    ----------
+    design : array of shape (n_observations, n_regressors)
+        Design matrix shared by all the responses, including the intercept
+        column if any.
+    data : array of shape (n_observations, ...)
+        Responses, with the observations on the first axis. The other axes are
+        fitted independently.
+    contrasts : dict | None
+        The key is the name of a contrast and the value is its weight vector of
+        shape (n_regressors,). If None, each regressor is tested against 0.
+    names : list of str | None
+        Name of each regressor, used to name the default contrasts. If None,
+        the regressors are named ``"x0"``, ``"x1"``, ...
+    chunk_size : int | None
+        Number of observations read together. Only a chunk of observations is
+        held in memory at once, in addition to the outputs. If None, the chunk
+        size is chosen to keep the intermediate arrays below 64 MiB.
+
+    Returns
+    -------
+    glm : dict
+        Fitted model with the keys:
+
+        - ``"beta"``: array of shape (n_regressors, ...), regression
+          coefficients.
+        - ``"t"``: array of shape (n_contrasts, ...), t-statistic of each
+          contrast.
+        - ``"p"``: array of shape (n_contrasts, ...), two-sided p-value of each
+          contrast.
+        - ``"contrasts"``: list of the names of the contrasts.
+        - ``"dof"``: residual degrees of freedom.
+
+    Notes
+    -----
+    A response with a missing value (NaN) in any observation yields NaN
+    coefficients and statistics. The p-values are not corrected for the
+    multiple comparisons.
+    """
+    design = np.asarray(design, dtype=float)
+    if design.ndim != 2:
+        raise ValueError(
+            "Argument 'design' should be a 2D array of shape (n_observations, "
+            f"n_regressors). The shape {design.shape} is invalid."
+        )
+    n_observations, n_regressors = design.shape
+    if not isinstance(data, np.ndarray):
+        data = np.asarray(data, dtype=float)
+    if data.shape[0] != n_observations:
+        raise ValueError(
+            f"The number of observations in 'data' ({data.shape[0]}) does not "
+            f"match the number of rows of 'design' ({n_observations})."
+        )
+    rank = np.linalg.matrix_rank(design)
+    dof = n_observations - rank
+    if dof <= 0:
+        raise ValueError(
+            f"The design matrix of rank {rank} leaves no residual degree of freedom "
+            f"with {n_observations} observations."
+        )
+    if rank < n_regressors:
+        logger.warning(
+            "The design matrix is rank deficient (rank %i < %i regressors).",
+            rank,
+            n_regressors,
+        )
+    if names is None:
+        names = [f"x{k}" for k in range(n_regressors)]
+    check_type(names, (list, tuple), "names")
+    if len(names) != n_regressors:
+        raise ValueError(
+            f"The number of names ({len(names)}) does not match the number of "
+            f"regressors ({n_regressors})."
+        )
+    if contrasts is None:
+        contrasts = {name: np.eye(n_regressors)[k] for k, name in enumerate(names)}
+    check_type(contrasts, (dict,), "contrasts")
+    weights = np.array([np.asarray(c, dtype=float) for c in contrasts.values()])
+    if weights.shape != (len(contrasts), n_regressors):
+        raise ValueError(
+            f"Each contrast should have {n_regressors} weights, one per regressor."
+        )
+
+    # the pseudo-inverse and the contrast variances are shared by all responses
+    pinv = np.linalg.pinv(design)
+    variance = np.einsum("cr,rs,cs->c", weights, pinv @ pinv.T, weights)
+    shape = data.shape[1:]
+    data = data.reshape(n_observations, -1)
+    n_responses = data.shape[1]
+    if chunk_size is None:
+        chunk_size = _batch_size(3 * n_responses * 8)
+    chunk_size = _ensure_int(chunk_size, "chunk_size")
+    if chunk_size <= 0:
+        raise ValueError(
+            "Argument 'chunk_size' should be a strictly positive integer. "
+            f"{chunk_size} is invalid."
+        )
+    # the chunks are contiguous rows, e.g. of a memory-mapped array in C order
+    beta = np.zeros((n_regressors, n_responses))
+    for start in range(0, n_observations, chunk_size):
+        sl = slice(start, min(start + chunk_size, n_observations))
+        beta += pinv[:, sl] @ np.asarray(data[sl], dtype=float)
+    rss = np.zeros(n_responses)
+    for start in range(0, n_observations, chunk_size):
+        sl = slice(start, min(start + chunk_size, n_observations))
+        residuals = np.asarray(data[sl], dtype=float) - design[sl] @ beta
+        rss += np.einsum("or,or->r", residuals, residuals)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = (weights @ beta) / np.sqrt(variance[:, np.newaxis] * rss / dof)
+    p = 2 * t_dist.sf(np.abs(t), dof)
+    return dict(
+        beta=beta.reshape(n_regressors, *shape),
+        t=t.reshape(len(contrasts), *shape),
+        p=p.reshape(len(contrasts), *shape),
+        contrasts=list(contrasts),
+        dof=dof,
+    )
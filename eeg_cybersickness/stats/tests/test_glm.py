@@ -0,0 +1,61 @@
+"""Test glm.py"""
+
+import numpy as np
+import pytest
+from scipy.stats import linregress
+
+from ..glm import fit_glm
+
+
+def test_fit_glm(tmp_path):
+    """Test the batched least-squares against a fit per response."""
+    rng = np.random.default_rng(101)
+    n_observations = 40
+    rating = rng.standard_normal(n_observations)
+    condition = np.repeat([0.0, 1.0], n_observations // 2)
+    design = np.column_stack((np.ones(n_observations), rating, condition))
+    data = rng.standard_normal((n_observations, 5, 4, 3))
+    data[:, 0, 0, 0] += 2 * rating
+    glm = fit_glm(design, data, names=["intercept", "rating", "condition"])
+    assert glm["beta"].shape == (3, 5, 4, 3)
+    assert glm["t"].shape == glm["p"].shape == (3, 5, 4, 3)
+    assert glm["contrasts"] == ["intercept", "rating", "condition"]
+    assert glm["dof"] == n_observations - 3
+    beta, *_ = np.linalg.lstsq(design, data.reshape(n_observations, -1), rcond=None)
+    assert np.allclose(glm["beta"].reshape(3, -1), beta)
+    assert glm["p"][1, 0, 0, 0] < 1e-6
+    assert 0.01 < np.median(glm["p"][1])
+
+    # single regressor against scipy
+    glm = fit_glm(design[:, :2], data[:, :, 0, 0])
+    for k in range(5):
+        result = linregress(rating, data[:, k, 0, 0])
+        assert np.isclose(glm["beta"][1, k], result.slope)
+        assert np.isclose(glm["t"][1, k], result.slope / result.stderr)
+        assert np.isclose(glm["p"][1, k], result.pvalue)
+
+    # chunked mode on a memory-mapped array
+    fname = tmp_path / "data.npy"
+    np.save(fname, data.astype(np.float32))
+    data[3, 1, 2, 0] = np.nan
+    contrasts = {"difference": [0, 1, -1]}
+    glm = fit_glm(design, data, contrasts=contrasts)
+    assert np.all(np.isnan(glm["t"][:, 1, 2, 0]))
+    assert np.sum(np.isnan(glm["t"])) == 1
+    memmap = np.load(fname, mmap_mode="r")
+    glm = fit_glm(design, memmap, contrasts=contrasts)
+    # chunks of 7 and 1 observations
+    for chunk_size in (7, 1):
+        glm_chunked = fit_glm(
+            design, memmap, contrasts=contrasts, chunk_size=chunk_size
+        )
+        for key in ("beta", "t", "p"):
+            assert np.allclose(glm[key], glm_chunked[key])
+    assert glm["t"].shape == (1, 5, 4, 3)
+
+    with pytest.raises(ValueError, match="does not match the number of rows"):
+        fit_glm(design, data[1:])
+    with pytest.raises(ValueError, match="no residual degree"):
+        fit_glm(design[:2], data[:2])
+    with pytest.raises(ValueError, match="one per regressor"):
+        fit_glm(design, data, contrasts={"a": [1, 0]})
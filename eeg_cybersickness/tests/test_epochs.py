@@ -0,0 +1,44 @@
+"""Test epochs.py"""
+
+import numpy as np
+import pytest
+from mne import create_info
+from mne.io import RawArray
+
+from ..epochs import create_epochs
+from ..triggers import load_triggers
+
+
+@pytest.fixture(scope="module")
+def raw():
+    """Create a random raw recording with rotation triggers."""
+    rng = np.random.default_rng(101)
+    triggers = load_triggers()
+    data = rng.standard_normal((3, 20000)) * 1e-6
+    sti = np.zeros((1, data.shape[1]))
+    sti[0, [500, 5500, 10500, 15500]] = [
+        triggers["pitch"],
+        triggers["none"],
+        triggers["roll_yaw"],
+        triggers["none"],
+    ]
+    info = create_info(["Fz", "Cz", "Pz", "STI"], 250.0, ["eeg"] * 3 + ["stim"])
+    return RawArray(np.vstack((data, sti)), info)
+
+
+def test_create_epochs_dtype(raw):
+    """Test the deviation of the single precision epochs from the double ones."""
+    epochs = create_epochs(raw, 2.0, 1.0)
+    assert epochs.get_data().dtype == np.float64
+    assert sorted(epochs.event_id) == ["none", "pitch", "roll_yaw"]
+    epochs32 = create_epochs(raw, 2.0, 1.0, dtype="float32")
+    assert epochs32.get_data().dtype == np.float32
+    assert np.array_equal(epochs32.events, epochs.events)
+    assert np.allclose(epochs32.get_data(), epochs.get_data(), rtol=1e-6, atol=0)
+
+    # the recording can be in float32 as well
+    raw32 = raw.copy()
+    raw32._data = raw32._data.astype(np.float32)
+    epochs32 = create_epochs(raw32, 2.0, 1.0, dtype="float32")
+    assert epochs32.get_data().dtype == np.float32
+    assert np.allclose(epochs32.get_data(), epochs.get_data(), rtol=1e-6, atol=0)
@@ -0,0 +1,72 @@
+"""Test evoked.py"""
+
+import numpy as np
+import pytest
+from mne import Annotations, Epochs, create_info, find_events, read_evokeds
+from mne.io import RawArray
+
+from ..evoked import compute_evokeds
+from ..triggers import load_triggers
+
+
+@pytest.fixture(scope="module")
+def raw():
+    """Create a random raw recording with rotation triggers."""
+    rng = np.random.default_rng(101)
+    triggers = load_triggers()
+    data = rng.standard_normal((3, 20000)) * 1e-6
+    sti = np.zeros((1, data.shape[1]))
+    onsets = np.arange(500, 19500, 1000)
+    codes = [
+        triggers["pitch"],
+        triggers["none"],
+        triggers["roll_yaw"],
+        triggers["none"],
+    ]
+    sti[0, onsets] = codes * (onsets.size // 4) + codes[: onsets.size % 4]
+    data[
+        :, onsets[sti[0, onsets] == triggers["pitch"], np.newaxis] + np.arange(50, 100)
+    ] += 5e-6
+    info = create_info(["Fz", "Cz", "Pz", "STI"], 250.0, ["eeg"] * 3 + ["stim"])
+    return RawArray(np.vstack((data, sti)), info)
+
+
+def test_compute_evokeds(raw, tmp_path):
+    """Test the streaming evoked responses against MNE."""
+    evokeds = compute_evokeds(raw, batch_size=3)
+    assert sorted(evokeds) == ["none", "pitch", "roll_yaw"]
+    assert evokeds["none"].nave == 9
+    assert evokeds["pitch"].data.shape == (3, 626)
+    assert evokeds["pitch"].baseline == (-0.5, 0.0)
+
+    events = find_events(raw, stim_channel="STI")
+    epochs = Epochs(
+        raw,
+        events,
+        load_triggers(),
+        tmin=-0.5,
+        tmax=2.0,
+        picks="eeg",
+        preload=True,
+        on_missing="ignore",
+    )
+    for name, evoked in evokeds.items():
+        assert np.allclose(evoked.data, epochs[name].average().data)
+    assert np.all(evokeds["pitch"].data[:, 175:225].mean(axis=-1) > 4e-6)
+
+    # written to disk, with a bad segment
+    fname = tmp_path / "rotation-ave.fif"
+    raw_bad = raw.copy()
+    raw_bad.set_annotations(Annotations([3.5], [0.1], "bad_segment"))
+    evokeds_bad = compute_evokeds(raw_bad, baseline=None, fname=fname)
+    assert evokeds_bad["pitch"].nave == evokeds["pitch"].nave - 1
+    stored = read_evokeds(fname)
+    assert [evoked.comment for evoked in stored] == list(evokeds_bad)
+    assert np.allclose(stored[0].data, evokeds_bad[stored[0].comment].data)
+    with pytest.raises(FileExistsError, match="already exists"):
+        compute_evokeds(raw, fname=fname)
+
+    with pytest.raises(RuntimeError, match="No epoch"):
+        compute_evokeds(raw, event_id={"yaw": load_triggers()["yaw"]})
+    with pytest.raises(ValueError, match="does not contain any sample"):
+        compute_evokeds(raw, baseline=(-2.0, -1.0))
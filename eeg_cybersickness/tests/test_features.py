@@ -0,0 +1,80 @@
+"""Test features.py"""
+
+import numpy as np
+import pytest
+from mne import Annotations, create_info
+from mne.io import RawArray, read_raw_fif
+
+from ..features import export_features, read_features
+from ..spectral import compute_psd_windows
+
+
+@pytest.fixture(scope="module")
+def root(tmp_path_factory):
+    """Create the derivatives of 2 participants with different bad channels."""
+    rng = np.random.default_rng(101)
+    root = tmp_path_factory.mktemp("features")
+    for participant, n_times, bads in ((1, 5000, []), (2, 4000, ["Cz"])):
+        data = rng.standard_normal((3, n_times)) * 1e-6
+        sti = np.zeros((1, n_times))
+        sti[0, [100, 2500]] = [1, 2]
+        info = create_info(["Fz", "Cz", "Pz", "STI"], 250.0, ["eeg"] * 3 + ["stim"])
+        raw = RawArray(np.vstack((data, sti)), info)
+        raw.info["bads"] = bads
+        if participant == 2:
+            raw.set_annotations(Annotations([4.0], [2.0], ["bad_test"]))
+        folder = root / "derivatives" / f"P0{participant}"
+        folder.mkdir(parents=True)
+        raw.save(folder / f"P0{participant}_S1-raw.fif")
+    return root
+
+
+def test_export_features(root, tmp_path):
+    """Test the export and the reading of the memory-mapped tensor."""
+    fname = tmp_path / "features.npy"
+    bands = {"theta": (4.0, 8.0), "alpha": (8.0, 13.0)}
+    features, index = export_features(
+        root, [1, 2], (1,), fname, duration=2.0, overlap=1.0, bands=bands, n_jobs=2
+    )
+    assert features.dtype == np.float32
+    assert isinstance(features, np.memmap)
+    n1 = (5000 - 500) // 250 + 1
+    n2 = (4000 - 500) // 250 + 1 - 3  # 3 windows overlap the bad segment
+    assert features.shape == (n1 + n2, 3, 2)
+    assert np.array_equal(index["participant"], [1] * n1 + [2] * n2)
+    assert np.all(index["session"] == 1)
+    assert np.allclose(index["time"][:n1], np.arange(n1))
+    assert np.all(index["condition"][1:9] == 1)
+    assert index["condition"][9] == 0  # overlaps both events
+    assert np.all(index["condition"][10:n1] == 2)
+    assert np.all(np.isnan(features[n1:, 1]))
+    assert not np.any(np.isnan(features[:n1]))
+    assert np.all((0 < features[:n1]) & (features[:n1] < 1))
+
+    # compare with the spectral module
+    features2, index2, info = read_features(fname)
+    assert np.array_equal(features, features2, equal_nan=True)
+    assert np.array_equal(index, index2)
+    assert info["ch_names"] == ["Fz", "Cz", "Pz"]
+    assert info["features"] == ["theta", "alpha"]
+    assert info["bands"] == bands
+    raw = read_raw_fif(root / "derivatives" / "P02" / "P02_S1-raw.fif")
+    psds, freqs, _ = compute_psd_windows(
+        raw, duration=2.0, overlap=1.0, fmin=4, fmax=13
+    )
+    expected = psds[:, :, (8 <= freqs)].sum(axis=-1) / psds.sum(axis=-1)
+    assert np.allclose(features[n1:, [0, 2], 1], expected, rtol=1e-5)
+
+    # the features computed in single precision
+    features32, _ = export_features(
+        root, [1, 2], (1,), tmp_path / "features32.npy", bands=bands, dtype="float32"
+    )
+    features64, _ = export_features(
+        root, [1, 2], (1,), tmp_path / "features64.npy", bands=bands
+    )
+    assert np.allclose(features32, features64, rtol=1e-4, atol=0, equal_nan=True)
+
+    with pytest.raises(FileExistsError, match="already exists"):
+        export_features(root, [1, 2], (1,), fname)
+    with pytest.raises(ValueError, match="should end with"):
+        read_features(tmp_path / "features.npz")
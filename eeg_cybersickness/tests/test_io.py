@@ -0,0 +1,54 @@
+"""Test io.py"""
+
+import numpy as np
+import pytest
+from mne import Annotations, create_info
+from mne.io import RawArray, read_raw_fif
+
+from ..io import read_raw
+
+
+@pytest.fixture
+def fname(tmp_path, monkeypatch):
+    """Replace the BrainVision and Biopac readers with synthetic recordings."""
+    rng = np.random.default_rng(101)
+    ch_names = ["Fz", "Cz", "Pz", "M1", "M2", "EOG"]
+    info = create_info(ch_names, 500.0, ["eeg"] * 5 + ["eog"])
+    raw = RawArray(rng.standard_normal((6, 20 * 500)) * 1e-5, info)
+    raw.set_annotations(Annotations([1.0], [0.0], "Stimulus/s1"))
+    fname = tmp_path / "eeg-raw.fif"
+    raw.save(fname)
+
+    def read_raw_biopac(fname):
+        """Create a Biopac recording with its onset at 2 seconds."""
+        info = create_info(
+            ["ECG", "EGG", "STI-Biopac"], 1000.0, ["ecg", "misc", "stim"]
+        )
+        data = np.zeros((3, 25 * 1000))
+        data[:2] = np.random.default_rng(102).standard_normal((2, 25 * 1000)) * 1e-3
+        data[2, 2000:2100] = 1
+        return RawArray(data, info, verbose=False)
+
+    monkeypatch.setattr(
+        "eeg_cybersickness.io.get_raw_fname", lambda *args: (fname, fname)
+    )
+    monkeypatch.setattr(
+        "eeg_cybersickness.io.read_raw_brainvision",
+        lambda fname, preload: read_raw_fif(fname, preload=preload),
+    )
+    monkeypatch.setattr("eeg_cybersickness.io._read_raw_biopac", read_raw_biopac)
+    return fname
+
+
+def test_read_raw_dtype(fname):
+    """Test the deviation of the single precision recording from the double one."""
+    raw = read_raw(fname.parent, 1, 2, None)
+    assert raw.ch_names == ["Fz", "Cz", "Pz", "ECG", "EGG", "STI"]
+    assert raw._data.dtype == np.float64
+    raw32 = read_raw(fname.parent, 1, 2, None, dtype="float32")
+    assert raw32.ch_names == raw.ch_names
+    assert raw32._data.dtype == np.float32
+    assert np.allclose(raw32._data, raw._data, rtol=1e-6, atol=0)
+    # the trigger codes are exact
+    assert np.array_equal(raw32.get_data(picks="STI"), raw.get_data(picks="STI"))
+    assert 0 < np.count_nonzero(raw32.get_data(picks="STI"))
@@ -8,7 +8,12 @@ import pandas as pd
 from mne import create_info
 from mne.io import BaseRaw, RawArray
 
-from ..utils._checks import check_rotation_axes, check_type, ensure_path
+from ..utils._checks import (
+    _check_dtype,
+    check_rotation_axes,
+    check_type,
+    ensure_path,
+)
 from ..utils._docs import fill_doc
 from ..utils.logs import logger
 from . import load_triggers
@@ -17,10 +22,16 @@ if TYPE_CHECKING:
     from pathlib import Path
     from typing import List, Optional, Tuple, Union
 
+    from mne import Info
+    from numpy.typing import NDArray
+
 
 @fill_doc
 def create_sti(
-    raw: BaseRaw, session: int, rotation_axes: Optional[Tuple[str, ...]]
+    raw: BaseRaw,
+    session: int,
+    rotation_axes: Optional[Tuple[str, ...]],
+    dtype: Union[str, np.dtype] = "float64",
 ) -> RawArray:
     """Create a synthetic trigger channel.
 
@@ -30,6 +41,7 @@ def create_sti(
         Raw recording with a ``"Stimulus/s1"`` annotation.
     %(session)s
     %(rotation_axes)s
+    %(dtype)s
 
     Returns
     -------
@@ -40,15 +52,16 @@ def create_sti(
     check_type(raw, (BaseRaw,), "raw")
     check_type(session, ("int",), "session")
     check_rotation_axes(rotation_axes, session)
+    dtype = _check_dtype(dtype)
 
     event = find_event_onset(raw, in_samples=True)
     info = create_info(["STI"], sfreq=raw.info["sfreq"], ch_types="stim")
-    data = np.zeros(shape=(1, raw.times.size))
+    data = np.zeros(shape=(1, raw.times.size), dtype=dtype)
     triggers = load_triggers()
 
     if session == 2:  # baseline
         data[0, event] = triggers["start"]
-        return RawArray(data, info)
+        return _sti_array(data, info)
 
     rotation_axes = ["None"] if rotation_axes is None else sorted(rotation_axes)
     sequence_fname = (
@@ -67,7 +80,15 @@ def create_sti(
                 "The entire rotation sequence could not be fitted in this " "recording."
             )
             break
-    return RawArray(data, info)
+    return _sti_array(data, info)
+
+
+def _sti_array(data: NDArray[float], info: Info) -> RawArray:
+    """Create the trigger channel in the dtype of the data array."""
+    sti = RawArray(data, info)
+    # RawArray casts the data to float64, the trigger codes are exact in float32
+    sti._data = sti._data.astype(data.dtype, copy=False)
+    return sti
 
 
 def _load_sequence(fname: Union[str, Path]) -> Tuple[List[int], List[float]]:
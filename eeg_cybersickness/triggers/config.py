@@ -10,6 +10,15 @@ if TYPE_CHECKING:
     from pathlib import Path
 
 _DEFAULT_TRIGGERS = files("eeg_cybersickness.triggers") / "triggers.ini"
+_ROTATIONS = (
+    "pitch",
+    "roll",
+    "yaw",
+    "pitch_roll",
+    "pitch_yaw",
+    "roll_yaw",
+    "pitch_roll_yaw",
+)
 
 
 def load_triggers(
@@ -0,0 +1,36 @@
+"""Test _create_sti.py"""
+
+import numpy as np
+import pytest
+from mne import Annotations, create_info
+from mne.io import RawArray
+
+from .. import load_triggers
+from .._create_sti import create_sti
+
+
+@pytest.fixture(scope="module")
+def raw():
+    """Create a recording of 22 minutes with the paradigm onset at 10 seconds."""
+    info = create_info(["Fz", "Cz"], 10.0, "eeg")
+    raw = RawArray(np.zeros((2, 22 * 60 * 10)), info)
+    raw.set_annotations(Annotations([10.0], [0.0], "Stimulus/s1"))
+    return raw
+
+
+def test_create_sti_dtype(raw):
+    """Test the trigger channel in single precision."""
+    triggers = load_triggers()
+    sti = create_sti(raw, 2, None, dtype="float32")
+    assert sti.get_data().shape == (1, raw.n_times)
+    assert sti._data.dtype == np.float32
+    assert np.flatnonzero(sti._data[0]).tolist() == [100]
+    # the codes are exact in single precision
+    assert sti._data[0, 100] == triggers["start"]
+
+    sti64 = create_sti(raw, 1, ("Pitch", "Yaw", "Roll"))
+    sti32 = create_sti(raw, 1, ("Pitch", "Yaw", "Roll"), dtype="float32")
+    assert sti64._data.dtype == np.float64
+    assert sti32._data.dtype == np.float32
+    assert np.array_equal(sti32._data, sti64._data)
+    assert 1 < np.count_nonzero(sti32._data)
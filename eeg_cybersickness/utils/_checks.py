@@ -246,6 +246,62 @@ def ensure_path(item: Any, must_exist: bool) -> Path:
     return item
 
 
+def _check_memory(max_memory: Any) -> int:
+    """Convert a memory budget to a number of bytes.
+
+    Parameters
+    ----------
+    max_memory : int | str
+        Memory budget in bytes, or as a string with the unit ``"K"``, ``"M"`` or
+        ``"G"`` (powers of 1024), e.g. ``"256M"``.
+
+    Returns
+    -------
+    max_memory : int
+        Memory budget in bytes.
+    """
+    check_type(max_memory, ("int", str), "max_memory")
+    if isinstance(max_memory, str):
+        units = dict(K=2**10, M=2**20, G=2**30)
+        try:
+            n_bytes = int(float(max_memory[:-1]) * units[max_memory[-1].upper()])
+        except (KeyError, ValueError, IndexError):
+            raise ValueError(
+                "Argument 'max_memory' should be a number of bytes or a string "
+                f"ending with the unit 'K', 'M' or 'G'. '{max_memory}' is invalid."
+            )
+    else:
+        n_bytes = int(max_memory)
+    if n_bytes <= 0:
+        raise ValueError(
+            f"Argument 'max_memory' should be strictly positive. {max_memory} is "
+            "invalid."
+        )
+    return n_bytes
+
+
+def _check_dtype(dtype: Any) -> np.dtype:
+    """Check that a dtype is one of the floating point types of the data.
+
+    Parameters
+    ----------
+    dtype : str | dtype
+        Floating point type, ``"float32"`` or ``"float64"``.
+
+    Returns
+    -------
+    dtype : dtype
+        The numpy dtype.
+    """
+    check_type(dtype, (str, type, np.dtype), "dtype")
+    try:
+        dtype = np.dtype(dtype)
+    except TypeError:
+        raise ValueError(f"Argument 'dtype' is not a valid dtype. {dtype} is invalid.")
+    check_value(dtype.name, ("float32", "float64"), "dtype")
+    return dtype
+
+
 @fill_doc
 def check_rotation_axes(rotation_axes: Any, session: int):
     """Check rotation_axes is valid.
@@ -48,6 +48,119 @@ rotation_axes : tuple of str
     Tuple of length (1,), (2,) or (3,) with the rotation axes used in the given
     session: "Pitch", "Yaw", "Roll"."""
 
+docdict[
+    "dtype"
+] = """
+dtype : str | dtype
+    Floating point type of the data, ``"float64"`` or ``"float32"``. In
+    ``"float32"``, the data arrays use half the memory, at the cost of a
+    relative precision of about ``1e-7`` instead of ``1e-16``."""
+
+# --------------------------------- parallel ---------------------------------
+docdict[
+    "n_jobs"
+] = """
+n_jobs : int | None
+    Number of jobs to run in parallel. ``-1`` uses all available cores. If
+    None, a single job is used unless a ``joblib.parallel_config`` context is
+    active."""
+
+# ---------------------------------- windows ----------------------------------
+docdict[
+    "picks"
+] = """
+picks : str | array-like | slice | None
+    Channels to include. Channel type strings (e.g. ``"eeg"``), channel names
+    and channel indices are accepted. Channels marked as bad are excluded."""
+
+docdict[
+    "start_stop"
+] = """
+start : float
+    Start of the first window in seconds.
+stop : float | None
+    End of the last window in seconds. If None, the windows span until the end
+    of the recording."""
+
+docdict[
+    "duration_overlap"
+] = """
+duration : float
+    Duration of each window in seconds.
+overlap : float
+    Duration of the overlap between consecutive windows in seconds.
+    Must be 0 <= overlap < duration."""
+
+docdict[
+    "reject_by_annotation"
+] = """
+reject_by_annotation : bool
+    If True, windows overlapping an annotation whose description starts with
+    ``"bad"`` are dropped."""
+
+docdict[
+    "batch_size"
+] = """
+batch_size : int | None
+    Number of windows processed together. Only a batch of windows is held in
+    memory at once. If None, the batch size is chosen to keep the intermediate
+    arrays below 64 MiB."""
+
+# -------------------------------- covariance --------------------------------
+docdict[
+    "shrinkage"
+] = """
+shrinkage : ``"ledoit_wolf"`` | float | None
+    Shrinkage of the covariance matrices towards a scaled identity matrix. If
+    ``"ledoit_wolf"``, the shrinkage coefficient of each window is estimated
+    with the Ledoit-Wolf formula. If a float between 0 and 1, the same
+    coefficient is used for all windows. If None, the empirical covariance is
+    returned."""
+
+# ------------------------------ preprocessing -------------------------------
+docdict[
+    "preprocessing"
+] = """
+l_freq : float
+    Lower pass-band edge of the filter in Hz.
+h_freq : float
+    Upper pass-band edge of the filter in Hz.
+threshold : float
+    Threshold on the robust z-score of the peak-to-peak amplitude used to
+    annotate the bad segments.
+ic_threshold : float
+    Minimum probability of the ICLabel label to exclude a component.
+max_samples : int | None
+    Maximum number of clean samples used to fit the ICA. If None, the budget is
+    set to ``40 * n_channels ** 2`` samples.
+seed : int | None
+    Seed of the random initialization of the ICA.
+cache : bool
+    If True, the fitted ICA is cached in ``derivatives/PXX/ica-cache`` under a
+    hash of its input samples and parameters, thus a rerun does not fit the
+    ICA again.
+overwrite : bool
+    If True, existing derivatives are overwritten."""
+
+docdict[
+    "max_memory"
+] = """
+max_memory : int | str
+    Memory budget of the processing, in bytes or as a string with the unit
+    ``"K"``, ``"M"`` or ``"G"``, e.g. ``"256M"``. The recording is processed in
+    blocks whose size is chosen to keep the arrays allocated for a block below
+    this budget."""
+
+docdict[
+    "decimate"
+] = """
+decimate : bool
+    If True, the recordings are decimated after the filter to the lowest
+    sampling rate, reachable by an integer decimation, of at least 3 times
+    ``h_freq``, c.f.
+    :func:`~eeg_cybersickness.preprocessing.decimate_raw`. The derivatives and
+    the downstream analyses then run on fewer samples."""
+
 # ------------------------- Documentation functions --------------------------
 docdict_indented: Dict[int, Dict[str, str]] = dict()
 
@@ -0,0 +1,85 @@
+"""Running statistics updated batch by batch."""
+
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from typing import Tuple
+
+    from numpy.typing import DTypeLike, NDArray
+
+
+class _RunningStats:
+    """Running mean and variance updated with batches of observations.
+
+    The batches are merged with the parallel variant of Welford's algorithm
+    (Chan et al., 1979), thus the observations are never stored.
+
+    Parameters
+    ----------
+    shape : tuple of int
+        Shape of a single observation.
+    dtype : dtype
+        Floating point precision of the accumulators.
+    """
+
+    def __init__(self, shape: Tuple[int, ...], dtype: DTypeLike = np.float64):
+        self._count = 0
+        self._mean = np.zeros(shape, dtype=dtype)
+        self._m2 = np.zeros(shape, dtype=dtype)
+
+    def update(self, batch: NDArray[float]) -> None:
+        """Update the statistics with a batch of observations.
+
+        Parameters
+        ----------
+        batch : array of shape (n_observations, *shape)
+            Batch of observations.
+        """
+        n_batch = batch.shape[0]
+        if n_batch == 0:
+            return
+        mean_batch = batch.mean(axis=0)
+        m2_batch = ((batch - mean_batch) ** 2).sum(axis=0)
+        count = self._count + n_batch
+        delta = mean_batch - self._mean
+        self._mean += delta * (n_batch / count)
+        self._m2 += m2_batch + delta**2 * (self._count * n_batch / count)
+        self._count = count
+
+    @property
+    def count(self) -> int:
+        """Number of observations.
+
+        :type: int
+        """
+        return self._count
+
+    @property
+    def mean(self) -> NDArray[float]:
+        """Mean of the observations.
+
+        :type: array
+        """
+        return self._mean
+
+    @property
+    def var(self) -> NDArray[float]:
+        """Unbiased variance of the observations, NaN with less than 2.
+
+        :type: array
+        """
+        if self._count < 2:
+            return np.full_like(self._m2, np.nan)
+        return self._m2 / (self._count - 1)
+
+    @property
+    def std(self) -> NDArray[float]:
+        """Unbiased standard deviation of the observations.
+
+        :type: array
+        """
+        return np.sqrt(self.var)
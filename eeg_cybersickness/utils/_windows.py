@@ -0,0 +1,336 @@
+"""Utility functions to cut continuous recordings in sliding windows."""
+
+from __future__ import annotations  # c.f. PEP 563 and PEP 649
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from mne import find_events
+from mne.annotations import _annotations_starts_stops
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ._checks import _ensure_int, check_type
+
+if TYPE_CHECKING:
+    from typing import Generator, Optional, Tuple
+
+    from mne.io import BaseRaw
+    from numpy.typing import NDArray
+
+
+def _check_window_parameters(
+    sfreq: float, duration: float, overlap: float
+) -> Tuple[int, int]:
+    """Check the window duration and overlap and convert them to samples.
+
+    Parameters
+    ----------
+    sfreq : float
+        Sampling frequency in Hz.
+    duration : float
+        Duration of each window in seconds.
+    overlap : float
+        Duration of the overlap between windows in seconds.
+        Must be 0 <= overlap < duration.
+
+    Returns
+    -------
+    n_window : int
+        Number of samples in a window.
+    n_step : int
+        Number of samples between the onsets of 2 consecutive windows.
+    """
+    check_type(duration, ("numeric",), "duration")
+    check_type(overlap, ("numeric",), "overlap")
+    if duration <= 0:
+        raise ValueError("Argument 'duration' should be a strictly positive number.")
+    if not np.isclose(sfreq * duration, np.round(sfreq * duration)):
+        raise ValueError(
+            "Argument 'duration' does not define a precise number of samples. "
+            f"{duration} seconds corresponds to {sfreq * duration} samples."
+        )
+    if overlap < 0 or duration <= overlap:
+        raise ValueError(
+            "Argument 'overlap' should be a positive number strictly smaller than "
+            f"the duration. {overlap} is invalid."
+        )
+    if not np.isclose(
+        (duration - overlap) * sfreq, np.round((duration - overlap) * sfreq)
+    ):
+        raise ValueError(
+            "Argument 'overlap' does not define a precise number of samples. "
+            f"A duration of {duration} seconds with an overlap of {overlap} seconds "
+            f"corresponds to {(duration - overlap) * sfreq} samples."
+        )
+    n_window = int(np.round(sfreq * duration))
+    n_step = int(np.round((duration - overlap) * sfreq))
+    return n_window, n_step
+
+
+def _window_onsets(
+    raw: BaseRaw,
+    start: float,
+    stop: Optional[float],
+    n_window: int,
+    n_step: int,
+    reject_by_annotation: bool,
+) -> NDArray[int]:
+    """Compute the onsets of the sliding windows.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording.
+    start : float
+        Start of the first window in seconds.
+    stop : float | None
+        End of the last window in seconds. If None, the end of the recording.
+    n_window : int
+        Number of samples in a window.
+    n_step : int
+        Number of samples between the onsets of 2 consecutive windows.
+    reject_by_annotation : bool
+        If True, windows overlapping an annotation starting with ``"bad"`` are
+        dropped.
+
+    Returns
+    -------
+    onsets : array of shape (n_windows,)
+        Onset of each window, as an index in the data array (i.e. not corrected
+        for ``raw.first_samp``).
+    """
+    check_type(start, ("numeric",), "start")
+    check_type(stop, ("numeric", None), "stop")
+    check_type(reject_by_annotation, (bool,), "reject_by_annotation")
+    istart = raw.time_as_index(start, use_rounding=True)[0]
+    istop = (
+        raw.n_times
+        if stop is None
+        else min(raw.time_as_index(stop, use_rounding=True)[0], raw.n_times)
+    )
+    onsets = np.arange(istart, istop - n_window + 1, n_step, dtype=np.int64)
+    if not reject_by_annotation:
+        return onsets
+    return _drop_bad_windows(raw, onsets, n_window)
+
+
+def _drop_bad_windows(
+    raw: BaseRaw, onsets: NDArray[int], n_window: int
+) -> NDArray[int]:
+    """Drop the windows overlapping a bad segment or the recording edges.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording.
+    onsets : array of shape (n_windows,)
+        Onset of each window, as an index in the data array.
+    n_window : int
+        Number of samples in a window.
+
+    Returns
+    -------
+    onsets : array of shape (n_good_windows,)
+        Onset of each window which does not overlap an annotation starting with
+        ``"bad"`` and which is entirely contained in the recording.
+    """
+    onsets = onsets[(0 <= onsets) & (onsets + n_window <= raw.n_times)]
+    bad_onsets, bad_ends = _annotations_starts_stops(raw, ("bad",))
+    if onsets.size == 0 or bad_onsets.size == 0:
+        return onsets
+    # cumulative count of bad samples, a window is bad if it contains any
+    mask = np.zeros(raw.n_times + 1, dtype=np.int8)
+    np.add.at(mask, np.clip(bad_onsets, 0, raw.n_times), 1)
+    np.add.at(mask, np.clip(bad_ends, 0, raw.n_times), -1)
+    count = np.concatenate(([0], np.cumsum(np.cumsum(mask[:-1]) > 0)))
+    return onsets[count[onsets + n_window] == count[onsets]]
+
+
+def _window_conditions(
+    raw: BaseRaw, onsets: NDArray[int], n_window: int
+) -> NDArray[int]:
+    """Retrieve the condition of each window from the synthetic STI channel.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording with a synthetic STI channel.
+    onsets : array of shape (n_windows,)
+        Onset of each window, as an index in the data array.
+    n_window : int
+        Number of samples in a window.
+
+    Returns
+    -------
+    conditions : array of shape (n_windows,)
+        Trigger code of the event during which the window is recorded. Windows
+        starting before the first event or overlapping 2 events are set to 0.
+    """
+    events = find_events(raw, stim_channel="STI")
+    samples = events[:, 0] - raw.first_samp
+    idx = np.searchsorted(samples, onsets, side="right") - 1
+    idx_end = np.searchsorted(samples, onsets + n_window - 1, side="right") - 1
+    conditions = np.where(0 <= idx, events[np.clip(idx, 0, None), 2], 0)
+    conditions[idx != idx_end] = 0
+    return conditions
+
+
+def _batch_size(n_bytes_per_window: int, max_bytes: int = 2**26) -> int:
+    """Compute the number of windows processed together.
+
+    Parameters
+    ----------
+    n_bytes_per_window : int
+        Size of the largest intermediate array allocated per window, in bytes.
+    max_bytes : int
+        Memory budget for a batch in bytes. Default to 64 MiB.
+
+    Returns
+    -------
+    batch_size : int
+        Number of windows in a batch, at least 1.
+    """
+    return max(max_bytes // max(n_bytes_per_window, 1), 1)
+
+
+def _iter_window_batches(
+    raw: BaseRaw,
+    picks: NDArray[int],
+    onsets: NDArray[int],
+    n_window: int,
+    batch_size: int,
+) -> Generator[Tuple[slice, NDArray[float]], None, None]:
+    """Iterate over batches of windows read from the raw recording.
+
+    Only the span of data covering a batch is read from the raw recording, thus
+    the memory usage is bounded by the batch size and not by the number of
+    windows. If the onsets of a batch are regularly spaced, the windows are a
+    read-only strided view on the span of data, thus the overlapping samples
+    are not duplicated. Otherwise, the windows are gathered in a new array.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording, preloaded or not.
+    picks : array of int
+        Indices of the channels to retrieve.
+    onsets : array of shape (n_windows,)
+        Onset of each window, as an index in the data array.
+    n_window : int
+        Number of samples in a window.
+    batch_size : int
+        Number of windows in a batch.
+
+    Yields
+    ------
+    sl : slice
+        Slice selecting the windows of the batch in ``onsets``.
+    data : array of shape (n_batch, n_channels, n_window)
+        Data of the windows in the batch, possibly a read-only view which
+        should not be modified in-place.
+    """
+    batch_size = _ensure_int(batch_size, "batch_size")
+    if batch_size <= 0:
+        raise ValueError(
+            "Argument 'batch_size' should be a strictly positive integer. "
+            f"{batch_size} is invalid."
+        )
+    for k in range(0, onsets.size, batch_size):
+        sl = slice(k, min(k + batch_size, onsets.size))
+        start = onsets[sl][0]
+        stop = onsets[sl][-1] + n_window
+        data = raw.get_data(picks, start=start, stop=stop)
+        # (n_channels, n_samples) -> (n_channels, n_samples - n_window + 1, n_window)
+        view = sliding_window_view(data, n_window, axis=-1)
+        steps = np.diff(onsets[sl])
+        if steps.size == 0 or np.all(steps == steps[0]):
+            # regular onsets: strided view on the samples, without copy
+            view = view[:, :: 1 if steps.size == 0 else steps[0]]
+        else:
+            # onsets split by rejected annotations: the windows are gathered
+            view = view[:, onsets[sl] - start]
+        yield sl, np.moveaxis(view, 1, 0)
+
+
+def _iter_segment_batches(
+    raw: BaseRaw,
+    picks: NDArray[int],
+    onsets: NDArray[int],
+    n_times: int,
+    batch_size: int,
+) -> Generator[Tuple[slice, NDArray[float]], None, None]:
+    """Iterate over batches of sparse segments read from the raw recording.
+
+    Contrary to :func:`_iter_window_batches`, the segments are not expected to
+    be contiguous, thus only the samples of each segment are retrieved. If the
+    recording is preloaded, the segments are gathered directly from the data
+    buffer.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording, preloaded or not.
+    picks : array of int
+        Indices of the channels to retrieve.
+    onsets : array of shape (n_segments,)
+        Onset of each segment, as an index in the data array. The segments must
+        be entirely contained in the recording.
+    n_times : int
+        Number of samples in a segment.
+    batch_size : int
+        Number of segments in a batch.
+
+    Yields
+    ------
+    sl : slice
+        Slice selecting the segments of the batch in ``onsets``.
+    data : array of shape (n_batch, n_channels, n_times)
+        Data of the segments in the batch.
+    """
+    batch_size = _ensure_int(batch_size, "batch_size")
+    if batch_size <= 0:
+        raise ValueError(
+            "Argument 'batch_size' should be a strictly positive integer. "
+            f"{batch_size} is invalid."
+        )
+    if raw.preload:
+        # (n_channels, n_samples) -> (n_channels, n_samples, n_times), no copy
+        view = sliding_window_view(raw._data, n_times, axis=-1)
+    for k in range(0, onsets.size, batch_size):
+        sl = slice(k, min(k + batch_size, onsets.size))
+        if raw.preload:
+            data = view[picks[np.newaxis, :], onsets[sl, np.newaxis]]
+        else:
+            data = np.array(
+                [raw.get_data(picks, start=on, stop=on + n_times) for on in onsets[sl]]
+            )
+        yield sl, data
+
+
+def _get_data_padded(
+    raw: BaseRaw, picks: NDArray[int], start: int, stop: int
+) -> NDArray[float]:
+    """Retrieve a block of data, padded with the edge values outside the recording.
+
+    Parameters
+    ----------
+    raw : Raw
+        Continuous recording, preloaded or not.
+    picks : array of int
+        Indices of the channels to retrieve.
+    start : int
+        Index of the first sample of the block, can be negative.
+    stop : int
+        Index of the last sample of the block (excluded), can be larger than the
+        number of samples.
+
+    Returns
+    -------
+    data : array of shape (n_channels, stop - start)
+        Data of the block.
+    """
+    data = raw.get_data(picks, start=max(start, 0), stop=min(stop, raw.n_times))
+    pad = (max(-start, 0), max(stop - raw.n_times, 0))
+    if pad != (0, 0):
+        data = np.pad(data, ((0, 0), pad), mode="edge")
+    return data
@@ -3,9 +3,12 @@
 import logging
 from pathlib import Path
 
+import numpy as np
 import pytest
 
 from .._checks import (
+    _check_dtype,
+    _check_memory,
     _ensure_int,
     check_rotation_axes,
     check_type,
@@ -115,6 +118,35 @@ def test_ensure_path():
         ensure_path(Foo(), must_exist=False)
 
 
+def test_check_memory():
+    """Test _check_memory checker."""
+    assert _check_memory(1024) == 1024
+    assert _check_memory("2K") == 2048
+    assert _check_memory("1.5m") == 3 * 2**19
+    assert _check_memory("1G") == 2**30
+
+    with pytest.raises(TypeError, match="'max_memory' must be an instance of"):
+        _check_memory(1.0)
+    with pytest.raises(ValueError, match="'256MB' is invalid"):
+        _check_memory("256MB")
+    with pytest.raises(ValueError, match="strictly positive"):
+        _check_memory(0)
+
+
+def test_check_dtype():
+    """Test _check_dtype checker."""
+    assert _check_dtype("float32") == np.float32
+    assert _check_dtype(np.float64) == np.float64
+    assert _check_dtype(np.dtype("float32")) == np.float32
+
+    with pytest.raises(TypeError, match="'dtype' must be an instance of"):
+        _check_dtype(None)
+    with pytest.raises(ValueError, match="Invalid value for the 'dtype'"):
+        _check_dtype("int16")
+    with pytest.raises(ValueError, match="not a valid dtype"):
+        _check_dtype("foo")
+
+
 def test_check_rotation_axes():
     """Test check_rotation_axes checker."""
     check_rotation_axes(("Pitch", "Yaw", "Roll"), 1)
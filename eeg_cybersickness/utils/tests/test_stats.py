@@ -0,0 +1,20 @@
+"""Test _stats.py"""
+
+import numpy as np
+
+from .._stats import _RunningStats
+
+
+def test_running_stats():
+    """Test the running mean and variance."""
+    rng = np.random.default_rng(101)
+    data = rng.normal(loc=1e3, scale=2.0, size=(1000, 3, 4))
+    stats = _RunningStats((3, 4))
+    assert np.all(np.isnan(stats.var))
+    for k in range(0, 1000, 77):
+        stats.update(data[k : k + 77])
+    stats.update(data[:0])
+    assert stats.count == 1000
+    assert np.allclose(stats.mean, data.mean(axis=0))
+    assert np.allclose(stats.var, data.var(axis=0, ddof=1))
+    assert np.allclose(stats.std, data.std(axis=0, ddof=1))
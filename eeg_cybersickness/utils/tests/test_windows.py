@@ -0,0 +1,31 @@
+"""Test _windows.py"""
+
+import numpy as np
+from mne import create_info
+from mne.io import RawArray
+
+from .._windows import _iter_window_batches
+
+
+def test_iter_window_batches():
+    """Test that the regularly spaced windows are a view on the data."""
+    data = np.random.default_rng(101).standard_normal((3, 1000))
+    raw = RawArray(data, create_info(3, 100.0, "eeg"))
+    picks = np.arange(3)
+    onsets = np.arange(0, 851, 50)  # 50% overlap
+    batches = list(_iter_window_batches(raw, picks, onsets, 100, 6))
+    assert [sl.stop - sl.start for sl, _ in batches] == [6, 6, 6]
+    for sl, windows in batches:
+        assert windows.shape == (sl.stop - sl.start, 3, 100)
+        # the overlapping windows share their samples
+        assert np.shares_memory(windows[0], windows[1])
+        assert not windows.flags.writeable
+        for k, onset in enumerate(onsets[sl]):
+            assert np.array_equal(windows[k], data[:, onset : onset + 100])
+
+    # onsets split by a rejected segment are gathered
+    onsets = np.array([0, 50, 100, 400, 450])
+    ((sl, windows),) = _iter_window_batches(raw, picks, onsets, 100, 5)
+    assert not np.shares_memory(windows[0], windows[1])
+    for k, onset in enumerate(onsets):
+        assert np.array_equal(windows[k], data[:, onset : onset + 100])
@@ -0,0 +1,66 @@
+# %% Imports
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from eeg_cybersickness.complexity.entropy import _permutation_entropy, _sample_entropy
+
+
+def sample_entropy_naive(x, m: int = 2, r: float = 0.2) -> float:
+    """Compute the sample entropy of a series by comparing all template pairs."""
+    r *= x.std()
+    n_templates = x.size - m
+    count_m, count_m1 = 0, 0
+    for i in range(n_templates):
+        for j in range(i + 1, n_templates):
+            if np.max(np.abs(x[i : i + m] - x[j : j + m])) <= r:
+                count_m += 1
+                if abs(x[i + m] - x[j + m]) <= r:
+                    count_m1 += 1
+    return -np.log(count_m1 / count_m)
+
+
+def timeit(func, *args, repeat: int = 3) -> float:
+    """Return the best execution time of a function in seconds."""
+    times = list()
+    for _ in range(repeat):
+        start = perf_counter()
+        func(*args)
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+# %% Scaling with the window length, for a batch of 64 channels
+rng = np.random.default_rng(101)
+sfreq = 250.0
+results = list()
+for duration in (1.0, 2.0, 4.0, 8.0):
+    x = rng.standard_normal((64, int(duration * sfreq)))
+    results.append(
+        dict(
+            duration=duration,
+            n_times=x.shape[1],
+            sample=timeit(_sample_entropy, x, 2, 0.2),
+            permutation=timeit(_permutation_entropy, x, 3, 1),
+            naive_single_channel=(
+                timeit(sample_entropy_naive, x[0], repeat=1)
+                if duration <= 2
+                else np.nan
+            ),
+        )
+    )
+print(pd.DataFrame(results))
+
+# %% Scaling with the number of series, 2 seconds windows
+results = list()
+for n_series in (64, 256, 1024, 4096):
+    x = rng.standard_normal((n_series, int(2 * sfreq)))
+    results.append(
+        dict(
+            n_series=n_series,
+            sample=timeit(_sample_entropy, x, 2, 0.2),
+            permutation=timeit(_permutation_entropy, x, 3, 1),
+        )
+    )
+print(pd.DataFrame(results))
@@ -1,70 +1,15 @@
 # %% Imports
-from mne.preprocessing import (
-    ICA,
-    compute_bridged_electrodes,
-    interpolate_bridged_electrodes,
+from eeg_cybersickness.preprocessing import (
+    preprocess_participants,
+    review_preprocessing,
 )
-from mne.viz import plot_bridged_electrodes
 
-from eeg_cybersickness.io import read_raw
-from eeg_cybersickness.utils.path import get_derivative_stem
-
-# %% Load raw recording
+# %% Preprocess all participants and sessions
 root = "/mnt/Isilon/9003_CBT_HNP_MEEG/projects/project_cybersickness/data"
+participants = [9, 12, 23, 28, 31, 32, 34, 36, 57, 58]
+fnames = preprocess_participants(root, participants, (1, 2, 3, 4), n_jobs=-1)
+
+# %% Optional manual review of the bad segments and of the excluded components
 participant = 36
 session = 1
-raw = read_raw(root, participant, session)
-derivative_stem = get_derivative_stem(root, participant, session)
-
-# %% Fix gel-bridges
-raw.set_montage("standard_1020")
-bridged_idx, ed_matrix = compute_bridged_electrodes(raw)
-plot_bridged_electrodes(
-    raw.info,
-    bridged_idx,
-    ed_matrix,
-    title="Bridged Electrodes",
-    topomap_args=dict(vlim=(0, 5)),
-)
-interpolate_bridged_electrodes(raw, bridged_idx)
-raw.set_montage(None)
-
-# %% Filter and annotate bad channels/segments
-raw.filter(
-    l_freq=1.0,
-    h_freq=40.0,
-    method="fir",
-    phase="zero-double",
-    fir_window="hamming",
-    fir_design="firwin",
-    pad="edge",
-    picks=["eeg", "ecg"],
-)
-raw.plot(theme="light")
-
-# %% Save pre-ICA raw recording
-fname = derivative_stem.with_name(f"{derivative_stem.name}-pre-ica-raw.fif")
-raw.save(fname)
-
-# %% Run ICA
-ica = ICA(n_components=None, method="picard")
-raw.set_montage("standard_1020")
-ica.fit(raw)
-ica.plot_components(inst=raw)
-ica.plot_sources(inst=raw, theme="light")
-fname = derivative_stem.with_name(f"{derivative_stem.name}-ica.fif")
-ica.save(fname)
-raw.set_montage(None)
-
-# %% Apply ICA
-ica.apply(raw)
-
-# %% Add reference CPz
-raw.add_reference_channels(ref_channels="CPz")
-raw.set_eeg_reference("average", ch_type="eeg")
-raw.set_montage("standard_1020")
-raw.plot(theme="light")
-
-# %% Save preprocessed file
-fname = derivative_stem.with_name(f"{derivative_stem.name}-raw.fif")
-raw.save(fname)
+review_preprocessing(root, participant, session)